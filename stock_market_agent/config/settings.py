@@ -0,0 +1,192 @@
+"""
+Runtime settings shared by the tools and nodes.
+Every value can be overridden through an environment variable of the same name.
+"""
+
+import os
+
+# ---------------------- Provider HTTP client ----------------------
+
+# Number of distinct host pools kept by the shared session
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+# Maximum number of keep-alive connections kept per host
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+# Retries on connection errors, read timeouts and 5xx responses
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+# Exponential backoff between retries: backoff_factor * 2 ** (retry - 1) seconds
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+# Per request (connect, read) timeout in seconds
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+# ---------------------- Fundamentals fan-out ----------------------
+
+# Worker threads used to fetch the Alpha Vantage fundamentals endpoints concurrently
+FUNDAMENTALS_MAX_WORKERS = int(os.getenv("FUNDAMENTALS_MAX_WORKERS", "6"))
+
+# ---------------------- Provider response cache ----------------------
+
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "cache")),
+)
+# Size bounds, the least recently used entries are evicted first
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", "3600"))
+
+# Per endpoint TTLs in seconds, each overridable with CACHE_TTL_<ENDPOINT>
+_DEFAULT_CACHE_TTLS = {
+    "GLOBAL_QUOTE": 60,
+    "TIME_SERIES_DAILY": 6 * 3600,
+    "OVERVIEW": 24 * 3600,
+    "EARNINGS": 24 * 3600,
+    "BALANCE_SHEET": 24 * 3600,
+    "INCOME_STATEMENT": 24 * 3600,
+    "CASH_FLOW": 24 * 3600,
+    "SYMBOL_SEARCH": 7 * 24 * 3600,
+    "everything": 15 * 60,
+}
+CACHE_TTLS = {
+    endpoint: float(os.getenv(f"CACHE_TTL_{endpoint.upper()}", str(ttl)))
+    for endpoint, ttl in _DEFAULT_CACHE_TTLS.items()
+}
+
+# Stale-while-revalidate windows in seconds: for this long after the TTL an expired entry
+# is still served immediately while a background refresh updates it.
+# Each overridable with CACHE_SWR_<ENDPOINT>; endpoints not listed never serve stale data.
+_DEFAULT_CACHE_SWR = {
+    "GLOBAL_QUOTE": 15 * 60,
+    "everything": 6 * 3600,
+}
+CACHE_SWR = {
+    endpoint: float(os.getenv(f"CACHE_SWR_{endpoint.upper()}", str(window)))
+    for endpoint, window in _DEFAULT_CACHE_SWR.items()
+}
+# Worker threads running the background refreshes
+CACHE_REFRESH_WORKERS = int(os.getenv("CACHE_REFRESH_WORKERS", "4"))
+
+# ---------------------- Alpha Vantage quota ----------------------
+
+# Requests per minute allowed by the Alpha Vantage plan (5 on the free tier, 75+ on premium)
+ALPHA_VANTAGE_REQUESTS_PER_MINUTE = float(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_MINUTE", "5"))
+# Bucket size, i.e. how many requests may be sent back to back
+ALPHA_VANTAGE_BURST = float(os.getenv("ALPHA_VANTAGE_BURST", str(ALPHA_VANTAGE_REQUESTS_PER_MINUTE)))
+# Longest time a call may queue for a token before giving up
+ALPHA_VANTAGE_MAX_QUEUE_WAIT = float(os.getenv("ALPHA_VANTAGE_MAX_QUEUE_WAIT", "120"))
+# Retries after Alpha Vantage answers with a rate-limit note despite the limiter
+ALPHA_VANTAGE_RATE_LIMIT_RETRIES = int(os.getenv("ALPHA_VANTAGE_RATE_LIMIT_RETRIES", "2"))
+
+# ---------------------- Batch quotes ----------------------
+
+# Symbols per batched yfinance download
+QUOTE_BATCH_SIZE = int(os.getenv("QUOTE_BATCH_SIZE", "50"))
+# REALTIME_BULK_QUOTES (up to 100 symbols per call) needs a premium Alpha Vantage key
+ALPHA_VANTAGE_BULK_QUOTES = os.getenv("ALPHA_VANTAGE_BULK_QUOTES", "false").lower() == "true"
+
+# ---------------------- Provider failover ----------------------
+
+# Consecutive failures that open a provider's circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+# Seconds an open circuit waits before letting a single trial request through
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+# Number of recent call latencies kept per provider for the percentiles
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "200"))
+# Samples needed before the primary's p95 is trusted as the hedge delay
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+# Hedge delay in seconds used until enough samples are collected
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "3"))
+# Worker threads per provider running failover and hedged calls
+HEDGE_MAX_WORKERS = int(os.getenv("HEDGE_MAX_WORKERS", "16"))
+
+# ---------------------- Historical bars ----------------------
+
+BAR_STORE_DIR = os.getenv(
+    "BAR_STORE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "bars")),
+)
+# Calendar days of history handed to the indicators
+HISTORY_LOOKBACK_DAYS = int(os.getenv("HISTORY_LOOKBACK_DAYS", "30"))
+# Calendar days of history plotted by the chart tool
+CHART_LOOKBACK_DAYS = int(os.getenv("CHART_LOOKBACK_DAYS", "365"))
+
+# ---------------------- Provider backend ----------------------
+
+# "live" calls the providers, "record" also writes every response to the fixture store,
+# "replay" serves from the fixture store only. Overridable per run with
+# config={"configurable": {"provider_mode": ...}}
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live")
+FIXTURE_DIR = os.getenv(
+    "FIXTURE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "fixtures")),
+)
+# Latency injected into every replayed response (mean and standard deviation)
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+REPLAY_LATENCY_JITTER_MS = float(os.getenv("REPLAY_LATENCY_JITTER_MS", "0"))
+
+# ---------------------- News sentiment ----------------------
+
+# Append-only log of VADER scores per article (hash of URL and publishedAt)
+SENTIMENT_CACHE_PATH = os.getenv(
+    "SENTIMENT_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "sentiment", "article_scores.jsonl")),
+)
+# Scores kept; the log is compacted to the most recent ones once it holds twice as many lines
+SENTIMENT_CACHE_MAX_ENTRIES = int(os.getenv("SENTIMENT_CACHE_MAX_ENTRIES", "50000"))
+# Queries whose last response window is kept for incremental averages, least recently used dropped first
+SENTIMENT_CACHE_MAX_QUERIES = int(os.getenv("SENTIMENT_CACHE_MAX_QUERIES", "1024"))
+# Worker processes scoring articles, each loads the VADER lexicon once
+SENTIMENT_POOL_WORKERS = int(os.getenv("SENTIMENT_POOL_WORKERS", str(os.cpu_count() or 2)))
+# Articles sent to a worker per task
+SENTIMENT_CHUNK_SIZE = int(os.getenv("SENTIMENT_CHUNK_SIZE", "64"))
+# Smaller batches are scored in-process, the IPC would cost more than it saves
+SENTIMENT_MIN_PARALLEL = int(os.getenv("SENTIMENT_MIN_PARALLEL", "128"))
+# Start the workers with the graph instead of on the first batch that needs them. Off by
+# default: the graph is built at import time and most news batches are scored in-process
+SENTIMENT_POOL_WARM = os.getenv("SENTIMENT_POOL_WARM", "false").lower() in ("1", "true", "yes")
+# Companies OR-ed into one NewsAPI query for watchlists (NewsAPI caps q at 500 characters)
+NEWS_COMPANIES_PER_QUERY = int(os.getenv("NEWS_COMPANIES_PER_QUERY", "8"))
+NEWS_QUERY_MAX_LENGTH = int(os.getenv("NEWS_QUERY_MAX_LENGTH", "500"))
+# Near-duplicate (syndicated) articles: MinHash over word shingles, LSH with NUM_PERM / BANDS rows per band
+NEWS_DEDUP_PATH = os.getenv(
+    "NEWS_DEDUP_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "sentiment", "article_minhash.jsonl")),
+)
+NEWS_DEDUP_MAX_ENTRIES = int(os.getenv("NEWS_DEDUP_MAX_ENTRIES", "50000"))
+NEWS_DEDUP_SHINGLE_SIZE = int(os.getenv("NEWS_DEDUP_SHINGLE_SIZE", "3"))
+NEWS_DEDUP_NUM_PERM = int(os.getenv("NEWS_DEDUP_NUM_PERM", "128"))
+NEWS_DEDUP_BANDS = int(os.getenv("NEWS_DEDUP_BANDS", "16"))
+# Estimated Jaccard similarity at which two articles are the same story
+NEWS_DEDUP_THRESHOLD = float(os.getenv("NEWS_DEDUP_THRESHOLD", "0.7"))
+
+# ---------------------- Symbol index ----------------------
+
+# CSV listing files (symbol, name, exchange, optional "|" separated aliases), comma separated.
+# The first one is the Alpha Vantage LISTING_STATUS download; add files for other markets (e.g. BSE).
+SYMBOL_LISTING_PATHS = [
+    path.strip()
+    for path in os.getenv(
+        "SYMBOL_LISTING_PATHS",
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "symbols", "listing_status.csv")),
+    ).split(",")
+    if path.strip()
+]
+# Download LISTING_STATUS once when the first listing file is missing (never in a replay run)
+SYMBOL_LISTING_AUTO_DOWNLOAD = os.getenv("SYMBOL_LISTING_AUTO_DOWNLOAD", "true").lower() in ("1", "true", "yes")
+# Exchanges recognized in a query ("Reliance on NSE") to narrow listings of the same company
+SYMBOL_EXCHANGE_HINTS = set(os.getenv("SYMBOL_EXCHANGE_HINTS", "NYSE,NASDAQ,AMEX,BSE,NSE,LSE,TSX").upper().split(","))
+# Trigram similarity below which names are not fuzzy candidates, and shortest fuzzy-matched mention
+SYMBOL_FUZZY_MIN_SCORE = float(os.getenv("SYMBOL_FUZZY_MIN_SCORE", "0.5"))
+SYMBOL_FUZZY_MIN_LENGTH = int(os.getenv("SYMBOL_FUZZY_MIN_LENGTH", "5"))
+# Shortest upper-case word of a query read as a ticker without "$" or a matching company name
+SYMBOL_BARE_MIN_LENGTH = int(os.getenv("SYMBOL_BARE_MIN_LENGTH", "4"))
+# A prefix or fuzzy match answers without the LLM only above this score and this far ahead of the runner-up
+SYMBOL_MATCH_MIN_SCORE = float(os.getenv("SYMBOL_MATCH_MIN_SCORE", "0.7"))
+SYMBOL_MATCH_MARGIN = float(os.getenv("SYMBOL_MATCH_MARGIN", "0.1"))
+# Prefix and fuzzy candidates considered per mention
+SYMBOL_MAX_CANDIDATES = int(os.getenv("SYMBOL_MAX_CANDIDATES", "20"))
+# Resolved tickers per normalized company mention ("analyze apple" and "Apple stock" share one entry)
+TICKER_CACHE_PATH = os.getenv(
+    "TICKER_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tempData", "symbols", "ticker_resolutions.jsonl")),
+)
+TICKER_CACHE_MAX_ENTRIES = int(os.getenv("TICKER_CACHE_MAX_ENTRIES", "10000"))
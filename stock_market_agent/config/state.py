@@ -9,10 +9,16 @@ from operator import add
 
 from langgraph.graph import MessagesState
 from stock_market_agent.models.schemas import Stocks
+from stock_market_agent.models.bar_series import BarSeriesRef
 from langgraph.managed import IsLastStep
 
 from dataclasses import dataclass, field
 from copilotkit import CopilotKitState
+
+def merge_dicts(left: Optional[Dict], right: Optional[Dict]) -> Dict:
+    """Reducer for keys written by parallel nodes, each adding its own entries."""
+    return {**(left or {}), **(right or {})}
+
 class AnalysisResult(TypedDict):
     decision: str
     confidence: float
@@ -76,10 +82,19 @@ class AgentState2(CopilotKitState):
     """
     query: str
     ticker : Stocks
-    stock_price: str
+    # Every company named in the query, `ticker` first
+    tickers: List[Dict[str, str]]
+    stock_price: Optional[str]
+    # Batch quote columns for all of `tickers` when the query names more than one
+    watchlist_quotes: Dict[str, list]
+    # Age of the served provider data per state key, e.g. {"stock_price": {"age_seconds": 42.0, ...}}
+    data_freshness: Annotated[Dict[str, Dict[str, Union[float, str, bool, None]]], merge_dicts]
     news_sentiment: str
+    # Sentiment records of the other companies in `tickers`, keyed by ticker
+    watchlist_sentiment: Dict[str, Dict]
     indicators_data: str
     historical_data: str
+    bar_series: Optional[BarSeriesRef]
     collected_data: Dict[str, Dict[str, str]]
     risk_report: str
     portfolio_report: str
@@ -0,0 +1,182 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from typing_extensions import TypedDict
+
+from stock_market_agent.utils.bar_store import COLUMNS, Bar, get_bar_store
+
+
+class BarSeriesRef(TypedDict):
+    """Serializable handle to a BarSeries, this is what travels in the graph state."""
+    key: str
+    symbol: str
+    start: str
+    end: str
+
+
+class BarSeries:
+    """
+    Daily bars for one symbol held as parallel NumPy arrays.
+
+    Built once when the historical data node finishes and shared by every indicator
+    and the chart tool, so the bars are never serialized to text and parsed back again.
+    """
+
+    __slots__ = ("symbol", "dates", "open", "high", "low", "close", "adj_close", "volume")
+
+    def __init__(
+        self,
+        symbol: str,
+        dates: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        adj_close: np.ndarray,
+        volume: np.ndarray,
+    ):
+        self.symbol = symbol
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.adj_close = adj_close
+        self.volume = volume
+
+    @classmethod
+    def from_columns(cls, symbol: str, columns: Dict[str, np.ndarray]) -> "BarSeries":
+        # np.asarray drops the memmap subclass without copying the underlying pages
+        return cls(
+            symbol=symbol,
+            dates=np.asarray(columns["date"]),
+            open=np.asarray(columns["open"]),
+            high=np.asarray(columns["high"]),
+            low=np.asarray(columns["low"]),
+            close=np.asarray(columns["close"]),
+            adj_close=np.asarray(columns["adj_close"]),
+            volume=np.asarray(columns["volume"]),
+        )
+
+    @classmethod
+    def from_bars(cls, symbol: str, bars: List[Bar]) -> "BarSeries":
+        fields = list(zip(*bars)) if bars else [()] * len(COLUMNS)
+        columns = {name: np.array(values, dtype=dtype) for (name, dtype), values in zip(COLUMNS.items(), fields)}
+        return cls.from_columns(symbol, columns)
+
+    @classmethod
+    def from_csv(cls, symbol: str, data: str) -> "BarSeries":
+        """Build a series from the legacy "date,price,volume" text. Only close and volume are known."""
+        lines = data.strip().split("\n")[1:]  # Skip header
+        dates, prices, volumes = [], [], []
+        for line in lines:
+            day, price, volume = line.split(",")
+            dates.append(datetime.strptime(day, "%Y-%m-%d").date())
+            prices.append(float(price))
+            volumes.append(int(volume))
+        close = np.array(prices, dtype=np.float64)
+        return cls(
+            symbol=symbol,
+            dates=np.array(dates, dtype="datetime64[D]"),
+            open=close,
+            high=close,
+            low=close,
+            close=close,
+            adj_close=close,
+            volume=np.array(volumes, dtype=np.int64),
+        )
+
+    @property
+    def price(self) -> np.ndarray:
+        return self.close
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def to_bars(self) -> List[Bar]:
+        return [
+            (day.astype(object), float(o), float(h), float(l), float(c), float(a), int(v))
+            for day, o, h, l, c, a, v in zip(
+                self.dates, self.open, self.high, self.low, self.close, self.adj_close, self.volume
+            )
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """OHLCV frame indexed by date, with the yfinance column names used by the chart tool."""
+        return pd.DataFrame(
+            {
+                "Open": self.open,
+                "High": self.high,
+                "Low": self.low,
+                "Close": self.close,
+                "Adj Close": self.adj_close,
+                "Volume": self.volume,
+            },
+            index=pd.DatetimeIndex(self.dates, name="Date"),
+        )
+
+    def to_csv(self) -> str:
+        """Render the "date,price,volume" text used in the LLM prompts."""
+        data = ["date,price,volume"]
+        for day, close, volume in zip(self.dates.astype(str), self.close, self.volume):
+            data.append(f"{day},{close:.2f},{int(volume)}")
+        return "\n".join(data)
+
+
+# Series built in this process, most recently used last
+_MAX_REGISTERED_SERIES = 256
+_registry: "OrderedDict[str, BarSeries]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def register_bar_series(series: BarSeries) -> BarSeriesRef:
+    """Keep the series in memory for the rest of the run and return the handle to put in the state."""
+    # [start, end) as stored, so an evicted series can be rebuilt from the bar store
+    start = series.dates[0].astype(object)
+    end = (series.dates[-1] + np.timedelta64(1, "D")).astype(object)
+    key = f"{series.symbol.upper().strip()}:{start.isoformat()}:{end.isoformat()}"
+    _remember(key, series)
+    return {"key": key, "symbol": series.symbol, "start": start.isoformat(), "end": end.isoformat()}
+
+
+def resolve_bar_series(ref: Optional[BarSeriesRef], symbol: Optional[str] = None) -> Optional[BarSeries]:
+    """
+    Return the series behind a handle. A series evicted from memory (or built by another
+    process) is rebuilt from the local bar store, which is a zero-copy memmap slice.
+
+    With `symbol`, a handle for any other symbol resolves to None: in a checkpointed
+    thread the state can still hold the handle of the previous ticker.
+    """
+    if not ref:
+        return None
+    if symbol is not None and ref["symbol"].upper().strip() != symbol.upper().strip():
+        return None
+    with _registry_lock:
+        series = _registry.get(ref["key"])
+        if series is not None:
+            _registry.move_to_end(ref["key"])
+            return series
+
+    columns = get_bar_store().read(
+        ref["symbol"],
+        start=date.fromisoformat(ref["start"]),
+        end=date.fromisoformat(ref["end"]),
+    )
+    if len(columns["date"]) == 0:
+        return None
+    series = BarSeries.from_columns(ref["symbol"], columns)
+    _remember(ref["key"], series)
+    return series
+
+
+def _remember(key: str, series: BarSeries):
+    """Make `series` the most recently used entry, evicting the oldest beyond the bound."""
+    with _registry_lock:
+        _registry[key] = series
+        _registry.move_to_end(key)
+        while len(_registry) > _MAX_REGISTERED_SERIES:
+            _registry.popitem(last=False)
@@ -205,8 +205,13 @@ class CustomRulesEngine:
         }
 
         for weighted_rule in self.rules:
-            action, confidence, reasoning = weighted_rule.rule_func(data)
-            
+            try:
+                action, confidence, reasoning = weighted_rule.rule_func(data)
+            except (KeyError, TypeError, ValueError) as e:
+                # A metric the providers could not deliver (missing, None or an error string)
+                print(f"Skipping {weighted_rule.rule_func.__name__}, its data is not available: {e}")
+                continue
+
             # Apply exponential weighting to confidence
             confidence_exp = np.exp(confidence - 1)
 
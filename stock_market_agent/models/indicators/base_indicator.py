@@ -1,19 +1,187 @@
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+from stock_market_agent.models.bar_series import BarSeries
+
+# An intermediate computation: its kind followed by its parameters, e.g. ("ema", 12)
+Key = Tuple[Any, ...]
+
+# Streaming indicator class name -> class, so saved states can be restored by type
+_STREAMING_TYPES: Dict[str, Type["StreamingIndicator"]] = {}
+
+
+class StreamingIndicator:
+    """
+    Incremental counterpart of a BaseIndicator: it keeps only the running state (EMA
+    values, Wilder averages, window sums) and folds in one bar per `update` in O(1), giving
+    the same values `calculate` would on the whole history.
+
+    `state()` is a JSON-serializable dict of constructor arguments, so `from_state(state)`
+    resumes the stream, e.g. in another process or after a restart.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _STREAMING_TYPES[cls.__name__] = cls
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        raise NotImplementedError("Subclasses should implement this method")
+
+    def state(self) -> Dict[str, Any]:
+        raise NotImplementedError("Subclasses should implement this method")
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "StreamingIndicator":
+        return cls(**state)
+
 
 class BaseIndicator:
-    def calculate(self, parsed_data: Dict[str, List[float]]) -> Dict[str, float]:
+    # Keys of the dict `calculate` returns
+    outputs: Tuple[str, ...] = ()
+
+    def calculate(self, series: BarSeries) -> Dict[str, float]:
+        raise NotImplementedError("Subclasses should implement this method")
+
+    def inputs(self) -> List[Key]:
+        """Intermediates `compute` reads from the context."""
+        return []
+
+    def compute(self, context: "SeriesContext") -> Dict[str, float]:
+        """`calculate` on shared intermediates; indicators that declare no inputs just calculate."""
+        return self.calculate(context.series)
+
+    def stream(self, series: Optional[BarSeries] = None) -> StreamingIndicator:
+        """A streaming counterpart warmed up on `series` (or starting empty)."""
         raise NotImplementedError("Subclasses should implement this method")
 
+
+class IndicatorStream:
+    """Several streaming indicators updated together, one tick at a time."""
+
+    def __init__(self, indicators: Dict[str, StreamingIndicator]):
+        self.indicators = indicators
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        values = {}
+        for indicator in self.indicators.values():
+            values.update(indicator.update(close, volume))
+        return values
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            name: {"type": type(indicator).__name__, "state": indicator.state()}
+            for name, indicator in self.indicators.items()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "IndicatorStream":
+        return cls({
+            name: _STREAMING_TYPES[entry["type"]].from_state(entry["state"])
+            for name, entry in state.items()
+        })
+
+
+class Intermediate(NamedTuple):
+    # Keys this intermediate reads, given its parameters
+    inputs: Callable[..., List[Key]]
+    # (context, *parameters) -> value; reads its inputs through context.get
+    compute: Callable[..., Any]
+
+
+class SeriesContext:
+    """The intermediates of one series, each computed at most once."""
+
+    def __init__(self, series: BarSeries, intermediates: Dict[str, Intermediate]):
+        self.series = series
+        self._intermediates = intermediates
+        self._values: Dict[Key, Any] = {}
+
+    def get(self, key: Key) -> Any:
+        if key not in self._values:
+            kind, *params = key
+            self._values[key] = self._intermediates[kind].compute(self, *params)
+        return self._values[key]
+
+    def computed(self) -> List[Key]:
+        return list(self._values)
+
+
 class IndicatorRegistry:
-    def __init__(self):
+    """
+    Indicators plus the intermediates they share (price deltas, prefix sums, EMAs...).
+
+    Every indicator declares the output keys it produces and the intermediate keys it
+    reads, and every intermediate the keys it reads in turn, which makes a small DAG.
+    `evaluate` walks it back from the requested outputs, so only the indicators that
+    produce them run, and each intermediate is computed once per series however many
+    indicators need it.
+    """
+
+    def __init__(self, intermediates: Optional[Dict[str, Intermediate]] = None):
         self._indicators : Dict[str, BaseIndicator] = {}
+        self._intermediates: Dict[str, Intermediate] = dict(intermediates or {})
 
     def register(self, name: str, indicator: BaseIndicator):
         self._indicators[name] = indicator
 
+    def register_intermediate(self, kind: str, inputs: Callable[..., List[Key]], compute: Callable[..., Any]):
+        self._intermediates[kind] = Intermediate(inputs, compute)
+
     def get(self, name: str) -> BaseIndicator:
         return self._indicators.get(name)
-    
+
     def getRegisteredIndicators(self) -> Dict[str, BaseIndicator]:
         return self._indicators
-    
\ No newline at end of file
+
+    def plan(self, outputs: Optional[Iterable[str]] = None) -> Tuple[List[Key], List[str]]:
+        """
+        The intermediates in dependency order and the indicators to run for `outputs`
+        (every registered indicator when None). Raises KeyError for an output no indicator
+        produces and ValueError for a dependency cycle.
+        """
+        if outputs is None:
+            names = list(self._indicators)
+        else:
+            producers = {output: name for name, indicator in self._indicators.items() for output in indicator.outputs}
+            names = []
+            for output in outputs:
+                if output not in producers:
+                    raise KeyError(f"No registered indicator produces {output!r}")
+                if producers[output] not in names:
+                    names.append(producers[output])
+
+        order: List[Key] = []
+        done, visiting = set(), set()
+
+        def visit(key: Key):
+            if key in done:
+                return
+            if key in visiting:
+                raise ValueError(f"Dependency cycle through {key!r}")
+            if key[0] not in self._intermediates:
+                raise KeyError(f"No intermediate registered for {key!r}")
+            visiting.add(key)
+            for dependency in self._intermediates[key[0]].inputs(*key[1:]):
+                visit(dependency)
+            visiting.discard(key)
+            done.add(key)
+            order.append(key)
+
+        for name in names:
+            for key in self._indicators[name].inputs():
+                visit(key)
+        return order, names
+
+    def evaluate(self, series: BarSeries, outputs: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Values of `outputs` (of every indicator when None) on `series`."""
+        outputs = None if outputs is None else list(outputs)
+        intermediates, names = self.plan(outputs)
+        context = SeriesContext(series, self._intermediates)
+        for key in intermediates:
+            context.get(key)
+
+        values = {}
+        for name in names:
+            values.update(self._indicators[name].compute(context))
+        if outputs is not None:
+            values = {output: values[output] for output in outputs}
+        return values
+
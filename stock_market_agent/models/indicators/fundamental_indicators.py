@@ -1,17 +1,17 @@
-from typing import Dict, List
+from typing import Dict
+from stock_market_agent.models.bar_series import BarSeries
 from stock_market_agent.models.indicators.technical.bollinger_bands import BollingerBands
 from stock_market_agent.models.indicators.technical.macd import MACD
 from stock_market_agent.models.indicators.technical.rsi import RSI
 from stock_market_agent.models.indicators.technical.historical_analysis_indicator import HistoricalAnalysisIndicator
-from datetime import datetime
 from stock_market_agent.models.indicators.base_indicator import IndicatorRegistry
 
 
 
 class FundamentalIndicators:
-    def __init__(self, data: str):
-        self._parsed_data = self._parse_data(data)
-        self.prices = self._parsed_data["price"]
+    def __init__(self, series: BarSeries):
+        self.series = series
+        self.prices = series.close
         self.registry = IndicatorRegistry()
         self._register_indicators()
      
@@ -23,15 +23,5 @@ class FundamentalIndicators:
     def calculate_indicators(self) -> Dict[str, float]:
         indicators_data = {}
         for name, indicator in self.registry._indicators.items():
-            indicators_data.update(indicator.calculate(self._parsed_data))
+            indicators_data.update(indicator.calculate(self.series))
         return indicators_data
-
-    def _parse_data(self, data: str) -> Dict[str, List[float]]:
-        lines = data.strip().split("\n")[1:]  # Skip header
-        parsed = {"date": [], "price": [], "volume": []}
-        for line in lines:
-            date, price, volume = line.split(",")
-            parsed["date"].append(datetime.strptime(date, "%Y-%m-%d"))
-            parsed["price"].append(float(price))
-            parsed["volume"].append(int(volume))
-        return parsed
\ No newline at end of file
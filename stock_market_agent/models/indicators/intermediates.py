@@ -0,0 +1,35 @@
+"""Intermediate arrays shared by the technical indicators, computed once per series."""
+
+from typing import Dict
+
+import numpy as np
+
+from stock_market_agent.models.indicators.base_indicator import Intermediate
+from stock_market_agent.models.indicators.technical.bollinger_bands import prefix_sums, window_mean_std
+from stock_market_agent.models.indicators.technical.ema import ema
+
+
+def _deltas(context):
+    return np.diff(context.get(("close",)), axis=-1)
+
+
+def _returns(context):
+    close = context.get(("close",))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return context.get(("deltas",)) / close[..., :-1]
+
+
+TECHNICAL_INTERMEDIATES: Dict[str, Intermediate] = {
+    "close": Intermediate(lambda: [], lambda context: np.asarray(context.series.close, dtype=float)),
+    "volume": Intermediate(lambda: [], lambda context: np.asarray(context.series.volume, dtype=float)),
+    "deltas": Intermediate(lambda: [("close",)], _deltas),
+    "returns": Intermediate(lambda: [("close",), ("deltas",)], _returns),
+    "gains": Intermediate(lambda: [("deltas",)], lambda context: np.maximum(context.get(("deltas",)), 0.0)),
+    "losses": Intermediate(lambda: [("deltas",)], lambda context: np.maximum(-context.get(("deltas",)), 0.0)),
+    "prefix_sums": Intermediate(lambda: [("close",)], lambda context: prefix_sums(context.get(("close",)))),
+    "rolling_mean_std": Intermediate(
+        lambda period: [("prefix_sums",)],
+        lambda context, period: window_mean_std(context.get(("prefix_sums",)), period),
+    ),
+    "ema": Intermediate(lambda period: [("close",)], lambda context, period: ema(context.get(("close",)), period)),
+}
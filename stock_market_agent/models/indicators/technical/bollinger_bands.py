@@ -1,22 +1,152 @@
 import numpy as np
-from typing import Dict, List, Tuple
-from stock_market_agent.models.indicators.base_indicator import BaseIndicator
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from stock_market_agent.models.bar_series import BarSeries
+from stock_market_agent.models.indicators.base_indicator import BaseIndicator, StreamingIndicator
+
+
+class BandSeries(NamedTuple):
+    """Full Bollinger series aligned with the input prices, NaN until a window is complete."""
+    mean: np.ndarray
+    upper: np.ndarray
+    lower: np.ndarray
+
+    def last(self) -> Dict[str, float]:
+        # [()] turns the 0-d result of a single series into a numpy scalar
+        return {
+            "Bollinger Mean": self.mean[..., -1][()],
+            "Bollinger Upper": self.upper[..., -1][()],
+            "Bollinger Lower": self.lower[..., -1][()],
+        }
+
+
+class PrefixSums(NamedTuple):
+    """Cumulative sums of centered prices and their squares, with a leading zero column."""
+    shift: np.ndarray
+    sums: np.ndarray
+    squares: np.ndarray
+
+
+def prefix_sums(prices: np.ndarray) -> PrefixSums:
+    """
+    Prices are centered on their mean first so the sum of squares does not lose precision
+    on long histories.
+    """
+    prices = np.asarray(prices, dtype=float)
+    shift = prices.mean(axis=-1, keepdims=True) if prices.shape[-1] else np.zeros(prices.shape[:-1] + (1,))
+    centered = prices - shift
+    zeros = np.zeros(prices.shape[:-1] + (1,))
+    return PrefixSums(
+        shift,
+        np.concatenate((zeros, np.cumsum(centered, axis=-1)), axis=-1),
+        np.concatenate((zeros, np.cumsum(centered * centered, axis=-1)), axis=-1),
+    )
+
+
+def window_mean_std(prefix: PrefixSums, period: int) -> tuple:
+    """Rolling mean and population standard deviation of one period from `prefix_sums`, in O(n)."""
+    shape = prefix.sums.shape[:-1] + (prefix.sums.shape[-1] - 1,)
+    mean = np.full(shape, np.nan)
+    std = np.full(shape, np.nan)
+    if 0 < period <= shape[-1]:
+        sums, squares = prefix.sums, prefix.squares
+        window_mean = (sums[..., period:] - sums[..., :-period]) / period
+        window_var = (squares[..., period:] - squares[..., :-period]) / period - window_mean ** 2
+        mean[..., period - 1:] = window_mean + prefix.shift
+        # Rounding can leave tiny negative variances on flat windows
+        std[..., period - 1:] = np.sqrt(np.maximum(window_var, 0.0))
+    return mean, std
+
+
+def rolling_mean_std(prices: np.ndarray, periods: Iterable[int]) -> Dict[int, tuple]:
+    """
+    Rolling mean and population standard deviation over the last axis for every period,
+    from one pair of cumulative sums: O(n) per period instead of O(n * period).
+    """
+    prefix = prefix_sums(prices)
+    return {period: window_mean_std(prefix, period) for period in periods}
+
+
 class BollingerBands(BaseIndicator):
+    outputs = ("Bollinger Mean", "Bollinger Upper", "Bollinger Lower")
+
     def __init__(self, period: int = 20, num_std_dev: float = 2.0):
         self.period = period
         self.num_std_dev = num_std_dev
 
-    def calculate(self, parsed_data: Dict[str, List[float]]) -> Dict[str, float]:
-        prices = parsed_data["price"]
-        prices_array = np.array(prices)
-        rolling_mean = np.convolve(prices_array, np.ones(self.period)/self.period, mode='valid')
-        rolling_std = np.array([np.std(prices_array[i:i+self.period]) for i in range(len(prices_array) - self.period + 1)])
-        
-        upper_band = rolling_mean + (rolling_std * self.num_std_dev)
-        lower_band = rolling_mean - (rolling_std * self.num_std_dev)
-        
+    def calculate(self, series: BarSeries) -> Dict[str, float]:
+        return self.bands(series.close).last()
+
+    def inputs(self):
+        return [("rolling_mean_std", self.period)]
+
+    def compute(self, context) -> Dict[str, float]:
+        return self.from_mean_std(*context.get(("rolling_mean_std", self.period))).last()
+
+    def bands(self, prices: np.ndarray, period: Optional[int] = None) -> BandSeries:
+        """Full series for one period; `prices` may be one series or a (symbols, days) matrix."""
+        period = period or self.period
+        return self.multi_bands(prices, [period])[period]
+
+    def multi_bands(self, prices: np.ndarray, periods: Iterable[int]) -> Dict[int, BandSeries]:
+        """Bands for several periods from a single pass over the prices."""
+        return {period: self.from_mean_std(mean, std) for period, (mean, std) in rolling_mean_std(prices, periods).items()}
+
+    def from_mean_std(self, mean: np.ndarray, std: np.ndarray) -> BandSeries:
+        return BandSeries(mean, mean + std * self.num_std_dev, mean - std * self.num_std_dev)
+
+    def stream(self, series: Optional[BarSeries] = None) -> "StreamingBollingerBands":
+        window = [] if series is None else [float(price) for price in series.close[-self.period:]]
+        return StreamingBollingerBands(self.period, self.num_std_dev, window=window)
+
+
+class StreamingBollingerBands(StreamingIndicator):
+    """
+    Bollinger bands one close at a time from the last `period` closes and their running
+    sum and sum of squares (relative to a fixed shift, for precision). The sums are
+    rebuilt from the window once every `period` updates so rounding cannot accumulate,
+    which keeps the amortized cost per update O(1).
+    """
+
+    def __init__(self, period: int = 20, num_std_dev: float = 2.0, window: Optional[List[float]] = None):
+        self.period = period
+        self.num_std_dev = num_std_dev
+        self._window = deque((float(price) for price in window or []), maxlen=period)
+        self._resum()
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        close = float(close)
+        if len(self._window) == self.period:
+            dropped = self._window[0] - self._shift
+            self._sum -= dropped
+            self._squares -= dropped * dropped
+        self._window.append(close)
+        added = close - self._shift
+        self._sum += added
+        self._squares += added * added
+        self._updates += 1
+        if self._updates >= self.period:
+            self._resum()
+        return self.last()
+
+    def last(self) -> Dict[str, float]:
+        if len(self._window) < self.period:
+            nan = float("nan")
+            return {"Bollinger Mean": nan, "Bollinger Upper": nan, "Bollinger Lower": nan}
+        mean = self._sum / self.period
+        std = max(self._squares / self.period - mean * mean, 0.0) ** 0.5
+        mean += self._shift
         return {
-            "Bollinger Mean": rolling_mean[-1],
-            "Bollinger Upper": upper_band[-1],
-            "Bollinger Lower": lower_band[-1]
-        }
\ No newline at end of file
+            "Bollinger Mean": mean,
+            "Bollinger Upper": mean + std * self.num_std_dev,
+            "Bollinger Lower": mean - std * self.num_std_dev,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        return {"period": self.period, "num_std_dev": self.num_std_dev, "window": list(self._window)}
+
+    def _resum(self):
+        self._shift = self._window[-1] if self._window else 0.0
+        self._sum = sum(price - self._shift for price in self._window)
+        self._squares = sum((price - self._shift) ** 2 for price in self._window)
+        self._updates = 0
@@ -0,0 +1,60 @@
+import numpy as np
+from typing import Any, Dict, Optional, Union
+from scipy.signal import lfilter
+
+
+def ema_alpha(period: int) -> float:
+    """Smoothing factor of the conventional N-period EMA."""
+    return 2.0 / (period + 1)
+
+
+def ema(
+    values: np.ndarray,
+    period: Optional[int] = None,
+    alpha: Optional[float] = None,
+    initial: Optional[Union[float, np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Exponential moving average y[i] = y[i-1] + alpha * (values[i] - y[i-1]) over the last
+    axis, computed as one IIR filter pass, so `values` may be a single series or a
+    (symbols, days) matrix.
+
+    `alpha` defaults to 2 / (period + 1); Wilder's smoothing is alpha = 1 / period.
+    Without `initial` the average starts at the first value. With `initial` (one value,
+    or one per row) it continues from a stored EMA, so appending bars never recomputes
+    from bar zero: ema(new, period, initial=old[..., -1]) equals the tail of ema(all, period).
+    """
+    if alpha is None:
+        if not period:
+            raise ValueError("ema() needs a period or an alpha")
+        alpha = ema_alpha(period)
+    values = np.asarray(values, dtype=float)
+    if values.shape[-1] == 0:
+        return values.copy()
+
+    if initial is None:
+        # Starting from y[-1] = values[0] makes y[0] = values[0]
+        initial = values[..., 0]
+    zi = ((1.0 - alpha) * np.asarray(initial, dtype=float) * np.ones(values.shape[:-1]))[..., np.newaxis]
+    smoothed, _ = lfilter([alpha], [1.0, alpha - 1.0], values, axis=-1, zi=zi)
+    return smoothed
+
+
+class StreamingEMA:
+    """One EMA updated per value in O(1); starts at the first value like `ema`."""
+
+    def __init__(self, period: Optional[int] = None, alpha: Optional[float] = None, value: Optional[float] = None):
+        if alpha is None:
+            if not period:
+                raise ValueError("StreamingEMA needs a period or an alpha")
+            alpha = ema_alpha(period)
+        self.alpha = alpha
+        self.value = value
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def state(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "value": self.value}
@@ -1,15 +1,27 @@
+import math
 import numpy as np
-from typing import Dict, List, Tuple
-from stock_market_agent.models.indicators.base_indicator import BaseIndicator
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from stock_market_agent.models.bar_series import BarSeries
+from stock_market_agent.models.indicators.base_indicator import BaseIndicator, StreamingIndicator
 from scipy import stats
 
 class HistoricalAnalysisIndicator(BaseIndicator):
+    outputs = ("Price Trend", "Volatility", "Support Level", "Resistance Level", "Volume Trend", "Price Momentum", "Average Price")
+
     def __init__(self):
         pass
     
-    def calculate(self, parsed_data: Dict[str, List[float]]) -> Dict[str, float]:
-        prices = parsed_data["price"]
-        volumes = parsed_data["volume"]
+    def calculate(self, series: BarSeries) -> Dict[str, float]:
+        return self.analyse(series.close, series.volume)
+
+    def inputs(self):
+        return [("close",), ("volume",)]
+
+    def compute(self, context) -> Dict[str, float]:
+        return self.analyse(context.get(("close",)), context.get(("volume",)))
+
+    def analyse(self, prices: np.ndarray, volumes: np.ndarray) -> Dict[str, float]:
         trend = self.calculate_trend(prices)
         volatility = self.calculate_volatility(prices)
         support, resistance = self.identify_support_resistance(prices)
@@ -43,6 +55,10 @@ class HistoricalAnalysisIndicator(BaseIndicator):
     def volume_trend(self, volumes: List[float]) -> str:
         avg_volume_first_half = np.mean(volumes[:len(volumes)//2])
         avg_volume_second_half = np.mean(volumes[len(volumes)//2:])
+        return self.volume_label(avg_volume_first_half, avg_volume_second_half)
+
+    @staticmethod
+    def volume_label(avg_volume_first_half: float, avg_volume_second_half: float) -> str:
         if avg_volume_second_half > avg_volume_first_half * 1.1:
             return "increasing"
         elif avg_volume_second_half < avg_volume_first_half * 0.9:
@@ -53,6 +69,13 @@ class HistoricalAnalysisIndicator(BaseIndicator):
     def price_momentum(self, prices: List[float]) -> str:
         short_term_avg = np.mean(prices[-5:])
         long_term_avg = np.mean(prices)
+        return self.momentum_label(short_term_avg, long_term_avg)
+
+    @staticmethod
+    def momentum_label(short_term_avg: float, long_term_avg: float) -> str:
+        # Averages over the same closes (five bars or fewer) are a tie however they were rounded
+        if math.isclose(short_term_avg, long_term_avg, rel_tol=1e-9):
+            return "neutral"
         if short_term_avg > long_term_avg * 1.05:
             return "strong positive"
         elif short_term_avg > long_term_avg:
@@ -65,4 +88,103 @@ class HistoricalAnalysisIndicator(BaseIndicator):
             return "neutral"
 
     def calculate_average_price(self, prices: List[float]) -> float:
-        return np.mean(prices)
\ No newline at end of file
+        return np.mean(prices)
+
+    def stream(self, series: Optional[BarSeries] = None) -> "StreamingHistoricalAnalysis":
+        stream = StreamingHistoricalAnalysis()
+        if series is not None:
+            for price, volume in zip(series.close, series.volume):
+                stream.update(price, volume)
+        return stream
+
+
+class StreamingHistoricalAnalysis(StreamingIndicator):
+    """
+    Whole-history statistics one bar at a time: the trend slope, volatility and average
+    come from running sums (prices shifted by the first close for precision), support and
+    resistance from the running min and max, momentum from the last five closes.
+
+    The volume trend compares the halves of the whole history, so the volumes of the
+    current second half are kept; each update still moves at most one of them across the
+    split, but the state grows with the history.
+    """
+
+    def __init__(
+        self,
+        count: int = 0,
+        shift: float = 0.0,
+        sum_y: float = 0.0,
+        sum_xy: float = 0.0,
+        sum_yy: float = 0.0,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        recent: Optional[List[float]] = None,
+        first_half_volume: float = 0.0,
+        second_half_volumes: Optional[List[float]] = None,
+    ):
+        self.count = count
+        self.shift = shift
+        self.sum_y = sum_y
+        self.sum_xy = sum_xy
+        self.sum_yy = sum_yy
+        self.low = low
+        self.high = high
+        self.recent = deque(recent or [], maxlen=5)
+        self.first_half_volume = first_half_volume
+        self.second_half_volumes = deque(second_half_volumes or [])
+        self._second_half_volume = sum(self.second_half_volumes)
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        close, volume = float(close), float(volume)
+        if self.count == 0:
+            self.shift = close
+        y = close - self.shift
+        self.sum_xy += self.count * y
+        self.sum_y += y
+        self.sum_yy += y * y
+        self.count += 1
+        self.low = close if self.low is None else min(self.low, close)
+        self.high = close if self.high is None else max(self.high, close)
+        self.recent.append(close)
+
+        self.second_half_volumes.append(volume)
+        self._second_half_volume += volume
+        # The split sits at count // 2, so it advances one bar on every second update
+        if len(self.second_half_volumes) > self.count - self.count // 2:
+            moved = self.second_half_volumes.popleft()
+            self._second_half_volume -= moved
+            self.first_half_volume += moved
+
+        n = self.count
+        mean_y = self.sum_y / n
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        denominator = n * sum_xx - sum_x * sum_x
+        slope = (n * self.sum_xy - sum_x * self.sum_y) / denominator if denominator else float("nan")
+        first_half = n // 2
+        return {
+            "Price Trend": slope,
+            "Volatility": max(self.sum_yy / n - mean_y * mean_y, 0.0) ** 0.5,
+            "Support Level": self.low,
+            "Resistance Level": self.high,
+            "Volume Trend": HistoricalAnalysisIndicator.volume_label(
+                self.first_half_volume / first_half if first_half else float("nan"),
+                self._second_half_volume / len(self.second_half_volumes),
+            ),
+            "Price Momentum": HistoricalAnalysisIndicator.momentum_label(sum(self.recent) / len(self.recent), mean_y + self.shift),
+            "Average Price": mean_y + self.shift,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "shift": self.shift,
+            "sum_y": self.sum_y,
+            "sum_xy": self.sum_xy,
+            "sum_yy": self.sum_yy,
+            "low": self.low,
+            "high": self.high,
+            "recent": list(self.recent),
+            "first_half_volume": self.first_half_volume,
+            "second_half_volumes": list(self.second_half_volumes),
+        }
@@ -1,50 +1,101 @@
 import numpy as np
-from typing import Dict, List, Tuple
-from stock_market_agent.models.indicators.base_indicator import BaseIndicator
+from typing import Any, Dict, NamedTuple, Optional
+from stock_market_agent.models.bar_series import BarSeries
+from stock_market_agent.models.indicators.base_indicator import BaseIndicator, StreamingIndicator
+from stock_market_agent.models.indicators.technical.ema import StreamingEMA, ema
+
+
+class MACDSeries(NamedTuple):
+    """MACD, signal and histogram aligned bar for bar with the input prices."""
+    macd: np.ndarray
+    signal: np.ndarray
+    histogram: np.ndarray
+    # Last fast, slow and signal EMA values, to continue the series on new bars
+    state: Dict[str, np.ndarray]
+
+    def last(self) -> Dict[str, float]:
+        # [()] turns the 0-d result of a single series into a numpy scalar
+        return {
+            "MACD Line": self.macd[..., -1][()],
+            "Signal Line": self.signal[..., -1][()],
+            "MACD Histogram": self.histogram[..., -1][()],
+        }
+
 
 class MACD(BaseIndicator):
+    outputs = ("MACD Line", "Signal Line", "MACD Histogram")
+
     def __init__(self, short_period: int = 12, long_period: int = 26, signal_period: int = 9):
         self.short_period = short_period
         self.long_period = long_period
         self.signal_period = signal_period
 
-    def calculate(self, parsed_data: Dict[str, List[float]]) -> Dict[str, float]:
-        # Ensure the key is correct
-        prices = parsed_data.get("price")
-        if prices is None:
-            raise KeyError("The key 'price' is missing from parsed_data.")
-
-        prices_array = np.array(prices)
-        
-        # Calculate EMAs using a more robust method
-        short_ema = self._ema(prices_array, self.short_period)
-        long_ema = self._ema(prices_array, self.long_period)
-        
-        # Ensure both EMAs have the same length
-        min_length = min(len(short_ema), len(long_ema))
-        short_ema = short_ema[-min_length:]
-        long_ema = long_ema[-min_length:]
-        
+    def calculate(self, series: BarSeries) -> Dict[str, float]:
+        return self.series(series.close).last()
+
+    def inputs(self):
+        return [("ema", self.short_period), ("ema", self.long_period)]
+
+    def compute(self, context) -> Dict[str, float]:
+        return self._from_emas(context.get(("ema", self.short_period)), context.get(("ema", self.long_period))).last()
+
+    def series(self, prices: np.ndarray, state: Optional[Dict[str, np.ndarray]] = None) -> MACDSeries:
+        """
+        Full MACD for one series or a (symbols, days) matrix. Pass the `state` of an earlier
+        result to continue it on the bars that followed instead of starting over.
+        """
+        state = state or {}
+        short_ema = ema(prices, self.short_period, initial=state.get("fast"))
+        long_ema = ema(prices, self.long_period, initial=state.get("slow"))
+        return self._from_emas(short_ema, long_ema, state.get("signal"))
+
+    def _from_emas(self, short_ema: np.ndarray, long_ema: np.ndarray, signal: Optional[np.ndarray] = None) -> MACDSeries:
         macd_line = short_ema - long_ema
-        signal_line = self._ema(macd_line, self.signal_period)
-        
-        # Ensure signal_line and macd_line have the same length
-        min_length = min(len(macd_line), len(signal_line))
-        macd_line = macd_line[-min_length:]
-        signal_line = signal_line[-min_length:]
-        
-        macd_histogram = macd_line - signal_line
-        
+        signal_line = ema(macd_line, self.signal_period, initial=signal)
+        return MACDSeries(
+            macd_line,
+            signal_line,
+            macd_line - signal_line,
+            {"fast": short_ema[..., -1], "slow": long_ema[..., -1], "signal": signal_line[..., -1]},
+        )
+
+    def stream(self, series: Optional[BarSeries] = None) -> "StreamingMACD":
+        state = {}
+        if series is not None and len(series):
+            state = {name: float(value) for name, value in self.series(series.close).state.items()}
+        return StreamingMACD(self.short_period, self.long_period, self.signal_period, **state)
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD one close at a time from the last fast, slow and signal EMA values."""
+
+    def __init__(
+        self,
+        short_period: int = 12,
+        long_period: int = 26,
+        signal_period: int = 9,
+        fast: Optional[float] = None,
+        slow: Optional[float] = None,
+        signal: Optional[float] = None,
+    ):
+        self.short_period = short_period
+        self.long_period = long_period
+        self.signal_period = signal_period
+        self._fast = StreamingEMA(short_period, value=fast)
+        self._slow = StreamingEMA(long_period, value=slow)
+        self._signal = StreamingEMA(signal_period, value=signal)
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        macd_line = self._fast.update(close) - self._slow.update(close)
+        signal_line = self._signal.update(macd_line)
+        return {"MACD Line": macd_line, "Signal Line": signal_line, "MACD Histogram": macd_line - signal_line}
+
+    def state(self) -> Dict[str, Any]:
         return {
-            "MACD Line": macd_line[-1],
-            "Signal Line": signal_line[-1],
-            "MACD Histogram": macd_histogram[-1]
+            "short_period": self.short_period,
+            "long_period": self.long_period,
+            "signal_period": self.signal_period,
+            "fast": self._fast.value,
+            "slow": self._slow.value,
+            "signal": self._signal.value,
         }
-
-    def _ema(self, prices: np.ndarray, period: int) -> np.ndarray:
-        return np.convolve(prices, np.ones(period)/period, mode='valid')
-    
-    # mean, upper, lower = bb.calculate(prices)
-    # financial_data["Bollinger Mean"] = mean[-1]  # Use the latest value
-    # financial_data["Bollinger Upper"] = upper[-1]
-    # financial_data["Bollinger Lower"] = lower[-1]
\ No newline at end of file
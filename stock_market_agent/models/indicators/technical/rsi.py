@@ -1,34 +1,112 @@
 import numpy as np
-from typing import Dict, List
-from stock_market_agent.models.indicators.base_indicator import BaseIndicator
+from typing import Any, Dict, List, Optional
+from stock_market_agent.models.bar_series import BarSeries
+from stock_market_agent.models.indicators.base_indicator import BaseIndicator, StreamingIndicator
+from stock_market_agent.models.indicators.technical.ema import ema
+
+
+def rsi_from_averages(up: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """100 - 100 / (1 + up / down), written so windows without losses give 100 and flat windows 50."""
+    total = up + down
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, 100.0 * up / np.where(total > 0, total, 1.0), 50.0)
+
 
 class RSI(BaseIndicator):
+    outputs = ("RSI",)
+
     def __init__(self, period: int = 14):
         self.period = period
 
-    def calculate(self, parsed_data: Dict[str, List[float]]) -> Dict[str, float]:
-        prices = parsed_data["price"]
-        deltas = np.diff(prices)
-        seed = deltas[:self.period+1]
-        up = seed[seed >= 0].sum()/self.period
-        down = -seed[seed < 0].sum()/self.period
-        rs = up/down
-        rsi = np.zeros_like(prices)
-        rsi[:self.period] = 100. - 100./(1. + rs)
-
-        for i in range(self.period, len(prices)):
-            delta = deltas[i - 1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-
-            up = (up*(self.period - 1) + upval)/self.period
-            down = (down*(self.period - 1) + downval)/self.period
-
-            rs = up/down
-            rsi[i] = 100. - 100./(1. + rs)
-
-        return {"RSI": rsi[-1]}
\ No newline at end of file
+    def calculate(self, series: BarSeries) -> Dict[str, float]:
+        return {"RSI": self.series(series.close)[..., -1][()]}
+
+    def inputs(self):
+        return [("gains",), ("losses",)]
+
+    def compute(self, context) -> Dict[str, float]:
+        gains, losses = context.get(("gains",)), context.get(("losses",))
+        if gains.shape[-1] == 0:
+            return {"RSI": np.float64(np.nan)}
+        up, down = self.smooth(gains, losses)
+        return {"RSI": rsi_from_averages(up[..., -1], down[..., -1])[()]}
+
+    def series(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Full RSI series aligned with `prices`, which may be one series or a (symbols, days)
+        matrix. The first `period` values repeat the seed average, as the per-bar loop did.
+        """
+        prices = np.asarray(prices, dtype=float)
+        if prices.shape[-1] < 2:
+            return np.full(prices.shape, np.nan)
+        return rsi_from_averages(*self.averages(prices))
+
+    def averages(self, prices: np.ndarray):
+        """Wilder's average gain and loss at every bar (at least two prices)."""
+        deltas = np.diff(np.asarray(prices, dtype=float), axis=-1)
+        return self.smooth(np.where(deltas > 0, deltas, 0.0), np.where(deltas < 0, -deltas, 0.0))
+
+    def smooth(self, gains: np.ndarray, losses: np.ndarray):
+        """Wilder's averages from the per-bar gains and losses (one fewer than the prices)."""
+        shape = gains.shape[:-1] + (gains.shape[-1] + 1,)
+        # The seed averages period + 1 deltas over `period`, matching the original definition
+        up = np.empty(shape)
+        down = np.empty(shape)
+        up[..., :self.period] = (gains[..., :self.period + 1].sum(axis=-1) / self.period)[..., np.newaxis]
+        down[..., :self.period] = (losses[..., :self.period + 1].sum(axis=-1) / self.period)[..., np.newaxis]
+
+        if shape[-1] > self.period:
+            # Bar i (i >= period) folds in deltas[i - 1]; Wilder's smoothing is an EMA with alpha = 1 / period
+            alpha = 1.0 / self.period
+            up[..., self.period:] = ema(gains[..., self.period - 1:], alpha=alpha, initial=up[..., 0])
+            down[..., self.period:] = ema(losses[..., self.period - 1:], alpha=alpha, initial=down[..., 0])
+        return up, down
+
+    def stream(self, series: Optional[BarSeries] = None) -> "StreamingRSI":
+        prices = [] if series is None else list(map(float, series.close))
+        if len(prices) < self.period + 2:
+            return StreamingRSI(self.period, warmup=prices)
+        up, down = self.averages(prices)
+        return StreamingRSI(self.period, up=float(up[-1]), down=float(down[-1]), last_close=prices[-1])
+
+
+class StreamingRSI(StreamingIndicator):
+    """
+    RSI one close at a time. Until the seed window (period + 2 closes) is complete the
+    closes are buffered and the batch formula is applied to the buffer; from then on each
+    close updates the two Wilder averages.
+    """
+
+    def __init__(
+        self,
+        period: int = 14,
+        up: Optional[float] = None,
+        down: Optional[float] = None,
+        last_close: Optional[float] = None,
+        warmup: Optional[List[float]] = None,
+    ):
+        self.period = period
+        self.up = up
+        self.down = down
+        self.last_close = last_close
+        self.warmup = list(warmup or [])
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        close = float(close)
+        if self.up is None:
+            self.warmup.append(close)
+            if len(self.warmup) < 2:
+                return {"RSI": float("nan")}
+            up, down = RSI(self.period).averages(self.warmup)
+            if len(self.warmup) >= self.period + 2:
+                self.up, self.down, self.last_close, self.warmup = float(up[-1]), float(down[-1]), close, []
+            return {"RSI": float(rsi_from_averages(up[-1], down[-1]))}
+
+        delta = close - self.last_close
+        self.up = (self.up * (self.period - 1) + max(delta, 0.0)) / self.period
+        self.down = (self.down * (self.period - 1) + max(-delta, 0.0)) / self.period
+        self.last_close = close
+        return {"RSI": float(rsi_from_averages(self.up, self.down))}
+
+    def state(self) -> Dict[str, Any]:
+        return {"period": self.period, "up": self.up, "down": self.down, "last_close": self.last_close, "warmup": list(self.warmup)}
@@ -1,17 +1,18 @@
-from typing import Dict, List
+from typing import Dict, Iterable, Optional
+from stock_market_agent.models.bar_series import BarSeries
 from stock_market_agent.models.indicators.technical.bollinger_bands import BollingerBands
 from stock_market_agent.models.indicators.technical.macd import MACD
 from stock_market_agent.models.indicators.technical.rsi import RSI
 from stock_market_agent.models.indicators.technical.historical_analysis_indicator import HistoricalAnalysisIndicator
-from datetime import datetime
-from stock_market_agent.models.indicators.base_indicator import IndicatorRegistry
+from stock_market_agent.models.indicators.base_indicator import IndicatorRegistry, IndicatorStream
+from stock_market_agent.models.indicators.intermediates import TECHNICAL_INTERMEDIATES
    
 
 class TechnicalIndicators:
-    def __init__(self, data: str):
-        self._parsed_data = self._parse_data(data)
-        self.prices = self._parsed_data["price"]
-        self.registry = IndicatorRegistry()
+    def __init__(self, series: BarSeries):
+        self.series = series
+        self.prices = series.close
+        self.registry = IndicatorRegistry(TECHNICAL_INTERMEDIATES)
         self._register_indicators()
     
     def _register_indicators(self):
@@ -22,18 +23,13 @@ class TechnicalIndicators:
 
         # Register additional indicators here
 
-    def calculate_indicators(self) -> Dict[str, float]:
-        indicators_data = {}
-        for name, indicator in self.registry.getRegisteredIndicators().items():
-            indicators_data.update(indicator.calculate(self._parsed_data))
-        return indicators_data
+    def calculate_indicators(self, outputs: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """All indicator values, or only `outputs` (e.g. ["RSI"]), sharing intermediates between indicators."""
+        return self.registry.evaluate(self.series, outputs)
 
-    def _parse_data(self, data: str) -> Dict[str, List[float]]:
-        lines = data.strip().split("\n")[1:]  # Skip header
-        parsed = {"date": [], "price": [], "volume": []}
-        for line in lines:
-            date, price, volume = line.split(",")
-            parsed["date"].append(datetime.strptime(date, "%Y-%m-%d"))
-            parsed["price"].append(float(price))
-            parsed["volume"].append(int(volume))
-        return parsed
\ No newline at end of file
+    def stream(self) -> IndicatorStream:
+        """Streaming counterparts of the registered indicators, warmed up on the series."""
+        return IndicatorStream({
+            name: indicator.stream(self.series)
+            for name, indicator in self.registry.getRegisteredIndicators().items()
+        })
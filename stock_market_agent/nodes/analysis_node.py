@@ -2,6 +2,7 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from models.custom_rules_engine import CustomRulesEngine
 from stock_market_agent.tools.historical_analysis_tool import HistoricalAnalysisTool
+from stock_market_agent.models.bar_series import resolve_bar_series
 from models.evaluation_data import EvaluationData
 
 def analysis_node(state):
@@ -27,7 +28,8 @@ def analysis_node(state):
 
     # Perform historical analysis
     analysis = HistoricalAnalysisTool()
-    analysis_data = analysis.run(historical_data)
+    series = resolve_bar_series(state.get("bar_series"), state["ticker"]["tickerId"])
+    analysis_data = analysis.analyse(series) if series is not None else analysis.run(historical_data)
 
     # Add historical analysis results to financial data 
     financial_data.update(analysis_data)
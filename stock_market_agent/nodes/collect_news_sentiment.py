@@ -28,6 +28,15 @@ def collect_news_sentiment(state):
 
     news_sentiment_tool = NewsSentimentTool(api_key=news_api_key)
 
+    tickers = state.get("tickers") or [ticker]
+    if len(tickers) > 1:
+        # Several companies share a few combined NewsAPI queries instead of one each
+        results = news_sentiment_tool.run_batch({company["tickerId"]: company["companyName"] for company in tickers}, state)
+        return {
+            "news_sentiment": results.pop(ticker["tickerId"]),
+            "watchlist_sentiment": results,
+        }
+
     # Parse the JSON response from the sentiment tool
     sentiment_info_json = news_sentiment_tool.run(ticker["companyName"], state)
     sentiment_info = json.loads(sentiment_info_json)
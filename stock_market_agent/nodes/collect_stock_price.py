@@ -31,12 +31,22 @@ def collect_stock_price(state: AgentState2):
     # Use tools to collect data
     stock_price_tool = StockPriceTool(api_key=alphavantage_api_key)
 
-    price_info = stock_price_tool.run(ticker["tickerId"], state)
+    # A query naming several companies gets all quotes in one batched request, which
+    # also leaves the primary ticker's quote in the cache for the lookup below
+    tickers = state.get("tickers") or [ticker]
+    watchlist_quotes = None
+    if len(tickers) > 1:
+        watchlist_quotes = stock_price_tool.run_batch([company["tickerId"] for company in tickers], state)
+
+    price_info, price_age = stock_price_tool.run_with_metadata(ticker["tickerId"], state)
     # Parse the JSON response from the sentiment tool
 
     collected_data = {
         "stock_price": price_info,
+        "data_freshness": {"stock_price": price_age},
     }
+    if watchlist_quotes is not None:
+        collected_data["watchlist_quotes"] = watchlist_quotes
 
     # TODO: Change this to accept {collected_data: {stock_price: price_info}}
     return collected_data 
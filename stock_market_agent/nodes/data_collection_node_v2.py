@@ -5,7 +5,8 @@ def data_collection_node(state):
     indicators_data = state.get("indicators_data", None)
     rule_results = state.get("rule_results", None)
     
-    if stock_price is None or news_sentiment is None or indicators_data is None or rule_results is None:
+    # stock_price is None when no provider had a quote, it is only missing while its branch is running
+    if "stock_price" not in state or news_sentiment is None or indicators_data is None or rule_results is None:
         return {"collected_data": {}}
     else:
         return {
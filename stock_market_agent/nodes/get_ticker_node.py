@@ -4,8 +4,7 @@ import os
 # print(sys.path)
 
 def get_ticker_node(state):
-    from stock_market_agent.tools.extract_stock_name import CompanyTickerTool
-    from stock_market_agent.models.schemas import StockTicker
+    from stock_market_agent.utils.symbol_index import get_symbol_index
     
     print("...................In ticker node..................")
     # user_query = state["query"]
@@ -24,7 +23,16 @@ def get_ticker_node(state):
     if not user_query:
         return {"error": "No user message found in the conversation."}
     
-    response = CompanyTickerTool().run(user_query)
+    # Tickers typed out by the user ("$AAPL", "MSFT", "RELIANCE.BSE") need no LLM, as long as
+    # they are every company the query names; otherwise the list is empty
+    explicit = get_symbol_index(state).explicit_tickers(user_query)
+    if explicit:
+        print("Ticker taken from the query:", explicit[0].symbol)
+        tickers = [{"companyName": match.name, "tickerId": match.symbol} for match in explicit]
+        return {'ticker': tickers[0], 'tickers': tickers}
+
+    from stock_market_agent.tools.extract_stock_name import CompanyTickerTool
+    response = CompanyTickerTool().run(user_query, state)
 
     if "error" in response:
         # Handle the case when the ticker is not found
@@ -32,12 +40,11 @@ def get_ticker_node(state):
 
     # Create a proper StockTicker object
     if hasattr(response, 'stock_names') and len(response.stock_names) > 0:
-        stock = response.stock_names[0]
-        ticker_dict = {
-            "companyName": stock.companyName,
-            "tickerId": stock.tickerId
-        }
-        return {'ticker': ticker_dict}
+        tickers = [
+            {"companyName": stock.companyName, "tickerId": stock.tickerId}
+            for stock in response.stock_names
+        ]
+        return {'ticker': tickers[0], 'tickers': tickers}
     else:
         return {"error": "No stock information found in the response."}
 
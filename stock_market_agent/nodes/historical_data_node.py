@@ -1,5 +1,6 @@
 from stock_market_agent.tools.historical_data_tool import HistoricalDataTool
 from stock_market_agent.tools.news_sentiment_tool import NewsSentimentTool
+from stock_market_agent.models.bar_series import register_bar_series
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.messages import HumanMessage, AIMessage
 import os
@@ -14,9 +15,18 @@ def historical_data_node(state):
 
     # Use tools to collect data
     historical_data_tool = HistoricalDataTool()
-    historical_data = historical_data_tool.run(ticker["tickerId"], state)
-    
+    try:
+        series = historical_data_tool.load_series(ticker["tickerId"], state)
+    except Exception as e:
+        error_message = f"Error fetching data for {ticker['tickerId']}: {str(e)}"
+        print(error_message)
+        # Drop the handle of an earlier ticker in this thread, so no node reads its bars
+        return {"historical_data": error_message, "bar_series": None}
+
+    # The arrays stay in memory, only a small handle goes into the graph state.
+    # The text version is kept for the persona prompts.
     return {
         # "messages": state["messages"] + [AIMessage(content=historical_data)],
-        "historical_data": historical_data
+        "historical_data": series.to_csv(),
+        "bar_series": register_bar_series(series),
     }
\ No newline at end of file
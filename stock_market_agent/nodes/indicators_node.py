@@ -3,6 +3,7 @@ from langchain_core.messages import HumanMessage
 from stock_market_agent.models.custom_rules_engine import CustomRulesEngine
 from stock_market_agent.models.indicators.technical_indicators import TechnicalIndicators
 from stock_market_agent.models.indicators.fundamental_indicators import FundamentalIndicators
+from stock_market_agent.models.bar_series import BarSeries, resolve_bar_series
 
 from stock_market_agent.models.evaluation_data import EvaluationData
 
@@ -10,6 +11,11 @@ def indicators_node(state):
     print("...................In analysis node..................")
     historical_data = state["historical_data"]
 
+    # Reuse the arrays built by the historical data node, only parse the text for older checkpoints
+    series = resolve_bar_series(state.get("bar_series"), state["ticker"]["tickerId"])
+    if series is None:
+        series = BarSeries.from_csv(state["ticker"]["tickerId"], historical_data)
+
     # Extract financial data from collected_data
     financial_indicators_data = state["indicators_data"]
     sentiment_data = state["news_sentiment"]
@@ -28,7 +34,7 @@ def indicators_node(state):
 
     #----------------------Technial analysis---------------
 
-    technical_analysis = TechnicalIndicators(historical_data)
+    technical_analysis = TechnicalIndicators(series)
     technical_analysis_data = technical_analysis.calculate_indicators()
 
     # Add technical analysis results to financial data 
@@ -36,7 +42,7 @@ def indicators_node(state):
     
     #----------------------Fundamental analysis---------------
 
-    fundamental_indicator = FundamentalIndicators(historical_data)
+    fundamental_indicator = FundamentalIndicators(series)
     fundamental_indicator_data = fundamental_indicator.calculate_indicators()
 
     # Add technical analysis results to financial data 
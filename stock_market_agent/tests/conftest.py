@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from stock_market_agent.models.bar_series import BarSeries
+
+
+def series_from_closes(closes, volumes=None, symbol="TEST"):
+    closes = np.asarray(closes, dtype=float)
+    volumes = np.full(len(closes), 1000, dtype=np.int64) if volumes is None else np.asarray(volumes, dtype=np.int64)
+    dates = np.datetime64("2020-01-01") + np.arange(len(closes)).astype("timedelta64[D]")
+    return BarSeries(symbol, dates, closes, closes + 1, closes - 1, closes, closes, volumes)
+
+
+@pytest.fixture
+def make_series():
+    """Random-walk daily bars, or bars with the given closes."""
+    def make(length=250, seed=0, closes=None):
+        rng = np.random.default_rng(seed)
+        if closes is None:
+            # Quoted in cents, like real closes
+            closes = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, length))), 2)
+        return series_from_closes(closes, rng.integers(1_000, 100_000, len(closes)))
+    return make
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from stock_market_agent.models import bar_series
+from stock_market_agent.models.bar_series import BarSeries, register_bar_series, resolve_bar_series
+from stock_market_agent.utils.bar_store import BarStore
+
+
+def make_series(symbol):
+    bars = [
+        (date(2024, 1, 1) + timedelta(days=i), 10.0 + i, 11.0 + i, 9.0 + i, 10.5 + i, 10.5 + i, 100 * (i + 1))
+        for i in range(5)
+    ]
+    return BarSeries.from_bars(symbol, bars)
+
+
+def test_resolve_returns_the_registered_series():
+    series = make_series("AAPL")
+    ref = register_bar_series(series)
+    assert resolve_bar_series(ref) is series
+    assert resolve_bar_series(ref, "aapl") is series
+
+
+def test_resolve_ignores_the_handle_of_another_ticker():
+    ref = register_bar_series(make_series("MSFT"))
+    assert resolve_bar_series(ref, "AAPL") is None
+    assert resolve_bar_series(None, "AAPL") is None
+
+
+def test_series_rebuilt_from_the_store_stay_within_the_bound(monkeypatch, tmp_path):
+    store = BarStore(store_dir=str(tmp_path))
+    monkeypatch.setattr(bar_series, "get_bar_store", lambda: store)
+    monkeypatch.setattr(bar_series, "_registry", OrderedDict())
+    monkeypatch.setattr(bar_series, "_MAX_REGISTERED_SERIES", 2)
+
+    refs = []
+    for symbol in ("AAPL", "MSFT", "TSLA"):
+        series = make_series(symbol)
+        store.update(symbol, date(2024, 1, 1), date(2024, 1, 6), lambda *args: series.to_bars())
+        refs.append(register_bar_series(series))
+    bar_series._registry.clear()
+
+    for ref in refs:
+        assert resolve_bar_series(ref).symbol == ref["symbol"]
+    assert list(bar_series._registry) == [ref["key"] for ref in refs[1:]]
@@ -0,0 +1,149 @@
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from stock_market_agent.utils.bar_store import BarStore
+
+
+def weekday_bars(start, end):
+    bars = []
+    day = start
+    while day < end:
+        if day.weekday() < 5:
+            price = float(day.toordinal() % 97)
+            bars.append((day, price, price + 1, price - 1, price, price, 1000))
+        day += timedelta(days=1)
+    return bars
+
+
+class FakeFetcher:
+    """Weekday bars, or an empty answer for the ranges listed in `empty`."""
+
+    def __init__(self):
+        self.calls = []
+        self.empty = set()
+        self.error = None
+
+    def __call__(self, symbol, start, end):
+        self.calls.append((start, end))
+        if self.error is not None:
+            raise self.error
+        if (start, end) in self.empty:
+            return []
+        return weekday_bars(start, end)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(store_dir=str(tmp_path))
+
+
+def stored_days(store, symbol="AAPL"):
+    return [day.astype(object) for day in store.read(symbol)["date"]]
+
+
+def test_holiday_is_not_fetched_again(store):
+    fetch = FakeFetcher()
+    store.update("AAPL", date(2024, 12, 2), date(2024, 12, 25), fetch)
+
+    # Christmas day only: the provider answers without bars
+    fetch.empty.add((date(2024, 12, 25), date(2024, 12, 26)))
+    assert store.update("AAPL", date(2024, 12, 2), date(2024, 12, 26), fetch) == 0
+    # The day before the end stays open in case its bar is late
+    assert store.load_meta("AAPL")["fetched_until"] == "2024-12-25"
+
+    # Still nothing the next day, the bar of the 26th is not published yet
+    fetch.empty.add((date(2024, 12, 25), date(2024, 12, 27)))
+    store.update("AAPL", date(2024, 12, 2), date(2024, 12, 27), fetch)
+    assert fetch.calls[-1] == (date(2024, 12, 25), date(2024, 12, 27))
+    assert store.load_meta("AAPL")["fetched_until"] == "2024-12-26"
+
+    calls = len(fetch.calls)
+    store.update("AAPL", date(2024, 12, 2), date(2024, 12, 31), fetch)
+    assert fetch.calls[-1] == (date(2024, 12, 26), date(2024, 12, 31))
+    assert len(fetch.calls) == calls + 1
+    assert stored_days(store)[-4:] == [date(2024, 12, 24), date(2024, 12, 26), date(2024, 12, 27), date(2024, 12, 30)]
+
+
+def test_empty_first_fetch_saves_nothing(store):
+    fetch = FakeFetcher()
+    fetch.empty.add((date(2024, 1, 2), date(2024, 1, 31)))
+    assert store.update("TYPO", date(2024, 1, 2), date(2024, 1, 31), fetch) == 0
+    assert store.load_meta("TYPO")["fetched_until"] is None
+    assert len(store.read("TYPO")["date"]) == 0
+
+    fetch.empty.clear()
+    assert store.update("TYPO", date(2024, 1, 2), date(2024, 1, 31), fetch) > 0
+    assert len(fetch.calls) == 2
+
+
+def test_tail_only_counts_as_fetched_up_to_the_last_bar(store):
+    fetch = lambda symbol, start, end: weekday_bars(start, min(end, date(2024, 1, 25)))
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    # The last bar returned is Wednesday the 24th
+    assert store.load_meta("AAPL")["fetched_until"] == "2024-01-25"
+
+
+def test_weekend_ranges_are_not_fetched(store):
+    fetch = FakeFetcher()
+    # Friday the 26th is the last day before the weekend
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 27), fetch)
+    calls = len(fetch.calls)
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 29), fetch)
+    assert len(fetch.calls) == calls
+    assert store.load_meta("AAPL")["fetched_until"] == "2024-01-29"
+
+
+def test_failed_tail_fetch_keeps_serving_stored_bars(store):
+    fetch = FakeFetcher()
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    rows = len(store.read("AAPL")["date"])
+
+    fetch.error = ConnectionError("provider down")
+    assert store.update("AAPL", date(2024, 1, 2), date(2024, 2, 15), fetch) == 0
+    assert len(store.read("AAPL")["date"]) == rows
+    assert store.load_meta("AAPL")["fetched_until"] == "2024-01-31"
+
+
+def test_failed_head_fetch_is_fetched_again(store):
+    fetch = FakeFetcher()
+    store.update("AAPL", date(2024, 1, 15), date(2024, 1, 31), fetch)
+
+    fetch.error = ConnectionError("provider down")
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    assert store.load_meta("AAPL")["first_date"] == "2024-01-15"
+
+    fetch.error = None
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    assert store.load_meta("AAPL")["first_date"] == "2024-01-02"
+    assert np.all(np.diff(store.read("AAPL")["date"]).astype(int) > 0)
+    assert stored_days(store)[0] == date(2024, 1, 2)
+
+
+def test_empty_head_is_not_fetched_again(store):
+    fetch = FakeFetcher()
+    store.update("NEW", date(2024, 1, 15), date(2024, 1, 31), fetch)
+
+    # Nothing before the listing date
+    fetch.empty.add((date(2024, 1, 2), date(2024, 1, 15)))
+    store.update("NEW", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    assert store.load_meta("NEW")["first_date"] == "2024-01-02"
+
+    calls = len(fetch.calls)
+    store.update("NEW", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    assert len(fetch.calls) == calls
+
+
+def test_stores_written_with_raw_closes_are_fetched_again(store):
+    fetch = FakeFetcher()
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    meta = store.load_meta("AAPL")
+    del meta["layout"]
+    store._atomic_write(store._meta_path("AAPL"), json.dumps(meta).encode("utf-8"))
+
+    assert store.load_meta("AAPL")["fetched_until"] is None
+    store.update("AAPL", date(2024, 1, 2), date(2024, 1, 31), fetch)
+    assert fetch.calls == [(date(2024, 1, 2), date(2024, 1, 31))] * 2
+    assert store.load_meta("AAPL")["fetched_until"] == "2024-01-31"
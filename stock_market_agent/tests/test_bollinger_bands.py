@@ -0,0 +1,52 @@
+import numpy as np
+
+from stock_market_agent.models.indicators.technical.bollinger_bands import BollingerBands
+
+
+def loop_bands(prices, period=20, num_std_dev=2.0):
+    """The bands as they were computed before the prefix-sum version, one window at a time."""
+    rolling_mean = np.convolve(prices, np.ones(period) / period, mode="valid")
+    rolling_std = np.array([np.std(prices[i:i + period]) for i in range(len(prices) - period + 1)])
+    return rolling_mean, rolling_mean + rolling_std * num_std_dev, rolling_mean - rolling_std * num_std_dev
+
+
+def test_bands_match_the_window_loop(make_series):
+    series = make_series(500)
+    bands = BollingerBands().bands(series.close)
+    assert np.isnan(bands.mean[:19]).all()
+    for expected, actual in zip(loop_bands(series.close), bands):
+        np.testing.assert_allclose(actual[19:], expected, rtol=1e-9)
+
+    values = BollingerBands().calculate(series)
+    mean, upper, lower = loop_bands(series.close)
+    np.testing.assert_allclose(
+        [values["Bollinger Mean"], values["Bollinger Upper"], values["Bollinger Lower"]],
+        [mean[-1], upper[-1], lower[-1]],
+        rtol=1e-9,
+    )
+
+
+def test_long_histories_at_high_prices_keep_their_precision(make_series):
+    closes = 50_000 + make_series(5_000).close
+    mean, upper, _ = loop_bands(closes)
+    bands = BollingerBands().bands(closes)
+    np.testing.assert_allclose(bands.mean[19:], mean, rtol=1e-12)
+    np.testing.assert_allclose(bands.upper[19:] - bands.mean[19:], upper - mean, rtol=1e-6)
+
+
+def test_periods_and_symbols_share_one_pass(make_series):
+    matrix = np.vstack([make_series(300, seed=seed).close for seed in range(3)])
+    multi = BollingerBands().multi_bands(matrix, [10, 20, 50])
+    for period, bands in multi.items():
+        for row, prices in enumerate(matrix):
+            mean, upper, lower = loop_bands(prices, period)
+            np.testing.assert_allclose(bands.mean[row, period - 1:], mean, rtol=1e-9)
+            np.testing.assert_allclose(bands.upper[row, period - 1:], upper, rtol=1e-9)
+            np.testing.assert_allclose(bands.lower[row, period - 1:], lower, rtol=1e-9)
+
+
+def test_short_and_flat_histories():
+    assert np.isnan(BollingerBands().bands(np.arange(10.0)).mean).all()
+    flat = BollingerBands().bands(np.full(30, 42.0))
+    np.testing.assert_allclose(flat.upper[19:], 42.0)
+    np.testing.assert_allclose(flat.lower[19:], 42.0)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils import failover
+from stock_market_agent.utils.failover import (
+    AllProvidersFailedError,
+    CircuitBreaker,
+    ProviderThrottledError,
+    call_with_failover,
+    get_provider_health,
+)
+from stock_market_agent.utils.rate_limiter import TokenBucketRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_providers(monkeypatch):
+    monkeypatch.setattr(failover, "_health", {})
+    monkeypatch.setattr(failover, "_executors", {})
+
+
+def fail(error):
+    def call():
+        raise error
+    return call
+
+
+def test_unusable_answers_leave_the_circuit_closed():
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD + 2):
+        # An unknown symbol: an empty answer, or an error the provider reports for it
+        assert call_with_failover([("primary", lambda: {}), ("secondary", lambda: {"price": 1})], is_valid=bool) == {"price": 1}
+        assert call_with_failover([("primary", fail(ValueError("Invalid API call"))), ("secondary", lambda: 2)]) == 2
+    stats = get_provider_health("primary").stats()
+    assert stats["state"] == CircuitBreaker.CLOSED
+    assert stats["unusable"] == 2 * (settings.CIRCUIT_FAILURE_THRESHOLD + 2)
+    assert stats["failures"] == 0
+
+
+@pytest.mark.parametrize("error", [ConnectionError("reset"), TimeoutError("slow"), ProviderThrottledError("quota")])
+def test_transport_errors_timeouts_and_throttling_open_the_circuit(error):
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD):
+        assert call_with_failover([("primary", fail(error)), ("secondary", lambda: 1)]) == 1
+    assert get_provider_health("primary").breaker.state == CircuitBreaker.OPEN
+
+    calls = []
+    assert call_with_failover([("primary", lambda: calls.append(1)), ("secondary", lambda: 2)]) == 2
+    assert calls == []
+    assert get_provider_health("primary").stats()["rejected"] == 1
+
+
+def test_all_failing_providers_raise():
+    with pytest.raises(AllProvidersFailedError):
+        call_with_failover([("primary", lambda: {}), ("secondary", fail(ConnectionError("down")))], is_valid=bool)
+
+
+def test_hedge_is_not_held_up_by_a_saturated_primary(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_MAX_WORKERS", 2)
+    monkeypatch.setattr(settings, "HEDGE_DEFAULT_DELAY", 0.05)
+    release = threading.Event()
+    running = threading.Semaphore(0)
+
+    def blocked():
+        running.release()
+        return release.wait(5)
+
+    # Every worker of the primary is busy, e.g. waiting for rate-limit tokens
+    busy = [threading.Thread(target=call_with_failover, args=([("primary", blocked)],), kwargs={"hedge": False}) for _ in range(2)]
+    for thread in busy:
+        thread.start()
+    for _ in busy:
+        assert running.acquire(timeout=5)
+    try:
+        started = time.monotonic()
+        assert call_with_failover([("primary", blocked), ("secondary", lambda: "hedged")]) == "hedged"
+        assert time.monotonic() - started < 1.0
+    finally:
+        release.set()
+        for thread in busy:
+            thread.join()
+    # The primary call that never got a worker was cancelled
+    assert get_provider_health("primary").stats()["calls"] == 2
+
+
+def test_latency_leaves_out_rate_limit_queueing():
+    limiter = TokenBucketRateLimiter(rate_per_minute=300, burst=1, name="test")
+    limiter.drain()
+
+    def queued_call():
+        limiter.acquire()
+        return "quote"
+
+    assert call_with_failover([("primary", queued_call)]) == "quote"
+    assert get_provider_health("primary").latency.percentile(95) < 0.1
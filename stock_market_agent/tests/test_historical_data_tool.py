@@ -0,0 +1,61 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from yfinance.exceptions import YFPricesMissingError
+
+from stock_market_agent.tools import historical_data_tool
+from stock_market_agent.tools.historical_data_tool import HistoricalDataTool
+from stock_market_agent.utils import failover
+
+
+class FakeTicker:
+    """yfinance Ticker whose history is the adjusted frame `auto_adjust=True` gives."""
+
+    requests = []
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, **kwargs):
+        FakeTicker.requests.append(kwargs)
+        # Adjusted for a 2:1 split on the 3rd, so the closes do not halve
+        return pd.DataFrame(
+            {"Open": [50.0, 50.5], "High": [51.0, 51.5], "Low": [49.0, 49.5], "Close": [50.5, 51.0], "Volume": [200, 210]},
+            index=pd.DatetimeIndex(["2024-01-02", "2024-01-03"]),
+        )
+
+
+def test_yfinance_bars_hold_the_adjusted_close(monkeypatch):
+    monkeypatch.setattr(historical_data_tool, "Ticker", FakeTicker)
+    bars = HistoricalDataTool()._fetch_yfinance_bars("AAPL", date(2024, 1, 2), date(2024, 1, 4))
+
+    assert FakeTicker.requests[-1]["auto_adjust"] is True
+    assert [bar[0] for bar in bars] == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert [(bar[4], bar[5]) for bar in bars] == [(50.5, 50.5), (51.0, 51.0)]
+
+
+def test_holiday_is_an_empty_answer_not_a_failover(monkeypatch):
+    class HolidayTicker(FakeTicker):
+        def history(self, **kwargs):
+            raise YFPricesMissingError(self.symbol, "(1d 2024-12-25 -> 2024-12-26)")
+
+    monkeypatch.setattr(failover, "_health", {})
+    monkeypatch.setattr(failover, "_executors", {})
+    monkeypatch.setattr(historical_data_tool, "Ticker", HolidayTicker)
+    monkeypatch.setattr(historical_data_tool, "get_api_key", lambda name: "test")
+    alpha_vantage_calls = []
+    monkeypatch.setattr(historical_data_tool, "alpha_vantage_get", lambda *args, **kwargs: alpha_vantage_calls.append(args))
+
+    assert HistoricalDataTool()._fetch_bars("AAPL", date(2024, 12, 25), date(2024, 12, 26)) == []
+    assert alpha_vantage_calls == []
+
+
+def test_unknown_symbol_is_still_an_error(monkeypatch):
+    class UnknownTicker(FakeTicker):
+        def history(self, **kwargs):
+            raise YFPricesMissingError(self.symbol, "", yahoo_reason="No data found, symbol may be delisted")
+
+    monkeypatch.setattr(historical_data_tool, "Ticker", UnknownTicker)
+    with pytest.raises(YFPricesMissingError):
+        HistoricalDataTool()._fetch_yfinance_bars("TYPO", date(2024, 12, 2), date(2024, 12, 26))
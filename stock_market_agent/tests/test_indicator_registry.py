@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from stock_market_agent.models.indicators.base_indicator import IndicatorRegistry
+from stock_market_agent.models.indicators.intermediates import TECHNICAL_INTERMEDIATES
+from stock_market_agent.models.indicators.technical.bollinger_bands import BollingerBands
+from stock_market_agent.models.indicators.technical.macd import MACD
+from stock_market_agent.models.indicators.technical.rsi import RSI
+from stock_market_agent.models.indicators.technical_indicators import TechnicalIndicators
+
+
+def test_evaluate_matches_each_indicator_on_its_own(make_series):
+    series = make_series(300)
+    indicators = TechnicalIndicators(series)
+    expected = {}
+    for indicator in indicators.registry.getRegisteredIndicators().values():
+        expected.update(indicator.calculate(series))
+
+    values = indicators.calculate_indicators()
+    assert values.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, str):
+            assert values[key] == value
+        else:
+            np.testing.assert_allclose(values[key], value, rtol=1e-9, err_msg=key)
+
+
+def test_only_the_requested_outputs_are_computed(make_series):
+    registry = TechnicalIndicators(make_series(100)).registry
+    intermediates, names = registry.plan(["RSI"])
+    assert names == ["RSI"]
+    assert intermediates == [("close",), ("deltas",), ("gains",), ("losses",)]
+    assert TechnicalIndicators(make_series(100)).calculate_indicators(["RSI"]).keys() == {"RSI"}
+
+
+def test_indicators_share_intermediates(make_series):
+    calls = []
+    intermediates = dict(TECHNICAL_INTERMEDIATES)
+    ema = intermediates["ema"]
+    intermediates["ema"] = ema._replace(compute=lambda context, period: calls.append(period) or ema.compute(context, period))
+
+    registry = IndicatorRegistry(intermediates)
+    registry.register("MACD", MACD())
+    registry.register("SlowMACD", MACD(12, 30, 9))
+    registry.register("BollingerBands", BollingerBands())
+    registry.register("RSI", RSI())
+    registry.evaluate(make_series(100))
+    assert sorted(calls) == [12, 26, 30]
+
+
+def test_unknown_outputs_and_cycles_are_reported(make_series):
+    registry = TechnicalIndicators(make_series(50)).registry
+    with pytest.raises(KeyError):
+        registry.plan(["Stochastic"])
+
+    registry.register_intermediate("a", lambda: [("b",)], lambda context: None)
+    registry.register_intermediate("b", lambda: [("a",)], lambda context: None)
+    registry.register("Loop", type("Loop", (RSI,), {"inputs": lambda self: [("a",)], "outputs": ("Loop",)})())
+    with pytest.raises(ValueError):
+        registry.plan(["Loop"])
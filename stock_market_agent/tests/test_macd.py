@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from stock_market_agent.models.indicators.technical.ema import ema
+from stock_market_agent.models.indicators.technical.macd import MACD
+
+
+def pandas_macd(prices, short=12, long=26, signal=9):
+    close = pd.Series(prices)
+    macd = close.ewm(span=short, adjust=False).mean() - close.ewm(span=long, adjust=False).mean()
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return macd.to_numpy(), signal_line.to_numpy(), (macd - signal_line).to_numpy()
+
+
+def test_macd_matches_pandas_ewm(make_series):
+    series = make_series(500)
+    result = MACD().series(series.close)
+    for actual, expected in zip(result[:3], pandas_macd(series.close)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+    values = MACD().calculate(series)
+    expected = [column[-1] for column in pandas_macd(series.close)]
+    np.testing.assert_allclose([values["MACD Line"], values["Signal Line"], values["MACD Histogram"]], expected, rtol=1e-9)
+
+
+def test_symbols_are_computed_together(make_series):
+    matrix = np.vstack([make_series(200, seed=seed).close for seed in range(3)])
+    result = MACD(5, 10, 4).series(matrix)
+    for row, prices in enumerate(matrix):
+        np.testing.assert_allclose(result.macd[row], pandas_macd(prices, 5, 10, 4)[0], rtol=1e-9, atol=1e-12)
+
+
+def test_new_bars_continue_from_the_stored_state(make_series):
+    prices = make_series(300).close
+    whole = MACD().series(prices)
+    head = MACD().series(prices[:200])
+    tail = MACD().series(prices[200:], state=head.state)
+    np.testing.assert_allclose(tail.macd, whole.macd[200:], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(tail.signal, whole.signal[200:], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(ema(prices[200:], 12, initial=ema(prices[:200], 12)[-1]), ema(prices, 12)[200:], rtol=1e-12)
@@ -0,0 +1,60 @@
+import pytest
+
+from stock_market_agent.utils.news_dedup import NewsDedupIndex
+from stock_market_agent.utils.sentiment_cache import article_text
+
+STORY = (
+    "Apple reported record quarterly revenue on Thursday as iPhone sales in China recovered "
+    "and its services business grew faster than analysts had expected, sending the shares "
+    "higher in after hours trading while the company announced a larger buyback"
+)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return NewsDedupIndex(path=str(tmp_path / "dedup.jsonl"))
+
+
+def syndicated_pair():
+    return [
+        {"title": "Apple posts record revenue", "description": STORY, "url": "https://wire.example/apple"},
+        {"title": "Apple posts record revenue", "description": STORY + " (Reuters)", "url": "https://paper.example/apple"},
+    ]
+
+
+def test_syndicated_copies_collapse_into_one_story(index):
+    result = index.collapse(syndicated_pair())
+    assert result["articles"] == syndicated_pair()[:1]
+    assert result["sizes"] == [2]
+    assert result["duplicates"] == 1
+
+
+def test_distinct_stories_stay_apart(index):
+    articles = syndicated_pair()[:1] + [
+        {
+            "title": "Tesla recalls vehicles",
+            "description": "Tesla is recalling thousands of vehicles over a faulty seat belt warning, regulators said",
+            "url": "https://wire.example/tesla",
+        },
+        {"title": None, "description": None, "content": None, "url": "https://wire.example/removed-1"},
+        {"title": None, "description": None, "content": None, "url": "https://wire.example/removed-2"},
+    ]
+    result = index.collapse(articles)
+    assert result["articles"] == articles
+    assert result["duplicates"] == 0
+
+
+def test_missing_fields_are_left_out_of_the_text():
+    assert article_text({"title": "Apple posts record revenue", "description": None}) == "Apple posts record revenue"
+    assert article_text({"title": None, "description": "", "content": None}) == ""
+
+
+def test_known_articles_are_resolved_without_rehashing_after_a_reload(index, monkeypatch):
+    index.collapse(syndicated_pair())
+
+    reloaded = NewsDedupIndex(path=index.path)
+    monkeypatch.setattr(reloaded, "signature", lambda text: pytest.fail("known article hashed again"))
+    result = reloaded.collapse(syndicated_pair())
+    assert result["sizes"] == [2]
+    assert reloaded.stats()["known"] == 2
+    assert reloaded.stats()["hashed"] == 0
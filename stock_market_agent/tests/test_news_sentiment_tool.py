@@ -0,0 +1,49 @@
+import pytest
+
+from stock_market_agent.nodes import collect_news_sentiment as node
+from stock_market_agent.tools.news_sentiment_tool import NewsSentimentTool
+from stock_market_agent.utils import news_dedup, sentiment_cache, sentiment_pool
+from stock_market_agent.utils.news_dedup import NewsDedupIndex
+from stock_market_agent.utils.response_cache import freshness
+from stock_market_agent.utils.sentiment_cache import ArticleSentimentCache
+from stock_market_agent.utils.sentiment_pool import SentimentScoringPool
+
+ARTICLES = [
+    {"title": "Apple shares soar on record iPhone sales", "description": "A great quarter", "url": "https://news.example/1"},
+    {"title": "Microsoft hit by a costly outage", "description": "Customers angry after the failure", "url": "https://news.example/2"},
+]
+
+
+@pytest.fixture
+def queries(monkeypatch, tmp_path):
+    monkeypatch.setenv("YOUR_NEWS_API_KEY", "test")
+    monkeypatch.setattr(sentiment_cache, "_cache", ArticleSentimentCache(path=str(tmp_path / "scores.jsonl")))
+    monkeypatch.setattr(news_dedup, "_index", NewsDedupIndex(path=str(tmp_path / "dedup.jsonl")))
+    monkeypatch.setattr(sentiment_pool, "_pool", SentimentScoringPool(max_workers=1))
+
+    queries = []
+
+    def fetch_articles(self, query, backend, page_size=None):
+        queries.append(query)
+        return {"status": "ok", "articles": ARTICLES}, freshness()
+
+    monkeypatch.setattr(NewsSentimentTool, "_fetch_articles", fetch_articles)
+    return queries
+
+
+def test_query_naming_several_companies_shares_one_news_request(queries):
+    tickers = [{"companyName": "Apple Inc.", "tickerId": "AAPL"}, {"companyName": "Microsoft Corporation", "tickerId": "MSFT"}]
+    result = node.collect_news_sentiment({"ticker": tickers[0], "tickers": tickers})
+
+    assert len(queries) == 1
+    assert result["news_sentiment"]["company"] == "Apple Inc."
+    assert result["news_sentiment"]["sentiment"] == "Positive"
+    assert list(result["watchlist_sentiment"]) == ["MSFT"]
+    assert result["watchlist_sentiment"]["MSFT"]["sentiment"] == "Negative"
+
+
+def test_single_company_query_keeps_its_own_request(queries):
+    ticker = {"companyName": "Apple Inc.", "tickerId": "AAPL"}
+    result = node.collect_news_sentiment({"ticker": ticker})
+    assert queries == ["Apple Inc."]
+    assert "watchlist_sentiment" not in result
@@ -0,0 +1,42 @@
+import numpy as np
+
+from stock_market_agent.models.indicators.technical.rsi import RSI
+
+
+def loop_rsi(prices, period=14):
+    """RSI as it was computed before the filter version, one bar at a time."""
+    deltas = np.diff(prices)
+    seed = deltas[:period + 1]
+    up = seed[seed >= 0].sum() / period
+    down = -seed[seed < 0].sum() / period
+    rsi = np.zeros_like(prices)
+    rsi[:period] = 100. - 100. / (1. + up / down)
+    for i in range(period, len(prices)):
+        delta = deltas[i - 1]
+        upval, downval = (delta, 0.) if delta > 0 else (0., -delta)
+        up = (up * (period - 1) + upval) / period
+        down = (down * (period - 1) + downval) / period
+        rsi[i] = 100. - 100. / (1. + up / down)
+    return rsi
+
+
+def test_series_matches_the_loop(make_series):
+    series = make_series(500)
+    np.testing.assert_allclose(RSI().series(series.close), loop_rsi(series.close), rtol=1e-9)
+    np.testing.assert_allclose(RSI().calculate(series)["RSI"], loop_rsi(series.close)[-1], rtol=1e-9)
+    np.testing.assert_allclose(RSI(5).series(series.close), loop_rsi(series.close, 5), rtol=1e-9)
+
+
+def test_symbols_are_computed_together(make_series):
+    matrix = np.vstack([make_series(300, seed=seed).close for seed in range(4)])
+    rsi = RSI().series(matrix)
+    for row, prices in enumerate(matrix):
+        np.testing.assert_allclose(rsi[row], loop_rsi(prices), rtol=1e-9)
+
+
+def test_one_sided_and_flat_histories():
+    # The loop divided by zero here; only gains is 100 and no change at all is 50
+    np.testing.assert_allclose(RSI().series(np.arange(1.0, 31.0)), 100.0)
+    np.testing.assert_allclose(RSI().series(np.full(30, 10.0)), 50.0)
+    np.testing.assert_allclose(RSI().series(np.arange(30.0, 0.0, -1.0)), 0.0)
+    assert np.isnan(RSI().series(np.array([10.0]))).all()
@@ -0,0 +1,38 @@
+import pytest
+
+from stock_market_agent.utils.sentiment_cache import ArticleSentimentCache
+
+
+def article(n):
+    return {"title": f"Story {n}", "url": f"https://news.example/{n}"}
+
+
+def constant_scorer(score):
+    return lambda texts: [score] * len(texts)
+
+
+def test_known_scores_evicted_while_scoring_are_still_used(tmp_path):
+    cache = ArticleSentimentCache(path=str(tmp_path / "scores.jsonl"), max_entries=1)
+    cache.prime([article(1)], constant_scorer(0.5))
+
+    def scorer(texts):
+        # Another query fills the cache while this one is scoring
+        cache.prime([article(3)], constant_scorer(0.0))
+        return [-0.1] * len(texts)
+
+    result = cache.score_articles("apple", [article(1), article(2)], scorer)
+    assert result["average"] == pytest.approx(0.2)
+    assert (result["scored"], result["reused"]) == (1, 1)
+
+
+def test_query_windows_are_bounded(tmp_path):
+    cache = ArticleSentimentCache(path=str(tmp_path / "scores.jsonl"), max_queries=2)
+    cache.score_articles("apple", [article(1)], constant_scorer(0.5))
+    cache.score_articles("tesla", [article(2)], constant_scorer(-0.5))
+    cache.score_articles("apple", [article(1), article(3)], constant_scorer(0.1))
+    cache.score_articles("nvidia", [article(4)], constant_scorer(0.2))
+
+    # tesla was the least recently used
+    assert list(cache._aggregates) == ["apple", "nvidia"]
+    assert cache.score_articles("apple", [article(3)], constant_scorer(0.9))["average"] == pytest.approx(0.1)
+    assert cache.score_articles("tesla", [article(2)], constant_scorer(0.9))["average"] == -0.5
@@ -0,0 +1,15 @@
+from stock_market_agent.utils.sentiment_pool import SentimentScoringPool
+
+
+def test_single_worker_pool_never_starts_processes():
+    pool = SentimentScoringPool(max_workers=1)
+    pool.warm()
+    assert pool._executor is None
+    assert pool.score_compound(["Great earnings beat", "Terrible lawsuit"])[0] > 0
+
+
+def test_compound_scoring_logs_its_throughput(capsys):
+    pool = SentimentScoringPool(max_workers=1)
+    pool.score_compound(["Shares rally after strong guidance"] * 3)
+    assert "Scored 3 texts in 1 chunks on 1 workers" in capsys.readouterr().out
+    assert pool.stats()["texts"] == 3
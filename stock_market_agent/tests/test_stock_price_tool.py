@@ -0,0 +1,81 @@
+import pytest
+
+from stock_market_agent.models.custom_rules_engine import CustomRulesEngine
+from stock_market_agent.models.evaluation_data import EvaluationData
+from stock_market_agent.tools import stock_price_tool
+from stock_market_agent.tools.stock_price_tool import StockPriceTool, _global_quote, _is_valid_quote
+from stock_market_agent.utils import failover
+from stock_market_agent.utils.failover import ProviderThrottledError
+from stock_market_agent.utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def tool(monkeypatch, tmp_path):
+    monkeypatch.setattr(failover, "_health", {})
+    monkeypatch.setattr(failover, "_executors", {})
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    monkeypatch.setattr(stock_price_tool, "get_response_cache", lambda: cache)
+    return StockPriceTool(api_key="test")
+
+
+def yfinance_quote(ticker):
+    return _global_quote(ticker, 10.0, 11.0, 9.0, 10.5, 1000, 10.0)
+
+
+def test_quote_needs_a_price():
+    assert _is_valid_quote(yfinance_quote("AAPL"))
+    assert not _is_valid_quote({"Global Quote": {}})
+    assert not _is_valid_quote({"Note": "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day."})
+
+
+def test_unknown_symbol_at_alpha_vantage_falls_over_to_yfinance(tool, monkeypatch):
+    monkeypatch.setattr(stock_price_tool, "alpha_vantage_get", lambda *args, **kwargs: {"Global Quote": {}})
+    monkeypatch.setattr(StockPriceTool, "_fetch_yfinance_quote", staticmethod(yfinance_quote))
+
+    price, metadata = tool.run_with_metadata("AAPL")
+    assert price == "10.5000"
+    assert "error" not in metadata
+
+
+def test_no_quote_from_any_provider_is_a_structured_failure(tool, monkeypatch):
+    def throttled(*args, **kwargs):
+        raise ProviderThrottledError("Our standard API rate limit is 25 requests per day.")
+
+    monkeypatch.setattr(stock_price_tool, "alpha_vantage_get", throttled)
+    monkeypatch.setattr(StockPriceTool, "_fetch_yfinance_quote", staticmethod(lambda ticker: {}))
+
+    price, metadata = tool.run_with_metadata("NOPE")
+    assert price is None
+    assert "All providers failed" in metadata["error"]
+    assert tool.run("NOPE").startswith("Failed to fetch data for NOPE")
+
+
+def test_rules_without_a_price_are_skipped():
+    data = EvaluationData({"stock_price": None, "P/E Ratio": "12", "Average Price": "10"}, {"sentiment": "Positive"})
+    results = CustomRulesEngine().evaluate(data)
+    assert "current_price_rule" not in results["Buy"]["reasoning"] + results["Sell"]["reasoning"] + results["Hold"]["reasoning"]
+    assert "pe_ratio_rule" in results["Buy"]["reasoning"]
+
+
+def test_query_naming_several_companies_fetches_quotes_in_one_batch(tool, monkeypatch):
+    from stock_market_agent.nodes import collect_stock_price as node
+
+    batches = []
+
+    def download(tickers):
+        batches.append(list(tickers))
+        return {ticker.upper(): yfinance_quote(ticker) for ticker in tickers}
+
+    def no_single_quotes(*args, **kwargs):
+        raise AssertionError("the batch should have cached every quote")
+
+    monkeypatch.setenv("ALPHA_VANTAGE_API_KEY", "test")
+    monkeypatch.setattr(StockPriceTool, "_fetch_yfinance_quotes", staticmethod(download))
+    monkeypatch.setattr(stock_price_tool, "alpha_vantage_get", no_single_quotes)
+
+    tickers = [{"companyName": "Apple Inc.", "tickerId": "AAPL"}, {"companyName": "Microsoft Corporation", "tickerId": "MSFT"}]
+    result = node.collect_stock_price({"ticker": tickers[0], "tickers": tickers})
+    assert batches == [["AAPL", "MSFT"]]
+    assert result["stock_price"] == "10.5000"
+    assert result["watchlist_quotes"]["symbol"] == ["AAPL", "MSFT"]
+    assert result["watchlist_quotes"]["price"] == [10.5, 10.5]
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pytest
+
+from stock_market_agent.models.indicators.base_indicator import IndicatorStream
+from stock_market_agent.models.indicators.technical.bollinger_bands import BollingerBands
+from stock_market_agent.models.indicators.technical.historical_analysis_indicator import HistoricalAnalysisIndicator
+from stock_market_agent.models.indicators.technical.macd import MACD
+from stock_market_agent.models.indicators.technical.rsi import RSI
+from stock_market_agent.models.indicators.technical_indicators import TechnicalIndicators
+from stock_market_agent.tests.conftest import series_from_closes
+
+INDICATORS = [BollingerBands(), RSI(), MACD(), HistoricalAnalysisIndicator()]
+
+
+def head(series, length):
+    return series_from_closes(series.close[:length], series.volume[:length])
+
+
+def assert_same(streamed, batch):
+    assert streamed.keys() == batch.keys()
+    for key, value in batch.items():
+        if isinstance(value, str):
+            assert streamed[key] == value, key
+        else:
+            np.testing.assert_allclose(streamed[key], value, rtol=1e-7, atol=1e-9, err_msg=key)
+
+
+@pytest.mark.parametrize("indicator", INDICATORS, ids=lambda indicator: type(indicator).__name__)
+def test_every_update_matches_a_full_recalculation(indicator, make_series):
+    series = make_series(120)
+    stream = indicator.stream()
+    # Linear regression needs two bars
+    first = 2 if isinstance(indicator, HistoricalAnalysisIndicator) else 1
+    for length in range(1, len(series) + 1):
+        streamed = stream.update(series.close[length - 1], series.volume[length - 1])
+        if length >= first:
+            assert_same(streamed, indicator.calculate(head(series, length)))
+
+
+@pytest.mark.parametrize("indicator", INDICATORS, ids=lambda indicator: type(indicator).__name__)
+def test_warmed_up_stream_continues_the_series(indicator, make_series):
+    series = make_series(120)
+    stream = indicator.stream(head(series, 60))
+    for length in range(61, len(series) + 1):
+        streamed = stream.update(series.close[length - 1], series.volume[length - 1])
+    assert_same(streamed, indicator.calculate(series))
+
+
+def test_momentum_of_equal_averages_is_neutral():
+    # With five bars or fewer both averages cover every close, which is a tie however they round
+    closes = [100.69, 102.36, 103.04, 100.39, 102.22]
+    stream = HistoricalAnalysisIndicator().stream()
+    for length, close in enumerate(closes, start=1):
+        assert stream.update(close, 1000)["Price Momentum"] == "neutral"
+        if length >= 2:
+            assert HistoricalAnalysisIndicator().calculate(series_from_closes(closes[:length]))["Price Momentum"] == "neutral"
+
+
+def test_stream_state_survives_json(make_series):
+    series = make_series(120)
+    stream = TechnicalIndicators(head(series, 100)).stream()
+    restored = IndicatorStream.from_state(json.loads(json.dumps(stream.state())))
+    for close, volume in zip(series.close[100:], series.volume[100:]):
+        expected = stream.update(close, volume)
+        assert restored.update(close, volume) == expected
+    assert_same(expected, TechnicalIndicators(series).calculate_indicators())
@@ -0,0 +1,68 @@
+import pytest
+
+from stock_market_agent.utils.symbol_index import SymbolIndex
+
+
+@pytest.fixture
+def index():
+    return SymbolIndex([
+        ("AAPL", "Apple Inc", "NASDAQ", []),
+        ("MSFT", "Microsoft Corporation", "NASDAQ", []),
+        ("TSLA", "Tesla Inc", "NASDAQ", []),
+        ("FOR", "Forestar Group Inc", "NYSE", []),
+        ("ALL", "Allstate Corp", "NYSE", []),
+        ("NOW", "ServiceNow Inc", "NYSE", []),
+        ("DNOW", "NOW Inc.", "NYSE", []),
+        ("IBM", "International Business Machines", "NYSE", ["IBM"]),
+        ("TONX", "Tonix Pharmaceuticals", "NASDAQ", []),
+        ("AMD", "Advanced Micro Devices", "NASDAQ", []),
+        ("NVDA", "Nvidia Corp", "NASDAQ", []),
+        ("THRY", "Thryv Holdings", "NASDAQ", []),
+    ])
+
+
+def symbols(matches):
+    return matches and [match.symbol for match in matches]
+
+
+def test_short_upper_case_words_are_not_tickers(index):
+    assert symbols(index.explicit_tickers("Is TSLA a buy for me, ALL in NOW?")) == ["TSLA"]
+    # FOR may still be meant as Forestar, so the query goes to the LLM instead
+    assert index.explicit_tickers("Is TSLA a buy FOR me?") == []
+    # A cashtag, or a symbol that is also the company's name, is still taken
+    assert symbols(index.explicit_tickers("Compare $NOW with IBM")) == ["NOW", "IBM"]
+
+
+def test_typed_tickers_must_cover_every_company_in_the_query(index):
+    # AMD is too short to be taken bare, and Microsoft is named rather than typed
+    assert index.explicit_tickers("Should I buy AMD or NVDA?") == []
+    assert index.explicit_tickers("Compare AAPL with Microsoft") == []
+    assert index.explicit_tickers("Is NVDA better than apple?") == []
+    assert index.explicit_tickers("Compare $XYZ with NVDA") == []
+    assert symbols(index.explicit_tickers("Should I buy $AMD or NVDA?")) == ["AMD", "NVDA"]
+    assert symbols(index.explicit_tickers("What is the RSI of NVDA on NASDAQ in 2024?")) == ["NVDA"]
+
+
+def test_all_caps_queries_need_a_cashtag(index):
+    assert index.explicit_tickers("IS TSLA A BUY NOW") == []
+    assert symbols(index.explicit_tickers("IS $TSLA A BUY NOW")) == ["TSLA"]
+    assert index.resolve_query("SHOULD I BUY APPLE NOW") is None
+
+
+def test_typos_in_company_names_are_still_found(index):
+    assert symbols(index.resolve_query("Should I buy Microsft?")) == ["MSFT"]
+
+
+def test_ordinary_capitalized_words_are_not_fuzzy_matched(index):
+    # Sentence-initial words and words with another first letter never match fuzzily
+    assert index.lookup("Tonics", fuzzy=False) == []
+    assert index.lookup("Thirty") == []
+    assert symbols(index.resolve_query("Should I buy Tesla in 2024?")) == ["TSLA"]
+
+
+def test_queries_with_an_unknown_company_go_to_the_llm(index):
+    assert index.resolve_query("Should I buy Apple or Facebook?") is None
+    assert index.resolve_query("Compare Microsoft with OpenAI") is None
+    assert index.resolve_query("Tonics and Tesla, thoughts?") is None
+    # Stopwords, finance acronyms and exchanges are not company mentions
+    assert symbols(index.resolve_query("What is the RSI of Apple and Microsoft on NASDAQ?")) == ["AAPL", "MSFT"]
@@ -0,0 +1,70 @@
+import pytest
+
+from stock_market_agent.utils.ticker_cache import TickerResolutionCache, query_key
+
+APPLE = [("Apple Inc.", "AAPL")]
+MICROSOFT = [("Microsoft Corporation", "MSFT")]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tickers.jsonl")
+
+
+def test_phrasings_of_the_same_companies_share_a_key():
+    assert query_key("How has Apple performed this quarter?") == "apple"
+    assert query_key("Apple Inc. stock") == "apple"
+    assert query_key("What is Apple's RSI in 2024?") == "apple"
+    assert query_key("analyze apple") == "apple"
+    assert query_key("Should I buy Apple or Microsoft?") == "apple microsoft"
+
+
+def test_hits_across_phrasings(path):
+    cache = TickerResolutionCache(path=path)
+    cache.put("Should I buy Apple?", APPLE)
+    assert cache.get("How has Apple performed this quarter?") == APPLE
+    assert cache.get("Is Microsoft a buy?") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(path):
+    cache = TickerResolutionCache(path=path, max_entries=2)
+    cache.put("Apple", APPLE)
+    cache.put("Microsoft", MICROSOFT)
+    cache.get("Apple")
+    cache.put("Tesla", [("Tesla Inc", "TSLA")])
+    assert cache.get("Microsoft") is None
+    assert cache.get("Apple") == APPLE
+
+
+def test_corrections_are_not_overwritten(path):
+    cache = TickerResolutionCache(path=path)
+    cache.put("Analyze Reliance", [("Reliance Industries", "RELIANCE.BSE")])
+    cache.correct("Reliance", [("Reliance Industries", "RELIANCE.NSE")])
+    cache.put("Should I buy Reliance?", [("Reliance Industries", "RELIANCE.BSE")])
+    assert cache.get("Reliance stock") == [("Reliance Industries", "RELIANCE.NSE")]
+
+    # The correction is still pinned after a restart
+    reloaded = TickerResolutionCache(path=path)
+    reloaded.put("Reliance?", [("Reliance Industries", "RELIANCE.BSE")])
+    assert reloaded.get("Reliance") == [("Reliance Industries", "RELIANCE.NSE")]
+
+    reloaded.correct("Reliance", [])
+    assert reloaded.get("Reliance stock") is None
+    assert TickerResolutionCache(path=path).get("Reliance") is None
+
+
+def test_entries_survive_a_reload_and_compaction(path):
+    cache = TickerResolutionCache(path=path, max_entries=2)
+    cache.put("Apple", APPLE)
+    cache.correct("Microsoft", MICROSOFT)
+    cache.put("Tesla", [("Tesla Inc", "TSLA")])
+    cache.put("Tesla", [("Tesla Inc", "TSLA")])
+    cache.put("Nvidia", [("Nvidia Corp", "NVDA")])
+
+    reloaded = TickerResolutionCache(path=path, max_entries=2)
+    assert reloaded.get("Tesla") == [("Tesla Inc", "TSLA")]
+    assert reloaded.get("Nvidia") == [("Nvidia Corp", "NVDA")]
+    assert reloaded.get("Apple") is None
+    with open(path) as f:
+        assert len(f.readlines()) <= 4
@@ -6,7 +6,9 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import InjectedToolArg
 from typing_extensions import Annotated
 
+from stock_market_agent.config import settings
 from stock_market_agent.config.chart_agent_config import ChartAgentConfig, ChartType
+from stock_market_agent.tools.historical_data_tool import HistoricalDataTool
 
 import base64
 import io
@@ -16,7 +18,7 @@ from pydantic import BaseModel, Field
 class AnalystInput(BaseModel):
     stock_symbol: str = Field(..., description="The stock symbol to analyze")
     chart_type: str = Field(..., description="The type of chart requested ")
-    ticker_data: Any = Field(..., description="The historical stock ticker data")
+    ticker_data: Any = Field(None, description="The historical stock ticker data, read from the local bar store when omitted")
 
 
 
@@ -42,7 +44,13 @@ def analyst(analyst_input: AnalystInput):
         analyst_input: An instance of AnalystInput containing stock symbol, chart type, and ticker data.
     """
     history = analyst_input.ticker_data
-    chart_type = analyst_input.chart_type
+    if history is None:
+        # Same store the indicators read from, so bars we already have are never downloaded again
+        series = HistoricalDataTool().load_series(
+            analyst_input.stock_symbol, lookback_days=settings.CHART_LOOKBACK_DAYS
+        )
+        history = series.to_frame()
+    chart_type = ChartType(analyst_input.chart_type)
     
     # Create a graph based on the chart type
     plt.figure(figsize=(10, 6))
@@ -7,8 +7,14 @@ from langchain_openai import ChatOpenAI
 from langchain.tools import BaseTool
 from pydantic import Field, PrivateAttr
 from typing import List, Literal
-from stock_market_agent.models.schemas import StockName, CompanySelection, Stocks
+from stock_market_agent.models.schemas import StockName, CompanySelection, Stocks, StockTicker
+from stock_market_agent.config.state import AgentState2
 from stock_market_agent.utils.get_api_key import get_api_key
+from stock_market_agent.utils.alpha_vantage import alpha_vantage_get
+from stock_market_agent.utils.response_cache import get_response_cache
+from stock_market_agent.utils.provider_backend import FixtureNotFoundError, get_provider_backend
+from stock_market_agent.utils.symbol_index import get_symbol_index
+from stock_market_agent.utils.ticker_cache import get_ticker_cache
 
 
 class CompanyTickerTool(BaseTool):
@@ -23,7 +29,21 @@ class CompanyTickerTool(BaseTool):
         self._chat_api_key = get_api_key("OPENAI_API_KEY")
         self._alphavantage_api_key = get_api_key("ALPHA_VANTAGE_API_KEY")
 
-    def _run(self, query: str) -> List[str]:
+    def run(self, query: str, state: AgentState2 = None) -> List[str]:
+        return self._run(query, state)
+
+    def _run(self, query: str, state: AgentState2 = None) -> List[str]:
+        # Phrasings of the same companies seen before, including user corrections
+        cached = get_ticker_cache().get(query)
+        if cached:
+            return Stocks(stock_names=[StockTicker(companyName=name, tickerId=ticker) for name, ticker in cached])
+
+        # Unambiguous company names are answered from the local listing index
+        matches = get_symbol_index(state).resolve_query(query)
+        if matches:
+            print("Tickers resolved from the symbol index:", [match.symbol for match in matches])
+            return Stocks(stock_names=[StockTicker(companyName=match.name, tickerId=match.symbol) for match in matches])
+
         prompt = f"""Given the user's query: '{query}', 
         <instructions>
         1. identify the company names mentioned in the user's query
@@ -33,6 +53,7 @@ class CompanyTickerTool(BaseTool):
             model = ChatOpenAI(model="gpt-4o", temperature=0, api_key=self._chat_api_key)
             structured_llm = model.with_structured_output(Stocks)
             response = structured_llm.invoke(prompt)
+            get_ticker_cache().put(query, [(stock.companyName, stock.tickerId) for stock in response.stock_names])
             return response
         except Exception as e:
             return f"Error extracting stock data: {str(e)} "
@@ -75,6 +96,10 @@ class CompanyTickerTool(BaseTool):
 
     #     return ", ".join(all_best_tickers)
     
+    def correct(self, query: str, stocks: List[StockTicker]):
+        """Record the tickers a query should have resolved to; later phrasings of the same companies get them."""
+        get_ticker_cache().correct(query, [(stock.companyName, stock.tickerId) for stock in stocks])
+
     def extract_stock_names(self, query: str) -> List[str]:
         if not self._chat_api_key:
             raise ValueError("No OPENAI_API_KEY API key found. Please set the OPENAI_API_KEY environment variable.")
@@ -93,15 +118,22 @@ class CompanyTickerTool(BaseTool):
         
         try:
             # Use Alpha Vantage's SYMBOL_SEARCH function
-            base_url = "https://www.alphavantage.co/query"
             params = {
                 "function": "SYMBOL_SEARCH",
                 "keywords": company_name,
                 "apikey": self._alphavantage_api_key
             }
             
-            response = requests.get(base_url, params=params)
-            data = response.json()
+            has_matches = lambda data: bool(data.get("bestMatches"))
+            data = get_provider_backend().fetch(
+                "alphavantage", "SYMBOL_SEARCH", company_name,
+                fetch=lambda: get_response_cache().get_or_fetch(
+                    "alphavantage", "SYMBOL_SEARCH", company_name, params,
+                    fetch=lambda: alpha_vantage_get(params, priority="interactive"),
+                    cacheable=has_matches,
+                ),
+                recordable=has_matches,
+            )
             
             if "bestMatches" in data and data["bestMatches"]:
                 # Extract the first match's ticker symbol
@@ -112,6 +144,8 @@ class CompanyTickerTool(BaseTool):
                 raise RuntimeError("No matches found for the given company name.")
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"HTTP request failed: {str(e)}")
+        except FixtureNotFoundError as e:
+            raise RuntimeError(f"Replay failed: {str(e)}")
         except ValueError as e:
             raise RuntimeError(f"Failed to parse JSON response: {str(e)}")
 
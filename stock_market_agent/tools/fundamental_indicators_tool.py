@@ -1,12 +1,16 @@
 import json
 import os
-import requests
 from langchain.tools import BaseTool
 from pydantic import Field
-from typing import Literal
+from typing import Dict, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from stock_market_agent.config import settings
 from stock_market_agent.config.state import AgentState2
+from stock_market_agent.utils.alpha_vantage import alpha_vantage_get
+from stock_market_agent.utils.provider_backend import ProviderBackend, get_provider_backend
+from stock_market_agent.utils.response_cache import get_response_cache
 
 class FundamentalIndicatorsTool(BaseTool):
     name: Literal["Financial Indicators Tool"] = Field("Financial Indicators Tool")
@@ -21,8 +25,8 @@ class FundamentalIndicatorsTool(BaseTool):
         return self._run(ticker, state)
     
     def _run(self, ticker: str, state: AgentState2=None) -> str:
-            dry_run = state.get("dry_run", False) if state else False
-            dry_run = True
+            # Resolved here, the fetch threads do not see the run's config
+            backend = get_provider_backend(state=state)
             indicators = {}
 
             # Fetching different financial indicators
@@ -35,101 +39,18 @@ class FundamentalIndicatorsTool(BaseTool):
                 "CASH_FLOW": "Cash Flow"
             }
 
-            temp_data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tempData'))
-            os.makedirs(temp_data_folder, exist_ok=True)
-            output_file_path = os.path.join(temp_data_folder, "financial_indicators_output.txt")
-
-            if dry_run and os.path.exists(output_file_path):
-                with open(output_file_path, "r") as f:
-                    data = json.loads(f.read())
-                return data
+            responses = self._fetch_all(ticker, functions, backend)
 
+            # Merge in the declaration order of `functions` so later endpoints
+            # override earlier ones exactly like the sequential version did
             for function, description in functions.items():
-                params = {
-                    "function": function,
-                    "symbol": ticker,
-                    "apikey": self.api_key
-                }
-                
+                data = responses.get(function)
+                if data is None:
+                    continue
                 try:
-                    response = requests.get(self.base_url, params=params)
-                    response.raise_for_status()  # Raise exception for HTTP errors
-                    data = response.json()
-                    print(data)
-                    
-                    # Check for API error messages
-                    if "Error Message" in data:
-                        print(f"API Error for {description}: {data['Error Message']}")
-                        continue
-                    
-                    if "Information" in data:
-                        print(f"API Note for {description}: {data['Information']}")
-                        continue
-                        # This often indicates rate limiting
-                    
-                    # Print sample of data for debugging
-                    print(f"API called for {description}. Sample data keys: {list(data.keys())[:5]}")
-                    
-                    if function == "OVERVIEW":
-                        indicators.update({
-                            "P/E Ratio": data.get("PERatio"),
-                            "EPS": data.get("EPS"),
-                            "Debt-to-Equity": data.get("DebtEquityRatio"),
-                            "Current Ratio": data.get("CurrentRatio"),
-                            "ROE": data.get("ReturnOnEquityTTM"),
-                            "Profit Margin": data.get("ProfitMargin"),
-                            "Dividend Yield": data.get("DividendYield"),
-                            "Dividend Per Share": data.get("DividendPerShare"),
-                        })
-                    elif function == "TIME_SERIES_DAILY":
-                        time_series = data.get("Time Series (Daily)", {})
-                        if time_series:
-                            latest_date = sorted(time_series.keys())[0]
-                            latest_data = time_series[latest_date]
-                            indicators.update({
-                                "Short-term MA": latest_data.get("4. close"),  # Placeholder for actual calculation
-                                "Long-term MA": latest_data.get("4. close"),  # Placeholder for actual calculation
-                                "Average Volume": latest_data.get("5. volume"),  # Placeholder for actual calculation
-                                "Current Volume": latest_data.get("5. volume")
-                            })
-                    elif function == "EARNINGS":
-                        earnings = data.get("quarterlyEarnings", [])
-                        if earnings:
-                            print("earnings", earnings[0].get("reportedEPS"))
-                            indicators["EPS"] = earnings[0].get("reportedEPS")
-                    elif function == "BALANCE_SHEET":
-                        balance_sheet = data.get("quarterlyReports", [])
-                        if balance_sheet:
-                            print("balance_sheet", balance_sheet[0].get("totalLiabilities"))
-                            total_liabilities = balance_sheet[0].get("totalLiabilities")
-                            total_shareholder_equity = balance_sheet[0].get("totalShareholderEquity")
-                            if total_liabilities and total_shareholder_equity:
-                                indicators["Debt-to-Equity"] = int(total_liabilities) / int(total_shareholder_equity)
-                    elif function == "INCOME_STATEMENT":
-                        income_statement = data.get("quarterlyReports", [])
-                        if income_statement:
-                            print("grossProfit", income_statement[0].get("grossProfit"))
-                            gross_profit = income_statement[0].get("grossProfit")
-                            total_revenue = income_statement[0].get("totalRevenue")
-                            if gross_profit and total_revenue:
-                                indicators["Profit Margin"] = int(gross_profit) / int(total_revenue)
-                    elif function == "CASH_FLOW":
-                        cash_flow = data.get("quarterlyReports", [])
-                        if cash_flow:
-                            operating_cashflow = int(cash_flow[0].get("operatingCashflow", 0))
-                            capital_expenditures = int(cash_flow[0].get("capitalExpenditures", 0))
-                            cashflow_from_investment = int(cash_flow[0].get("cashflowFromInvestment", 0))
-                            cashflow_from_financing = int(cash_flow[0].get("cashflowFromFinancing", 0))
-
-                            indicators.update({
-                                "Operating Cash Flow": operating_cashflow,
-                                "Free Cash Flow": operating_cashflow - capital_expenditures,
-                                "Cash Flow from Investing": cashflow_from_investment,
-                                "Cash Flow from Financing": cashflow_from_financing,
-                                "Net Change in Cash": operating_cashflow + cashflow_from_investment + cashflow_from_financing
-                            })
+                    self._merge_indicators(function, data, indicators)
                 except Exception as e:
-                    print(f"Error fetching {description} data: {str(e)}")
+                    print(f"Error processing {description} data: {str(e)}")
 
             # If no data was retrieved, use sample data for testing
             # if not any(indicators.values()):
@@ -157,11 +78,122 @@ class FundamentalIndicatorsTool(BaseTool):
             #         "Net Change in Cash": "5000000"
             #     }
 
-            with open(output_file_path, "w") as f:
-                f.write(json.dumps(indicators, indent=4))
-
             return indicators
 
+    def _fetch_all(self, ticker: str, functions: Dict[str, str], backend: ProviderBackend) -> Dict[str, Optional[dict]]:
+        """Fetch every Alpha Vantage function concurrently. Failed functions map to None."""
+        max_workers = max(1, min(settings.FUNDAMENTALS_MAX_WORKERS, len(functions)))
+        responses = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fundamentals") as executor:
+            futures = {
+                executor.submit(self._fetch_function, function, description, ticker, backend): function
+                for function, description in functions.items()
+            }
+            for future in as_completed(futures):
+                function = futures[future]
+                try:
+                    responses[function] = future.result()
+                except Exception as e:
+                    print(f"Error fetching {functions[function]} data: {str(e)}")
+                    responses[function] = None
+        return responses
+
+    def _fetch_function(self, function: str, description: str, ticker: str, backend: ProviderBackend) -> Optional[dict]:
+        params = {
+            "function": function,
+            "symbol": ticker,
+            "apikey": self.api_key
+        }
+
+        data = backend.fetch(
+            "alphavantage", function, ticker,
+            fetch=lambda: get_response_cache().get_or_fetch(
+                "alphavantage", function, ticker, params,
+                fetch=lambda: alpha_vantage_get(params, base_url=self.base_url),
+                cacheable=self._is_valid_response,
+            ),
+            recordable=self._is_valid_response,
+        )
+
+        # Check for API error messages
+        if "Error Message" in data:
+            print(f"API Error for {description}: {data['Error Message']}")
+            return None
+
+        if "Information" in data:
+            # This often indicates rate limiting
+            print(f"API Note for {description}: {data['Information']}")
+            return None
+
+        # Print sample of data for debugging
+        print(f"API called for {description}. Sample data keys: {list(data.keys())[:5]}")
+        return data
+
+    @staticmethod
+    def _is_valid_response(data: dict) -> bool:
+        # Errors and rate-limit notes must never be cached
+        return bool(data) and not any(key in data for key in ("Error Message", "Information", "Note"))
+
+    def _merge_indicators(self, function: str, data: dict, indicators: dict):
+        if function == "OVERVIEW":
+            indicators.update({
+                "P/E Ratio": data.get("PERatio"),
+                "EPS": data.get("EPS"),
+                "Debt-to-Equity": data.get("DebtEquityRatio"),
+                "Current Ratio": data.get("CurrentRatio"),
+                "ROE": data.get("ReturnOnEquityTTM"),
+                "Profit Margin": data.get("ProfitMargin"),
+                "Dividend Yield": data.get("DividendYield"),
+                "Dividend Per Share": data.get("DividendPerShare"),
+            })
+        elif function == "TIME_SERIES_DAILY":
+            time_series = data.get("Time Series (Daily)", {})
+            if time_series:
+                latest_date = sorted(time_series.keys())[0]
+                latest_data = time_series[latest_date]
+                indicators.update({
+                    "Short-term MA": latest_data.get("4. close"),  # Placeholder for actual calculation
+                    "Long-term MA": latest_data.get("4. close"),  # Placeholder for actual calculation
+                    "Average Volume": latest_data.get("5. volume"),  # Placeholder for actual calculation
+                    "Current Volume": latest_data.get("5. volume")
+                })
+        elif function == "EARNINGS":
+            earnings = data.get("quarterlyEarnings", [])
+            if earnings:
+                print("earnings", earnings[0].get("reportedEPS"))
+                indicators["EPS"] = earnings[0].get("reportedEPS")
+        elif function == "BALANCE_SHEET":
+            balance_sheet = data.get("quarterlyReports", [])
+            if balance_sheet:
+                print("balance_sheet", balance_sheet[0].get("totalLiabilities"))
+                total_liabilities = balance_sheet[0].get("totalLiabilities")
+                total_shareholder_equity = balance_sheet[0].get("totalShareholderEquity")
+                if total_liabilities and total_shareholder_equity:
+                    indicators["Debt-to-Equity"] = int(total_liabilities) / int(total_shareholder_equity)
+        elif function == "INCOME_STATEMENT":
+            income_statement = data.get("quarterlyReports", [])
+            if income_statement:
+                print("grossProfit", income_statement[0].get("grossProfit"))
+                gross_profit = income_statement[0].get("grossProfit")
+                total_revenue = income_statement[0].get("totalRevenue")
+                if gross_profit and total_revenue:
+                    indicators["Profit Margin"] = int(gross_profit) / int(total_revenue)
+        elif function == "CASH_FLOW":
+            cash_flow = data.get("quarterlyReports", [])
+            if cash_flow:
+                operating_cashflow = int(cash_flow[0].get("operatingCashflow", 0))
+                capital_expenditures = int(cash_flow[0].get("capitalExpenditures", 0))
+                cashflow_from_investment = int(cash_flow[0].get("cashflowFromInvestment", 0))
+                cashflow_from_financing = int(cash_flow[0].get("cashflowFromFinancing", 0))
+
+                indicators.update({
+                    "Operating Cash Flow": operating_cashflow,
+                    "Free Cash Flow": operating_cashflow - capital_expenditures,
+                    "Cash Flow from Investing": cashflow_from_investment,
+                    "Cash Flow from Financing": cashflow_from_financing,
+                    "Net Change in Cash": operating_cashflow + cashflow_from_investment + cashflow_from_financing
+                })
+
     # def _run(self, ticker: str, state: AgentState2=None) -> str:
     #     dry_run = state.get("dry_run", False) if state else False
         
@@ -1,23 +1,26 @@
-from typing import Dict, List, Literal, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Literal, Tuple
 from pydantic import Field, PrivateAttr
 from scipy import stats
 import numpy as np
 from langchain.tools import BaseTool
+from stock_market_agent.models.bar_series import BarSeries
 
 
 class HistoricalAnalysisTool(BaseTool):
     name: Literal["Historical Analysis Tool"] = Field("Historical Analysis Tool")
     description: Literal["Analyse the historical stock data and perform analysis"] = Field("Analyse the historical stock data and perform analysis")
 
-    _parsed_data: Dict[str, List[float]] = PrivateAttr()
+    _parsed_data: Dict[str, np.ndarray] = PrivateAttr()
     
     def __init__(self):
         super().__init__()
 
     def _run(self, data : str):
-        self._parsed_data = self._parse_data(data)
-        
+        return self.analyse(BarSeries.from_csv("", data))
+
+    def analyse(self, series: BarSeries):
+        self._parsed_data = {"date": series.dates, "price": series.close, "volume": series.volume}
+
         trend = self.calculate_trend()
         volatility = self.calculate_volatility()
         support, resistance = self.identify_support_resistance()
@@ -38,16 +41,6 @@ class HistoricalAnalysisTool(BaseTool):
 
         return analysis_data
 
-    def _parse_data(self, data: str) -> Dict[str, List[float]]:
-        lines = data.strip().split("\n")[1:]  # Skip header
-        parsed = {"date": [], "price": [], "volume": []}
-        for line in lines:
-            date, price, volume = line.split(",")
-            parsed["date"].append(datetime.strptime(date, "%Y-%m-%d"))
-            parsed["price"].append(float(price))
-            parsed["volume"].append(int(volume))
-        return parsed
-
     def calculate_trend(self) -> float:
         x = range(len(self._parsed_data["price"]))
         slope, _, _, _, _ = stats.linregress(x, self._parsed_data["price"])
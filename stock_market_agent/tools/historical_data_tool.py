@@ -1,18 +1,23 @@
-import json
 import os
-import yfinance as yf
 from yfinance import Ticker
-from datetime import datetime, timedelta
-from typing import Literal
+from yfinance.exceptions import YFPricesMissingError
+from datetime import date, datetime, timedelta
+from typing import List, Literal
 from pydantic import Field
 
-import requests
-from datetime import datetime, timedelta
 from langchain.tools import BaseTool
 
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from stock_market_agent.config.state import AgentState2
+from stock_market_agent.config import settings
+from stock_market_agent.models.bar_series import BarSeries
+from stock_market_agent.utils.alpha_vantage import alpha_vantage_get, to_yahoo_symbol
+from stock_market_agent.utils.bar_store import Bar, get_bar_store
+from stock_market_agent.utils.failover import call_with_failover
+from stock_market_agent.utils.get_api_key import get_api_key
+from stock_market_agent.utils.provider_backend import ProviderBackend, get_provider_backend
+from stock_market_agent.utils.singleflight import get_singleflight
 
 # class HistoricalDataTool(BaseTool):
 #     name = "Historical Data Tool"
@@ -93,60 +98,117 @@ class HistoricalDataTool(BaseTool):
     #     return "\n".join(data)
     
     def _run(self, ticker: str, state: AgentState2 = None) -> str:
-        dry_run = state.get("dry_run", False) if state else False  
-        dry_run = True
-
-        temp_data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tempData'))
-        os.makedirs(temp_data_folder, exist_ok=True)
-        output_file_path = os.path.join(temp_data_folder, "historical_data_output.txt")
-
-        if dry_run and os.path.exists(output_file_path):
-            with open(output_file_path, "r") as f:
-                data = f.read()
-            return data
-        
         try:
-            # Fetch historical data for the past 30 days
-            end_date = datetime.now().date()  # Use only the date part
-            start_date = end_date - timedelta(days=30)
-
-            # Convert dates to strings
-            start_date_str = start_date.strftime('%Y-%m-%d')
-            end_date_str = end_date.strftime('%Y-%m-%d')
-            
-            # # Use yfinance download with proper parameters
-            # stock_data = yf.download(
-            #     ticker.upper().strip(),
-            #     start=start_date,
-            #     end=end_date,
-            #     progress=False,
-            #     interval='1d',
-            #     ignore_tz=True  # Ignore timezone issues
-            # )
-            
-            ticker_obj = Ticker(ticker.upper().strip())
-            stock_data = ticker_obj.history(
-                start=start_date_str,
-                end=end_date_str,
-                interval='1d'
-            )
-            
-            if stock_data.empty:
-                return f"No data found for ticker symbol: {ticker}"
-            
-            # Prepare the data in the desired format
-            data = ["date,price,volume"]
-            for date, row in stock_data.iterrows():
-                data.append(f"{date.strftime('%Y-%m-%d')},{row['Close']:.2f},{int(row['Volume'])}")
-            
-            with open(output_file_path, "w") as f:
-                f.write("\n".join(data))
-            return "\n".join(data)
-            
+            return self.load_series(ticker, state).to_csv()
         except Exception as e:
             error_message = f"Error fetching data for {ticker}: {str(e)}"
             print(error_message)
             return error_message
+
+    def load_series(
+        self,
+        ticker: str,
+        state: AgentState2 = None,
+        lookback_days: int = settings.HISTORY_LOOKBACK_DAYS,
+    ) -> BarSeries:
+        """Return the last `lookback_days` of bars for `ticker` as a BarSeries, fetching only the missing bars."""
+        backend = get_provider_backend(state=state)
+        if backend.is_replay:
+            return self._replay_series(ticker, backend, lookback_days)
+
+        # Past `lookback_days` days, excluding today's incomplete bar
+        end_date = datetime.now().date()  # Use only the date part
+        start_date = end_date - timedelta(days=lookback_days)
+
+        store = get_bar_store()
+        get_singleflight().do(
+            f"bars:{ticker.upper().strip()}",
+            lambda: store.update(ticker, start_date, end_date, self._fetch_bars),
+        )
+
+        bars = store.read(ticker, start=start_date, end=end_date)
+        if len(bars["date"]) == 0:
+            raise ValueError(f"No data found for ticker symbol: {ticker}")
+        series = BarSeries.from_columns(ticker, bars)
+        backend.record_bars("yfinance", ticker, series.to_bars())
+        return series
+
+    def _replay_series(self, ticker: str, backend: ProviderBackend, lookback_days: int) -> BarSeries:
+        # The window ends at the last recorded bar rather than today, so replays stay reproducible
+        bars = backend.replay_bars("yfinance", ticker)
+        if not bars:
+            raise ValueError(f"No data found for ticker symbol: {ticker}")
+        window_start = bars[-1][0] - timedelta(days=lookback_days - 1)
+        return BarSeries.from_bars(ticker, [bar for bar in bars if bar[0] >= window_start])
+
+    def _fetch_bars(self, ticker: str, start_date: date, end_date: date) -> List[Bar]:
+        print(f"Fetching {ticker} bars from {start_date} to {end_date}")
+        # yfinance first, Alpha Vantage when it is down or slower than its p95
+        sources = [("yfinance", lambda: self._fetch_yfinance_bars(ticker, start_date, end_date))]
+        api_key = get_api_key("ALPHA_VANTAGE_API_KEY")
+        if api_key:
+            sources.append(("alphavantage", lambda: self._fetch_alpha_vantage_bars(ticker, start_date, end_date, api_key)))
+        # An empty answer is still an answer (a market holiday); only errors fail over
+        return call_with_failover(sources)
+
+    def _fetch_yfinance_bars(self, ticker: str, start_date: date, end_date: date) -> List[Bar]:
+        ticker_obj = Ticker(to_yahoo_symbol(ticker))
+        try:
+            stock_data = ticker_obj.history(
+                start=start_date.strftime('%Y-%m-%d'),
+                end=end_date.strftime('%Y-%m-%d'),
+                interval='1d',
+                auto_adjust=True,  # split and dividend adjusted, so the indicators see no fake jumps
+                raise_errors=True,  # instead of an empty frame, so failures reach the circuit breaker
+            )
+        except YFPricesMissingError as e:
+            # Yahoo answered but had no bars in the range, e.g. a market holiday. An
+            # unknown symbol comes with Yahoo's own reason, an outage with its status code
+            if e.yahoo_reason or "status_code" in e.debug_info:
+                raise
+            return []
+
+        bars = []
+        for timestamp, row in stock_data.iterrows():
+            close = float(row['Close'])
+            bars.append((
+                timestamp.date(),
+                float(row['Open']),
+                float(row['High']),
+                float(row['Low']),
+                close,
+                close,  # 'Close' is already the adjusted close
+                int(row['Volume']),
+            ))
+        return bars
+
+    def _fetch_alpha_vantage_bars(self, ticker: str, start_date: date, end_date: date, api_key: str) -> List[Bar]:
+        # The compact output covers the last 100 trading days, roughly 140 calendar days
+        compact = (datetime.now().date() - start_date).days < 140
+        data = alpha_vantage_get({
+            "function": "TIME_SERIES_DAILY",
+            "symbol": ticker,
+            "outputsize": "compact" if compact else "full",
+            "apikey": api_key,
+        }, raise_if_limited=True)
+        if "Time Series (Daily)" not in data:
+            raise ValueError(data.get("Error Message") or data.get("Information") or "Error fetching data from Alpha Vantage")
+
+        bars = []
+        for day, values in data["Time Series (Daily)"].items():
+            bar_date = date.fromisoformat(day)
+            if start_date <= bar_date < end_date:
+                close = float(values['4. close'])
+                bars.append((
+                    bar_date,
+                    float(values['1. open']),
+                    float(values['2. high']),
+                    float(values['3. low']),
+                    close,
+                    close,  # the free daily series is unadjusted
+                    int(values['5. volume']),
+                ))
+        return sorted(bars, key=lambda bar: bar[0])
        
         
 # Example usage
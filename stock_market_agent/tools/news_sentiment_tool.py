@@ -1,91 +1,176 @@
 import json
-import os
-import requests
 from langchain.tools import BaseTool
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from pydantic import Field, PrivateAttr
-from typing import Literal
+from pydantic import Field
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
+from stock_market_agent.config import settings
 from stock_market_agent.config.state import AgentState2
+from stock_market_agent.utils.company_matcher import CompanyMatcher, company_aliases
+from stock_market_agent.utils.http_client import get_http_client
+from stock_market_agent.utils.news_dedup import get_news_dedup_index
+from stock_market_agent.utils.provider_backend import FixtureNotFoundError, ProviderBackend, get_provider_backend
+from stock_market_agent.utils.response_cache import freshness, get_response_cache
+from stock_market_agent.utils.sentiment_cache import article_text, get_sentiment_cache
+from stock_market_agent.utils.sentiment_pool import get_sentiment_pool
 
 class NewsSentimentTool(BaseTool):
     name: Literal["News Sentiment Tool"] = Field(default="News Sentiment Tool")
     description: Literal["This is an example"] = Field(default="Analyze recent news sentiment for a given company")
     api_key: str
     base_url: Literal["https://newsapi.org/v2/everything"] = Field(default="https://newsapi.org/v2/everything")
-    _analyzer: SentimentIntensityAnalyzer = PrivateAttr()
 
 
 
     def __init__(self, api_key: str):
         super().__init__(api_key=api_key)
         # self.api_key = api_key
-        self._analyzer = SentimentIntensityAnalyzer()
+        # VADER is loaded once by the shared scoring pool, not per tool instance
 
     def run(self, company: str, state: AgentState2 = None) -> str:
         return self._run(company, state)
 
     def _run(self, company: str, state: AgentState2) -> str:
-        dry_run = state.get("dry_run", False) if state else False
-        dry_run = True
+        backend = get_provider_backend(state=state)
+        data, metadata = self._fetch_articles(company, backend)
+
+        # Debugging information
+        # print("API Response:", data)
+        print("API called for Sentiment Analysis:")
+
+        if "articles" in data:
+            # Syndicated copies of a story are scored once, through their first article
+            collapsed = get_news_dedup_index().collapse(data["articles"])
+            # Only articles not seen in an earlier response are run through VADER
+            scores = get_sentiment_cache().score_articles(
+                company, collapsed["articles"], get_sentiment_pool().score_compound
+            )
+            return json.dumps(self._summarize(company, scores, metadata, collapsed["duplicates"]))
+        else:
+            return json.dumps(self._fetch_error(company, data))
+
+    def run_batch(self, companies: Dict[str, Union[str, List[str]]], state: AgentState2 = None) -> Dict[str, dict]:
+        """
+        Sentiment for a watchlist with a handful of NewsAPI calls instead of one per company.
+
+        `companies` maps each ticker to its company name, or to a list whose first entry is
+        the name used in the query and the rest are extra aliases for attribution. Names
+        are OR-ed into combined queries of at most NEWS_COMPANIES_PER_QUERY companies, each
+        returned article is attributed to every ticker whose name, alias or cashtag it
+        mentions, and the result maps each ticker to the same record `_run` returns.
+        """
+        backend = get_provider_backend(state=state)
+        names = {ticker: [value] if isinstance(value, str) else list(value) for ticker, value in companies.items()}
+        matcher = CompanyMatcher(names)
+        scorer = get_sentiment_pool().score_compound
+
+        articles: Dict[str, List[dict]] = {ticker: [] for ticker in names}
+        duplicates: Dict[str, int] = {ticker: 0 for ticker in names}
+        metadata: Dict[str, dict] = {}
+        results: Dict[str, dict] = {}
+        for tickers in self._group_queries(names):
+            query = " OR ".join(f'"{self._query_term(names[ticker][0])}"' for ticker in tickers)
+            data, query_metadata = self._fetch_articles(query, backend, page_size=100)
+            print(f"API called for Sentiment Analysis of {len(tickers)} companies:")
+            if "articles" not in data:
+                for ticker in tickers:
+                    results[ticker] = self._fetch_error(names[ticker][0], data)
+                continue
+
+            collapsed = get_news_dedup_index().collapse(data["articles"])
+            # One scoring batch per response instead of one per company
+            get_sentiment_cache().prime(collapsed["articles"], scorer)
+            for article, size in zip(collapsed["articles"], collapsed["sizes"]):
+                for ticker in matcher.match(article_text(article)):
+                    articles[ticker].append(article)
+                    duplicates[ticker] += size - 1
+            for ticker in tickers:
+                metadata[ticker] = query_metadata
+
+        for ticker, ticker_names in names.items():
+            if ticker in results:
+                continue
+            scores = get_sentiment_cache().score_articles(ticker_names[0], articles[ticker], scorer)
+            results[ticker] = self._summarize(ticker_names[0], scores, metadata[ticker], duplicates[ticker])
+        return results
+
+    def _fetch_articles(self, query: str, backend: ProviderBackend, page_size: Optional[int] = None) -> Tuple[dict, dict]:
+        """Return the NewsAPI response for `query` and its freshness metadata."""
         params = {
-            "q": company,
+            "q": query,
             "sortBy": "publishedAt",
             "apiKey": self.api_key,
             "language": "en"
         }
+        if page_size:
+            params["pageSize"] = page_size
 
-        temp_data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tempData'))
-        os.makedirs(temp_data_folder, exist_ok=True)
-        output_file_path = os.path.join(temp_data_folder, "news_sentiment_output.txt")
+        is_valid = lambda data: "articles" in data
+        metadata = freshness()
 
-        if dry_run and os.path.exists(output_file_path):
-            with open(output_file_path, "r") as f:
-                data = json.loads(f.read())
-        else:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+        def fetch_cached():
+            # Recently expired news is served right away and refreshed in the background
+            entry = get_response_cache().get_or_fetch_entry(
+                "newsapi", "everything", query, params,
+                fetch=lambda: get_http_client().get(self.base_url, params=params).json(),
+                cacheable=is_valid,
+            )
+            metadata.update(freshness(entry["age"], entry["stale"]))
+            return entry["value"]
 
-            # Write outputs to separate text files in the tempData folder
-            with open(output_file_path, "w") as f:
-                f.write(json.dumps(data, indent=4))
+        try:
+            data = backend.fetch("newsapi", "everything", query, fetch=fetch_cached, recordable=is_valid)
+        except FixtureNotFoundError as e:
+            # A replay miss is reported like a NewsAPI error, for this company only
+            print(f"Replay failed: {str(e)}")
+            data = {"status": "error", "message": str(e)}
+        return data, metadata
 
-        # Debugging information
-        # print("API Response:", data)
-        print("API called for Sentiment Analysis:")
-
-        if "articles" in data:
-            sentiments = []
-            for article in data["articles"]:
-                title = article["title"]
-                description = article["description"]
-                content = article["content"]
-                text = f"{title} {description} {content}"
-                sentiment = self._analyzer.polarity_scores(text)
-                sentiments.append(sentiment["compound"])
-
-            if sentiments:
-                average_sentiment = sum(sentiments) / len(sentiments)
-                sentiment_label = "Positive" if average_sentiment > 0 else "Negative" if average_sentiment < 0 else "Neutral"
-                result = {
-                    "company": company,
-                    "sentiment": sentiment_label,
-                    "average_score": round(average_sentiment, 2)
-                }
-                return json.dumps(result)
+    @staticmethod
+    def _group_queries(names: Dict[str, List[str]]) -> List[List[str]]:
+        """Split tickers into groups whose OR-ed names fit one NewsAPI query."""
+        groups: List[List[str]] = []
+        length = 0
+        for ticker, ticker_names in names.items():
+            term_length = len(NewsSentimentTool._query_term(ticker_names[0])) + 2
+            if groups and len(groups[-1]) < settings.NEWS_COMPANIES_PER_QUERY and \
+                    length + len(" OR ") + term_length <= settings.NEWS_QUERY_MAX_LENGTH:
+                groups[-1].append(ticker)
+                length += len(" OR ") + term_length
             else:
-                result = {
-                    "company": company,
-                    "error": "No sentiment data available."
-                }
-                return json.dumps(result)
-        else:
-            result = {
+                groups.append([ticker])
+                length = term_length
+        return groups
+
+    @staticmethod
+    def _query_term(name: str) -> str:
+        # "Apple Inc." as an exact phrase would miss articles that just say "Apple"
+        return company_aliases(name)[-1]
+
+    @staticmethod
+    def _summarize(company: str, scores: dict, metadata: dict, duplicates: int = 0) -> dict:
+        if not scores["count"]:
+            return {
                 "company": company,
-                "error": f"Failed to fetch news. Error: {data.get('message', 'Unknown error')}"
+                "error": "No sentiment data available."
             }
-            return json.dumps(result)
-    
+        average_sentiment = scores["average"]
+        sentiment_label = "Positive" if average_sentiment > 0 else "Negative" if average_sentiment < 0 else "Neutral"
+        return {
+            "company": company,
+            "sentiment": sentiment_label,
+            "average_score": round(average_sentiment, 2),
+            "articles": scores["count"],
+            "duplicates_collapsed": duplicates,
+            "data_age": metadata,
+        }
+
+    @staticmethod
+    def _fetch_error(company: str, data: dict) -> dict:
+        return {
+            "company": company,
+            "error": f"Failed to fetch news. Error: {data.get('message', 'Unknown error')}"
+        }
+
 # Example usage
 if __name__ == "__main__":
     api_key = "33329b286a8d40c89a39748b2bb98dd5"
@@ -1,8 +1,61 @@
-import json
-import os
-import requests
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import yfinance as yf
+from yfinance import Ticker
 from langchain_core.tools import BaseTool
+from stock_market_agent.config import settings
 from stock_market_agent.config.state import AgentState2
+from stock_market_agent.utils.alpha_vantage import alpha_vantage_get, to_yahoo_symbol
+from stock_market_agent.utils.failover import AllProvidersFailedError, call_with_failover
+from stock_market_agent.utils.provider_backend import FixtureNotFoundError, get_provider_backend
+from stock_market_agent.utils.response_cache import freshness, get_response_cache
+
+# Columns of the batch quote result, besides "symbol", "source" and "error"
+QUOTE_FIELDS = {
+    "price": "05. price",
+    "open": "02. open",
+    "high": "03. high",
+    "low": "04. low",
+    "volume": "06. volume",
+    "previous_close": "08. previous close",
+    "change": "09. change",
+    "change_percent": "10. change percent",
+}
+
+
+def _is_valid_quote(data: dict) -> bool:
+    # Alpha Vantage answers an unknown symbol with an empty "Global Quote"
+    return bool(data.get("Global Quote", {}).get("05. price"))
+
+
+def _quote_error(data: dict) -> str:
+    return data.get("Note") or data.get("Information") or data.get("Error Message") or "Unknown error"
+
+
+def _global_quote(symbol: str, day_open: float, high: float, low: float, price: float, volume: float, previous_close: Optional[float]) -> dict:
+    """Quote from a secondary source in the Alpha Vantage GLOBAL_QUOTE layout."""
+    change = price - previous_close if previous_close else 0.0
+    return {
+        "Global Quote": {
+            "01. symbol": symbol,
+            "02. open": f"{day_open:.4f}",
+            "03. high": f"{high:.4f}",
+            "04. low": f"{low:.4f}",
+            "05. price": f"{price:.4f}",
+            "06. volume": str(int(volume or 0)),
+            "08. previous close": f"{previous_close:.4f}" if previous_close else "",
+            "09. change": f"{change:.4f}",
+            "10. change percent": f"{change / previous_close * 100:.4f}%" if previous_close else "",
+        }
+    }
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(str(value).rstrip("%"))
+    except (TypeError, ValueError):
+        return None
 
 class StockPriceTool(BaseTool):
     name: str = "Stock Price Tool"
@@ -17,47 +70,191 @@ class StockPriceTool(BaseTool):
         return self._run(company, state)
 
     def _run(self, ticker: str, state: AgentState2 = None) -> str:
-        dry_run = state.get("dry_run", False) if state else False
-        dry_run= True
-        # print("dry run: ", dry_run)
-        params = {
-            "function": "GLOBAL_QUOTE",
-            "symbol": ticker,
-            "apikey": self.api_key
-        }
+        price, metadata = self.run_with_metadata(ticker, state)
+        if price is None:
+            return f"Failed to fetch data for {ticker}. Error: {metadata['error']}"
+        return price
 
-        temp_data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tempData'))
-        os.makedirs(temp_data_folder, exist_ok=True)
-        output_file_path = os.path.join(temp_data_folder, "stock_price_output.txt")
+    def run_with_metadata(self, ticker: str, state: AgentState2 = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Return the latest price and how old it is. A recently expired quote is served
+        immediately (marked stale) while a background refresh updates the cache. When no
+        provider has a quote the price is None and the metadata carries the error, so the
+        rules that need the price are skipped instead of failing the run."""
+        backend = get_provider_backend(state=state)
+        params = self._quote_params(ticker)
+        metadata = freshness()
 
-        if dry_run and os.path.exists(output_file_path):
-            with open(output_file_path, "r") as f:
-                data = json.loads(f.read())
-        else:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+        def fetch_cached():
+            entry = get_response_cache().get_or_fetch_entry(
+                "alphavantage", "GLOBAL_QUOTE", ticker, params,
+                fetch=lambda: self._fetch_live_quote(ticker, params, priority="interactive"),
+                cacheable=_is_valid_quote,
+                refresh=lambda: self._fetch_live_quote(ticker, params, priority="background"),
+            )
+            metadata.update(freshness(entry["age"], entry["stale"]))
+            return entry["value"]
 
-            # Write outputs to separate text files in the tempData folder
-            with open(output_file_path, "w") as f:
-                f.write(json.dumps(data, indent=4))
-                
-        # response = requests.get(self.base_url, params=params)
-        # data = response.json()
+        try:
+            data = backend.fetch("alphavantage", "GLOBAL_QUOTE", ticker, fetch=fetch_cached, recordable=_is_valid_quote)
+        except (AllProvidersFailedError, FixtureNotFoundError) as e:
+            data = {"Error Message": str(e)}
 
-        if "Global Quote" in data:
+        if _is_valid_quote(data):
             latest_price = data["Global Quote"]["05. price"]
-            return f"{latest_price}"
+            return f"{latest_price}", metadata
         else:
-            return f"Failed to fetch data for {ticker}. Error: {data.get('Note', 'Unknown error')}"
-
-        # if "Global Quote" in data:
-        #     latest_price = data["Global Quote"]["05. price"]
-        #     content = f"The latest price for {ticker} is {latest_price}."
-        #     artifact = data  # Including the full response as an artifact
-        #     return content, artifact
-        # else:
-        #     error_message = f"Failed to fetch data for {ticker}. Error: {data.get('Note', 'Unknown error')}"
-        #     return error_message, {}
+            error = _quote_error(data)
+            print(f"Failed to fetch data for {ticker}. Error: {error}")
+            metadata["error"] = error
+            return None, metadata
+
+    def run_batch(self, tickers: List[str], state: AgentState2 = None) -> Dict[str, list]:
+        """
+        Latest quotes for many symbols as columns: {"symbol": [...], "price": [...], ...,
+        "source": [...], "error": [...]}, one row per distinct symbol in input order.
+
+        Quotes still fresh in the response cache are served from it; the rest are fetched
+        QUOTE_BATCH_SIZE symbols per request with a batched yfinance download (or the Alpha
+        Vantage bulk endpoint when enabled), then cached one symbol at a time so later
+        single-symbol lookups hit the cache.
+        """
+        backend = get_provider_backend(state=state)
+        cache = get_response_cache()
+        symbols, seen = [], set()
+        for ticker in tickers:
+            if ticker.strip().upper() not in seen:
+                seen.add(ticker.strip().upper())
+                symbols.append(ticker.strip())
+
+        quotes: Dict[str, dict] = {}
+        sources: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+
+        missing = []
+        for symbol in symbols:
+            if backend.is_replay:
+                try:
+                    quotes[symbol] = backend.fetch("alphavantage", "GLOBAL_QUOTE", symbol, fetch=None)
+                    sources[symbol] = "replay"
+                except FixtureNotFoundError as e:
+                    errors[symbol] = str(e)
+                continue
+            cached = cache.get("alphavantage", "GLOBAL_QUOTE", symbol, self._quote_params(symbol))
+            if cached is not None and _is_valid_quote(cached):
+                quotes[symbol] = cached
+                sources[symbol] = "cache"
+            else:
+                missing.append(symbol)
+
+        for start in range(0, len(missing), settings.QUOTE_BATCH_SIZE):
+            chunk = missing[start:start + settings.QUOTE_BATCH_SIZE]
+            batch_sources = [("yfinance", lambda chunk=chunk: ("yfinance", self._fetch_yfinance_quotes(chunk)))]
+            if settings.ALPHA_VANTAGE_BULK_QUOTES:
+                batch_sources.append(("alphavantage", lambda chunk=chunk: ("alphavantage", self._fetch_alpha_vantage_quotes(chunk))))
+            try:
+                source, fetched = call_with_failover(batch_sources, is_valid=lambda result: bool(result[1]))
+            except Exception as e:
+                print(f"Batch quote request failed for {len(chunk)} symbols: {e}")
+                errors.update({symbol: str(e) for symbol in chunk})
+                continue
+
+            for symbol in chunk:
+                data = fetched.get(symbol.upper())
+                if data is None:
+                    errors[symbol] = f"No quote returned for {symbol}"
+                    continue
+                cache.set("alphavantage", "GLOBAL_QUOTE", symbol, self._quote_params(symbol), data)
+                backend.record("alphavantage", "GLOBAL_QUOTE", symbol, data)
+                quotes[symbol] = data
+                sources[symbol] = source
+
+        columns: Dict[str, list] = {"symbol": symbols}
+        for column, field in QUOTE_FIELDS.items():
+            columns[column] = [
+                _to_float(quotes[symbol]["Global Quote"].get(field)) if symbol in quotes else None
+                for symbol in symbols
+            ]
+        columns["source"] = [sources.get(symbol) for symbol in symbols]
+        columns["error"] = [errors.get(symbol) for symbol in symbols]
+        return columns
+
+    def _fetch_live_quote(self, ticker: str, params: dict, priority: str) -> dict:
+        # Alpha Vantage first, yfinance when it is down, throttled or slower than its p95
+        return call_with_failover(
+            [
+                ("alphavantage", lambda: alpha_vantage_get(params, priority=priority, base_url=self.base_url, raise_if_limited=True)),
+                ("yfinance", lambda: self._fetch_yfinance_quote(ticker)),
+            ],
+            is_valid=_is_valid_quote,
+        )
+
+    def _quote_params(self, ticker: str) -> dict:
+        return {
+            "function": "GLOBAL_QUOTE",
+            "symbol": ticker.upper().strip(),
+            "apikey": self.api_key
+        }
+
+    @staticmethod
+    def _fetch_yfinance_quote(ticker: str) -> dict:
+        """Latest quote from yfinance in the Alpha Vantage GLOBAL_QUOTE layout."""
+        info = Ticker(to_yahoo_symbol(ticker)).fast_info
+        price = info["last_price"]
+        if price is None:
+            return {}
+        return _global_quote(
+            ticker, info["open"], info["day_high"], info["day_low"], price,
+            info["last_volume"], info["previous_close"],
+        )
+
+    @staticmethod
+    def _fetch_yfinance_quotes(tickers: List[str]) -> Dict[str, dict]:
+        """One batched download of the last daily bars, keyed by upper-case symbol."""
+        yahoo_symbols = {to_yahoo_symbol(ticker): ticker for ticker in tickers}
+        frame = yf.download(
+            list(yahoo_symbols),
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            threads=True,
+            progress=False,
+        )
+        quotes = {}
+        for yahoo_symbol, ticker in yahoo_symbols.items():
+            try:
+                bars = frame[yahoo_symbol].dropna(subset=["Close"])
+            except KeyError:
+                continue
+            if bars.empty:
+                continue
+            last = bars.iloc[-1]
+            previous_close = float(bars["Close"].iloc[-2]) if len(bars) > 1 else None
+            volume = 0 if math.isnan(last["Volume"]) else last["Volume"]
+            quotes[ticker.upper()] = _global_quote(
+                ticker, float(last["Open"]), float(last["High"]), float(last["Low"]),
+                float(last["Close"]), volume, previous_close,
+            )
+        return quotes
+
+    def _fetch_alpha_vantage_quotes(self, tickers: List[str]) -> Dict[str, dict]:
+        """REALTIME_BULK_QUOTES (premium), keyed by upper-case symbol."""
+        data = alpha_vantage_get(
+            {"function": "REALTIME_BULK_QUOTES", "symbol": ",".join(tickers), "apikey": self.api_key},
+            base_url=self.base_url,
+            raise_if_limited=True,
+        )
+        quotes = {}
+        for row in data.get("data", []):
+            symbol = row.get("symbol", "").upper()
+            try:
+                quotes[symbol] = _global_quote(
+                    row["symbol"], float(row["open"]), float(row["high"]), float(row["low"]),
+                    float(row["close"]), float(row.get("volume") or 0), _to_float(row.get("previous_close")),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return quotes
 
 # Example usage
 if __name__ == "__main__":
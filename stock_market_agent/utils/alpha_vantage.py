@@ -0,0 +1,58 @@
+"""Rate limited access to the Alpha Vantage query endpoint."""
+
+from typing import Any, Dict
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.failover import ProviderThrottledError
+from stock_market_agent.utils.http_client import get_http_client
+from stock_market_agent.utils.rate_limiter import get_alpha_vantage_limiter
+
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+
+# Alpha Vantage exchange suffix -> Yahoo Finance exchange suffix
+_YAHOO_SUFFIXES = {".BSE": ".BO"}
+
+
+def to_yahoo_symbol(symbol: str) -> str:
+    symbol = symbol.upper().strip()
+    for suffix, yahoo_suffix in _YAHOO_SUFFIXES.items():
+        if symbol.endswith(suffix):
+            return symbol[: -len(suffix)] + yahoo_suffix
+    return symbol
+
+
+def is_rate_limited(data: Dict[str, Any]) -> bool:
+    """Alpha Vantage answers quota overruns with HTTP 200 and an "Information" or "Note" message."""
+    message = str(data.get("Information") or data.get("Note") or "").lower()
+    return "rate limit" in message or "call frequency" in message
+
+
+def alpha_vantage_get(
+    params: Dict[str, Any],
+    priority: str = "default",
+    base_url: str = ALPHA_VANTAGE_URL,
+    raise_if_limited: bool = False,
+) -> Dict[str, Any]:
+    """
+    Send one Alpha Vantage request through the shared token bucket.
+
+    If Alpha Vantage still reports a rate limit (e.g. another process shares the key),
+    the bucket is drained and the request is queued again instead of returning an empty payload.
+    When the retries run out the rate-limit note is returned, or with `raise_if_limited`
+    ProviderThrottledError is raised so provider failover counts it against the circuit.
+    """
+    limiter = get_alpha_vantage_limiter()
+    data: Dict[str, Any] = {}
+    for attempt in range(settings.ALPHA_VANTAGE_RATE_LIMIT_RETRIES + 1):
+        limiter.acquire(priority, timeout=settings.ALPHA_VANTAGE_MAX_QUEUE_WAIT)
+        response = get_http_client().get(base_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        if not is_rate_limited(data):
+            return data
+
+        print(f"Alpha Vantage rate limit hit for {params.get('function')} (attempt {attempt + 1}), re-queueing")
+        limiter.drain()
+    if raise_if_limited:
+        raise ProviderThrottledError(data.get("Information") or data.get("Note") or "Alpha Vantage rate limit reached")
+    return data
@@ -0,0 +1,290 @@
+"""Local append-only columnar store of daily OHLCV bars, memory-mapped per symbol."""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from stock_market_agent.config import settings
+
+# (date, open, high, low, close, adj_close, volume)
+Bar = Tuple[date, float, float, float, float, float, int]
+
+# Fetches the bars in [start, end) for a symbol
+BarFetcher = Callable[[str, date, date], List[Bar]]
+
+# Bumped whenever the meaning of the stored columns changes. 2: `close` holds the
+# split and dividend adjusted close, as yfinance's auto_adjust gives it
+LAYOUT_VERSION = 2
+
+# Column name -> on-disk dtype, in the order of the fields of `Bar`
+COLUMNS: Dict[str, np.dtype] = {
+    "date": np.dtype("datetime64[D]"),
+    "open": np.dtype("float64"),
+    "high": np.dtype("float64"),
+    "low": np.dtype("float64"),
+    "close": np.dtype("float64"),
+    "adj_close": np.dtype("float64"),
+    "volume": np.dtype("int64"),
+}
+
+
+class BarStore:
+    """
+    Keeps every daily bar ever fetched for a symbol and only asks the provider for the
+    bars after the last day it has already checked.
+
+    Each symbol is a directory holding one raw native-endian file per column
+    (`date.bin`, `open.bin`, ...). New bars are appended to every column file and the
+    files are memory-mapped read-only, so reading any window is a zero-copy slice.
+    `meta.json` holds the committed row count, the first covered day and the exclusive
+    end date up to which the provider has answered, so weekends and holidays do not
+    trigger a refetch and a crash half way through an append is never visible to readers.
+    It also records the column layout and its version; a store written with a different
+    layout is treated as empty and fetched again.
+    """
+
+    def __init__(self, store_dir: str = settings.BAR_STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # symbol -> (rows mapped, column name -> read-only memmap)
+        self._maps: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {}
+
+    def read(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """Return read-only views of the stored columns for the bars in [start, end)."""
+        rows = self.load_meta(symbol).get("rows") or 0
+        columns = self._open_columns(symbol, rows)
+        dates = columns["date"]
+        lo = int(np.searchsorted(dates, np.datetime64(start, "D"), side="left")) if start is not None else 0
+        hi = int(np.searchsorted(dates, np.datetime64(end, "D"), side="left")) if end is not None else len(dates)
+        return {name: column[lo:hi] for name, column in columns.items()}
+
+    def load_meta(self, symbol: str) -> Dict[str, Optional[str]]:
+        try:
+            with open(self._meta_path(symbol), "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if not meta or meta.get("columns") != list(COLUMNS) or meta.get("layout") != LAYOUT_VERSION:
+            return {"rows": 0, "first_date": None, "last_date": None, "fetched_until": None}
+        return meta
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        value = self.load_meta(symbol).get("last_date")
+        return date.fromisoformat(value) if value else None
+
+    def update(self, symbol: str, start: date, end: date, fetch: BarFetcher) -> int:
+        """
+        Make sure the store covers [start, end) and return the number of bars fetched.
+        Only the missing ranges are requested: the tail after the last checked day and,
+        for a longer lookback than the stored history, the head before the first one.
+
+        Only an exception from `fetch` is a failure. The tail counts as checked up to the
+        last bar returned; an answer without bars (a weekday market holiday) checks it up
+        to the day before `end`, which stays open in case its bar is published late. An
+        empty head means the provider has nothing before the stored bars. When the store
+        already holds bars, a failed head or tail fetch is logged and the stored bars keep
+        being served. An empty first fetch saves nothing.
+        """
+        with self._lock_for(symbol):
+            meta = self.load_meta(symbol)
+            first_date = date.fromisoformat(meta["first_date"]) if meta.get("first_date") else None
+            fetched_until = date.fromisoformat(meta["fetched_until"]) if meta.get("fetched_until") else None
+
+            if first_date is None or fetched_until is None:
+                # Empty store: fetch the whole range once
+                bars = self._fetch(symbol, start, end, fetch)
+                if bars:
+                    self._rewrite(symbol, self._merge([], bars), start, self._checked_until(bars, start))
+                return len(bars)
+
+            fetched = 0
+            if start < first_date:
+                # Longer lookback than we have: backfill the head only
+                try:
+                    head = self._fetch(symbol, start, first_date, fetch)
+                except Exception as e:
+                    print(f"Keeping the stored {symbol} bars, fetching the bars before {first_date} failed: {e}")
+                    head = None
+                if head:
+                    self._rewrite(symbol, self._merge(self._stored_bars(symbol), head), start, fetched_until)
+                    meta = self.load_meta(symbol)
+                    fetched += len(head)
+                elif head is not None:
+                    meta["first_date"] = start.isoformat()
+                    self._write_meta(symbol, meta)
+
+            if fetched_until >= end:
+                return fetched
+
+            try:
+                bars = self._fetch(symbol, fetched_until, end, fetch)
+            except Exception as e:
+                print(f"Keeping the stored {symbol} bars, fetching the bars from {fetched_until} failed: {e}")
+                return fetched
+            if bars:
+                self._append(symbol, bars, meta, max(fetched_until, self._checked_until(bars, fetched_until)))
+            elif _has_weekdays(fetched_until, end):
+                # A holiday: checked up to the last day, which is asked for again
+                self._append(symbol, [], meta, max(fetched_until, end - timedelta(days=1)))
+            else:
+                # Nothing but a weekend since the last check
+                self._append(symbol, [], meta, end)
+            return fetched + len(bars)
+
+    @staticmethod
+    def _fetch(symbol: str, start: date, end: date, fetch: BarFetcher) -> List[Bar]:
+        """Weekend-only ranges are not sent to the provider. Returns [] when no bars came back."""
+        if not _has_weekdays(start, end):
+            return []
+        bars = fetch(symbol, start, end)
+        if not bars:
+            print(f"No {symbol} bars from {start} to {end}")
+        return list(bars)
+
+    @staticmethod
+    def _checked_until(bars: List[Bar], start: date) -> date:
+        """Exclusive end of the range the provider answered: the day after its last bar."""
+        return max(bar[0] for bar in bars) + timedelta(days=1) if bars else start
+
+    def _append(self, symbol: str, bars: List[Bar], meta: Dict[str, Optional[str]], fetched_until: date):
+        last = date.fromisoformat(meta["last_date"]) if meta.get("last_date") else None
+        new_bars = sorted((bar for bar in bars if last is None or bar[0] > last), key=lambda bar: bar[0])
+        rows = meta.get("rows") or 0
+        if new_bars:
+            arrays = self._to_columns(new_bars)
+            for name, dtype in COLUMNS.items():
+                path = self._column_path(symbol, name)
+                with open(path, "ab") as f:
+                    # Drop bytes left behind by an append that never reached meta.json
+                    f.truncate(rows * dtype.itemsize)
+                    f.write(arrays[name].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            rows += len(new_bars)
+            meta["last_date"] = new_bars[-1][0].isoformat()
+        meta["rows"] = rows
+        meta["fetched_until"] = fetched_until.isoformat()
+        self._write_meta(symbol, meta)
+
+    def _rewrite(self, symbol: str, bars: List[Bar], covered_from: date, fetched_until: date):
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+        arrays = self._to_columns(bars)
+        for name in COLUMNS:
+            self._atomic_write(self._column_path(symbol, name), arrays[name].tobytes())
+        first = min(bars[0][0], covered_from) if bars else covered_from
+        self._write_meta(symbol, {
+            "rows": len(bars),
+            "first_date": first.isoformat(),
+            "last_date": bars[-1][0].isoformat() if bars else None,
+            "fetched_until": fetched_until.isoformat(),
+        })
+        # Existing maps point at the replaced files
+        self._maps.pop(self._file_stem(symbol), None)
+
+    def _stored_bars(self, symbol: str) -> List[Bar]:
+        columns = self.read(symbol)
+        return [
+            (day.astype(object), float(o), float(h), float(l), float(c), float(a), int(v))
+            for day, o, h, l, c, a, v in zip(
+                columns["date"], columns["open"], columns["high"], columns["low"],
+                columns["close"], columns["adj_close"], columns["volume"],
+            )
+        ]
+
+    def _open_columns(self, symbol: str, rows: int) -> Dict[str, np.ndarray]:
+        key = self._file_stem(symbol)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+
+        if rows == 0:
+            columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        else:
+            columns = {
+                name: np.memmap(self._column_path(symbol, name), dtype=dtype, mode="r", shape=(rows,))
+                for name, dtype in COLUMNS.items()
+            }
+        self._maps[key] = (rows, columns)
+        return columns
+
+    @staticmethod
+    def _to_columns(bars: List[Bar]) -> Dict[str, np.ndarray]:
+        fields = list(zip(*bars)) if bars else [()] * len(COLUMNS)
+        return {
+            name: np.asarray(values, dtype=dtype) if name != "date"
+            else np.array([np.datetime64(day, "D") for day in values], dtype=dtype)
+            for (name, dtype), values in zip(COLUMNS.items(), fields)
+        }
+
+    @staticmethod
+    def _merge(existing: List[Bar], fetched: List[Bar]) -> List[Bar]:
+        by_date = {bar[0]: bar for bar in existing}
+        by_date.update({bar[0]: bar for bar in fetched})
+        return [by_date[day] for day in sorted(by_date)]
+
+    def _write_meta(self, symbol: str, meta: Dict[str, Optional[str]]):
+        meta["columns"] = list(COLUMNS)
+        meta["layout"] = LAYOUT_VERSION
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+        self._atomic_write(self._meta_path(symbol), json.dumps(meta).encode("utf-8"))
+
+    @staticmethod
+    def _atomic_write(path: str, payload: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _file_stem(self, symbol: str) -> str:
+        # Symbols such as RELIANCE.BSE or BRK/B must map to a safe directory name
+        return re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper().strip())
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.store_dir, self._file_stem(symbol))
+
+    def _column_path(self, symbol: str, column: str) -> str:
+        return os.path.join(self._symbol_dir(symbol), f"{column}.bin")
+
+    def _meta_path(self, symbol: str) -> str:
+        return os.path.join(self._symbol_dir(symbol), "meta.json")
+
+    def _lock_for(self, symbol: str) -> threading.Lock:
+        key = self._file_stem(symbol)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+
+def _has_weekdays(start: date, end: date) -> bool:
+    """Whether [start, end) holds a weekday, i.e. a day that may have a daily bar."""
+    return start < end and int(np.busday_count(start, end)) > 0
+
+
+_store: Optional[BarStore] = None
+_store_lock = threading.Lock()
+
+
+def get_bar_store() -> BarStore:
+    """Return the shared bar store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BarStore()
+    return _store
@@ -0,0 +1,76 @@
+"""Attribute free text (news articles) to tickers by company names and aliases."""
+
+import re
+from typing import Dict, Iterable, List, Set, Union
+
+# Legal suffixes dropped to derive the short name ("Apple Inc." -> "Apple")
+_LEGAL_SUFFIXES = re.compile(
+    r"[\s,]+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|ag|sa|nv|se|holdings?|group)\.?$",
+    re.IGNORECASE,
+)
+
+
+def company_aliases(name: str) -> List[str]:
+    """The name itself plus the name without trailing legal suffixes."""
+    aliases = [name.strip()]
+    short = name.strip()
+    while True:
+        stripped = _LEGAL_SUFFIXES.sub("", short).strip()
+        if stripped == short or not stripped:
+            break
+        short = stripped
+        aliases.append(short)
+    return aliases
+
+
+class CompanyMatcher:
+    """
+    One compiled regex over every alias of every company, so attributing an article is a
+    single scan of its text regardless of how many companies are watched.
+
+    Names and aliases match case-insensitively on word boundaries. Ticker symbols only
+    match as cashtags ("$AAPL") or, when at least three characters long, as the exact
+    upper-case word, so tickers such as "A" or "IT" do not match ordinary words.
+    """
+
+    def __init__(self, companies: Dict[str, Union[str, Iterable[str]]]):
+        # normalized alias -> tickers it stands for
+        self._aliases: Dict[str, Set[str]] = {}
+        self._symbols: Dict[str, Set[str]] = {}
+        for ticker, names in companies.items():
+            names = [names] if isinstance(names, str) else list(names)
+            for name in names:
+                for alias in company_aliases(name):
+                    if len(alias) >= 2:
+                        self._aliases.setdefault(alias.lower(), set()).add(ticker)
+            # RELIANCE.BSE is written as RELIANCE in articles
+            base = ticker.split(".")[0].upper()
+            self._symbols.setdefault(base, set()).add(ticker)
+
+        alternatives = [
+            re.escape(alias).replace(r"\ ", r"\s+")
+            for alias in sorted(self._aliases, key=len, reverse=True)
+        ]
+        symbol_alternatives = [
+            rf"\$(?-i:{re.escape(symbol)})|(?-i:{re.escape(symbol)})" if len(symbol) >= 3 else rf"\$(?-i:{re.escape(symbol)})"
+            for symbol in sorted(self._symbols, key=len, reverse=True)
+        ]
+        # An alternation that never matches keeps both groups defined when one side is empty
+        alias_pattern = "|".join(alternatives) or r"(?!x)x"
+        symbol_pattern = "|".join(symbol_alternatives) or r"(?!x)x"
+        self._pattern = re.compile(
+            rf"(?<![\w$])(?:(?P<alias>{alias_pattern})|(?P<symbol>{symbol_pattern}))(?!\w)",
+            re.IGNORECASE,
+        )
+
+    def match(self, text: str) -> Set[str]:
+        """Tickers mentioned in `text`."""
+        if not text:
+            return set()
+        tickers: Set[str] = set()
+        for found in self._pattern.finditer(text):
+            if found.group("alias") is not None:
+                tickers |= self._aliases[re.sub(r"\s+", " ", found.group("alias").lower())]
+            else:
+                tickers |= self._symbols[found.group("symbol").lstrip("$").upper()]
+        return tickers
@@ -0,0 +1,300 @@
+"""Provider failover: per-provider circuit breakers, latency percentiles and hedged requests."""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.rate_limiter import queued_seconds
+
+# (provider name, zero-argument call), in order of preference
+Source = Tuple[str, Callable[[], Any]]
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class InvalidResponseError(ValueError):
+    pass
+
+
+class ProviderThrottledError(RuntimeError):
+    """The provider turned the call down because a quota or rate limit was exceeded."""
+
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # yfinance before 0.2.52 reports throttling as an HTTP error
+    YFRateLimitError = ProviderThrottledError
+
+# Failures that say the provider itself is unwell and count against its circuit: transport
+# errors and timeouts (OSError covers requests, curl_cffi and socket errors, TimeoutError
+# and RateLimitTimeout) and throttling. Anything else, such as an unknown symbol or an
+# empty answer, still hands over to the next provider but leaves the circuit closed, so
+# a few lookups of a bad symbol cannot shut a provider off for every user.
+PROVIDER_FAILURES = (OSError, ProviderThrottledError, YFRateLimitError)
+
+
+class AllProvidersFailedError(RuntimeError):
+    def __init__(self, errors: Dict[str, BaseException]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"All providers failed ({details})" if details else "No provider available")
+
+
+class LatencyTracker:
+    """Latencies of the last `window` answered calls, for percentile estimates."""
+
+    def __init__(self, window: int = settings.LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        return float(np.percentile(samples, q)) if samples else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return {"samples": 0, "p50": None, "p95": None, "p99": None}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {"samples": len(samples), "p50": round(float(p50), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4)}
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. It then lets one trial call through (half open): a success
+    closes the circuit again, a failure re-opens it for another timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.CIRCUIT_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may be sent now. Must be followed by record_success or record_failure."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._trips += 1
+                    print(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Hand back a call allowed by `allow` that was never sent."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._state, "consecutive_failures": self._failures, "trips": self._trips}
+
+
+class ProviderHealth:
+    """Circuit breaker, latency window and call counters of one provider."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "failures": 0, "unusable": 0, "rejected": 0, "hedges": 0, "wins": 0}
+
+    def hedge_delay(self) -> float:
+        """The primary's p95 once enough samples exist, the configured default before that."""
+        if len(self.latency) < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_DEFAULT_DELAY
+        return self.latency.percentile(95)
+
+    def record(self, name: str):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics.update(self.breaker.stats())
+        metrics["latency"] = self.latency.stats()
+        return metrics
+
+
+_health: Dict[str, ProviderHealth] = {}
+_health_lock = threading.Lock()
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def get_provider_health(name: str) -> ProviderHealth:
+    with _health_lock:
+        if name not in _health:
+            _health[name] = ProviderHealth(name)
+        return _health[name]
+
+
+def failover_stats() -> Dict[str, Dict[str, Any]]:
+    with _health_lock:
+        providers = list(_health.values())
+    return {health.name: health.stats() for health in providers}
+
+
+def _get_executor(name: str) -> ThreadPoolExecutor:
+    """
+    Each provider has its own workers, so calls piling up behind one provider (e.g.
+    Alpha Vantage calls queued for rate-limit tokens) never delay a hedge to another.
+    """
+    with _executor_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=settings.HEDGE_MAX_WORKERS, thread_name_prefix=f"failover-{name}")
+        return _executors[name]
+
+
+def _timed_call(health: ProviderHealth, fn: Callable[[], Any], is_valid: Optional[Callable[[Any], bool]]) -> Any:
+    health.record("calls")
+    started = time.monotonic()
+    # Time spent queued for rate-limit tokens is not the provider's latency
+    queued = queued_seconds()
+
+    def answered():
+        health.breaker.record_success()
+        health.latency.record(time.monotonic() - started - (queued_seconds() - queued))
+
+    try:
+        value = fn()
+    except PROVIDER_FAILURES:
+        health.record("failures")
+        health.breaker.record_failure()
+        raise
+    except Exception:
+        # The provider answered, just not with anything usable for this request
+        health.record("unusable")
+        answered()
+        raise
+    answered()
+    if is_valid is not None and not is_valid(value):
+        health.record("unusable")
+        raise InvalidResponseError(f"{health.name} returned an unusable response")
+    return value
+
+
+def call_with_failover(
+    sources: Sequence[Source],
+    is_valid: Optional[Callable[[Any], bool]] = None,
+    hedge: bool = True,
+) -> Any:
+    """
+    Return the first valid answer from `sources`, tried in order of preference.
+
+    A provider whose circuit is open is skipped. A provider that fails (exception or a
+    response rejected by `is_valid`) hands over to the next one immediately; only the
+    PROVIDER_FAILURES count against its circuit. When `hedge` is set, a provider that is
+    still running after its own p95 latency gets the next one started in parallel, so
+    the tail is bounded by the faster of the two. A slower call already running is left
+    to finish in the background so its latency is still recorded; one still waiting for
+    a worker is cancelled.
+    """
+    remaining = list(sources)
+    errors: Dict[str, BaseException] = {}
+    # future -> (provider health, time after which the next source is hedged in)
+    pending: Dict[Future, Tuple[ProviderHealth, float]] = {}
+
+    def launch_next(as_hedge: bool) -> bool:
+        while remaining:
+            name, fn = remaining.pop(0)
+            health = get_provider_health(name)
+            if not health.breaker.allow():
+                health.record("rejected")
+                errors[name] = CircuitOpenError(f"circuit for {name} is open")
+                continue
+            if as_hedge:
+                health.record("hedges")
+            future = _get_executor(name).submit(_timed_call, health, fn, is_valid)
+            pending[future] = (health, time.monotonic() + health.hedge_delay())
+            return True
+        return False
+
+    launch_next(as_hedge=False)
+    while pending:
+        timeout = None
+        if hedge and remaining:
+            timeout = max(0.0, min(deadline for _, deadline in pending.values()) - time.monotonic())
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            launch_next(as_hedge=True)
+            continue
+
+        for future in done:
+            health, _ = pending.pop(future)
+            try:
+                value = future.result()
+            except Exception as e:
+                errors[health.name] = e
+                continue
+            health.record("wins")
+            for loser, (loser_health, _) in pending.items():
+                if loser.cancel():
+                    loser_health.breaker.release()
+            return value
+
+        if not pending:
+            launch_next(as_hedge=False)
+
+    raise AllProvidersFailedError(errors)
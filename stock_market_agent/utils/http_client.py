@@ -0,0 +1,118 @@
+"""Process wide HTTP client shared by the Alpha Vantage and NewsAPI tools."""
+
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from stock_market_agent.config import settings
+
+
+class ProviderHttpClient:
+    """
+    Thin wrapper around a pooled ``requests.Session``.
+
+    Connections are kept alive and reused across tool calls, so repeated calls to the
+    same provider only pay for the TCP/TLS handshake once per pooled connection.
+    Connection errors, read timeouts and 5xx responses are retried with exponential backoff.
+    """
+
+    RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_connections: int = settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = settings.HTTP_POOL_MAXSIZE,
+        max_retries: int = settings.HTTP_MAX_RETRIES,
+        backoff_factor: float = settings.HTTP_BACKOFF_FACTOR,
+        timeout: float = settings.HTTP_TIMEOUT,
+    ):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "failures": 0, "retries": 0}
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=False,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.get(url, params=params, **kwargs)
+        except requests.exceptions.RequestException:
+            self._increment("requests")
+            self._increment("failures")
+            raise
+
+        self._increment("requests")
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            self._increment("retries", len(retries.history))
+        if response.status_code >= 500:
+            self._increment("failures")
+        return response
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        return self.get(url, params=params, **kwargs).json()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters and per-host connection pool usage."""
+        pools = {}
+        pool_manager = self._adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            # The pool queue is pre-filled with None placeholders for unopened slots
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+            pools[f"{pool.scheme}://{pool.host}"] = {
+                "connections_opened": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "connections_reused": max(pool.num_requests - pool.num_connections, 0),
+                "idle_connections": idle,
+                "max_size": pool.pool.maxsize if pool.pool is not None else 0,
+            }
+
+        with self._lock:
+            counters = dict(self._counters)
+        counters["pools"] = pools
+        return counters
+
+    def close(self):
+        self.session.close()
+
+    def _increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+
+_client: Optional[ProviderHttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> ProviderHttpClient:
+    """Return the shared provider client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ProviderHttpClient()
+    return _client
@@ -0,0 +1,229 @@
+"""Near-duplicate news detection with MinHash signatures and an LSH band index."""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.sentiment_cache import article_key, article_text
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = settings.NEWS_DEDUP_SHINGLE_SIZE) -> Set[str]:
+    """Lower-cased word n-grams of `text` (the whole text when it is shorter than `size` words)."""
+    tokens = _TOKEN.findall((text or "").lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class _Entry:
+    __slots__ = ("cluster", "signature", "bands")
+
+    def __init__(self, cluster: str, signature: np.ndarray, bands: List[int]):
+        self.cluster = cluster
+        self.signature = signature
+        self.bands = bands
+
+
+class NewsDedupIndex:
+    """
+    Groups syndicated copies of a story into clusters so each is scored and reported once.
+
+    Every article gets a `num_perm` MinHash signature over its word shingles, split into
+    `bands` LSH bands. Articles sharing a band bucket are candidates, and a candidate
+    whose estimated Jaccard similarity reaches `threshold` joins its cluster; otherwise
+    the article starts a new one. Entries are keyed like the sentiment cache (URL plus
+    publishedAt), so an article seen in an earlier response is resolved by one lookup
+    without hashing its text again.
+
+    Entries are appended to a JSON-lines log, reloaded on start and compacted to the
+    newest `max_entries` once the log holds twice that many lines.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.NEWS_DEDUP_PATH,
+        max_entries: int = settings.NEWS_DEDUP_MAX_ENTRIES,
+        num_perm: int = settings.NEWS_DEDUP_NUM_PERM,
+        bands: int = settings.NEWS_DEDUP_BANDS,
+        threshold: float = settings.NEWS_DEDUP_THRESHOLD,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.path = path
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        # Fixed seed: signatures must stay comparable with the ones persisted by earlier runs
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # (band number, band hash) -> keys of the entries in that bucket
+        self._buckets: Dict[tuple, Set[str]] = {}
+        self._log_lines = 0
+        self._metrics = {"articles": 0, "known": 0, "hashed": 0, "duplicates": 0}
+        self._load()
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles(text)], dtype=np.uint64)
+        if not hashes.size:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # One row per shingle, one column per permutation; uint64 products wrap deterministically
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def collapse(self, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return {"articles", "sizes", "duplicates"}: the first article of every cluster in
+        response order, how many articles of this response each of them stands for, and
+        how many articles were dropped as duplicates.
+        """
+        representatives: List[Dict[str, Any]] = []
+        # cluster id -> position in representatives
+        clusters: Dict[str, int] = {}
+        sizes: List[int] = []
+        known = 0
+        for article in articles:
+            key = article_key(article)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    known += 1
+            if entry is None:
+                entry = self._add(key, self.signature(article_text(article)))
+
+            if entry.cluster not in clusters:
+                clusters[entry.cluster] = len(representatives)
+                representatives.append(article)
+                sizes.append(0)
+            sizes[clusters[entry.cluster]] += 1
+
+        duplicates = len(articles) - len(representatives)
+        with self._lock:
+            self._metrics["articles"] += len(articles)
+            self._metrics["known"] += known
+            self._metrics["hashed"] += len(articles) - known
+            self._metrics["duplicates"] += duplicates
+        return {"articles": representatives, "sizes": sizes, "duplicates": duplicates}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["entries"] = len(self._entries)
+        metrics["duplicate_rate"] = round(metrics["duplicates"] / metrics["articles"], 4) if metrics["articles"] else 0.0
+        return metrics
+
+    def _band_hashes(self, signature: np.ndarray) -> List[int]:
+        rows = signature.reshape(self.bands, -1)
+        return [zlib.crc32(row.tobytes()) for row in rows]
+
+    def _add(self, key: str, signature: np.ndarray) -> _Entry:
+        bands = self._band_hashes(signature)
+        # Articles without any text all get the same signature but are not the same story
+        textless = bool(np.all(signature == _MAX_HASH))
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, band_hash in enumerate(bands if not textless else []):
+                candidates |= self._buckets.get((band, band_hash), set())
+            cluster = key
+            best = self.threshold
+            for candidate in candidates:
+                similarity = float(np.mean(self._entries[candidate].signature == signature))
+                if similarity >= best:
+                    cluster, best = self._entries[candidate].cluster, similarity
+            entry = self._insert_locked(key, _Entry(cluster, signature, bands))
+            self._append_locked(key, entry)
+            return entry
+
+    def _insert_locked(self, key: str, entry: _Entry) -> _Entry:
+        if key in self._entries:
+            self._remove_locked(key)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        for band, band_hash in enumerate(entry.bands):
+            self._buckets.setdefault((band, band_hash), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove_locked(next(iter(self._entries)))
+        return entry
+
+    def _remove_locked(self, key: str):
+        entry = self._entries.pop(key)
+        for band, band_hash in enumerate(entry.bands):
+            bucket = self._buckets.get((band, band_hash))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[(band, band_hash)]
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        signature = np.frombuffer(bytes.fromhex(record["s"]), dtype=np.uint32).astype(np.uint64)
+                    except (ValueError, KeyError):
+                        # Torn last line after a crash
+                        continue
+                    if signature.size != self.num_perm:
+                        # Written with another num_perm, not comparable
+                        continue
+                    self._insert_locked(record["k"], _Entry(record["c"], signature, self._band_hashes(signature)))
+                    self._log_lines += 1
+        except OSError:
+            pass
+
+    def _append_locked(self, key: str, entry: _Entry):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self._log_lines + 1 > 2 * self.max_entries:
+            self._compact_locked()
+            return
+        with open(self.path, "a") as f:
+            f.write(self._line(key, entry))
+        self._log_lines += 1
+
+    def _compact_locked(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.writelines(self._line(key, entry) for key, entry in self._entries.items())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._log_lines = len(self._entries)
+
+    @staticmethod
+    def _line(key: str, entry: _Entry) -> str:
+        # MinHash values fit in 32 bits, which halves the log
+        return json.dumps({"k": key, "c": entry.cluster, "s": entry.signature.astype(np.uint32).tobytes().hex()}) + "\n"
+
+
+_index: Optional[NewsDedupIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_news_dedup_index() -> NewsDedupIndex:
+    """Return the shared near-duplicate index, creating it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NewsDedupIndex()
+    return _index
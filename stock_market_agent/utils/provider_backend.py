@@ -0,0 +1,203 @@
+"""Live, record and replay backends for the market data providers."""
+
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from langchain_core.runnables import RunnableConfig, ensure_config
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.bar_store import Bar
+
+ProviderMode = Literal["live", "record", "replay"]
+PROVIDER_MODES = ("live", "record", "replay")
+
+
+class FixtureNotFoundError(LookupError):
+    """Raised in replay mode when no response was recorded for the request."""
+
+
+class FixtureStore:
+    """
+    Recorded provider responses, one JSON file per (provider, endpoint, symbol) under
+    `<fixture_dir>/<provider>/<endpoint>/<SYMBOL>.json`.
+
+    Daily bars are stored the same way under the "history" endpoint, but recordings are
+    merged by date so several runs build up one continuous series per symbol.
+    """
+
+    def __init__(self, fixture_dir: str = settings.FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+        # Serializes the read-merge-write of bar recordings
+        self._bars_lock = threading.Lock()
+        self._metrics = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    def load(self, provider: str, endpoint: str, symbol: str) -> Any:
+        path = self._path(provider, endpoint, symbol)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._record("misses")
+            raise FixtureNotFoundError(f"No {provider} {endpoint} fixture recorded for {symbol}")
+        self._record("replayed")
+        return entry["value"]
+
+    def save(self, provider: str, endpoint: str, symbol: str, value: Any):
+        entry = {
+            "provider": provider,
+            "endpoint": endpoint,
+            "symbol": symbol,
+            "recorded_at": time.time(),
+            "value": value,
+        }
+        self._atomic_write(self._path(provider, endpoint, symbol), json.dumps(entry, default=str))
+        self._record("recorded")
+
+    def load_bars(self, provider: str, symbol: str) -> List[Bar]:
+        rows = self.load(provider, "history", symbol)
+        return [(date.fromisoformat(row[0]), *row[1:]) for row in rows]
+
+    def save_bars(self, provider: str, symbol: str, bars: List[Bar]):
+        with self._bars_lock:
+            try:
+                existing = {row[0]: row for row in self._read_value(provider, "history", symbol)}
+            except (OSError, ValueError, KeyError):
+                existing = {}
+            existing.update({bar[0].isoformat(): [bar[0].isoformat(), *bar[1:]] for bar in bars})
+            self.save(provider, "history", symbol, [existing[day] for day in sorted(existing)])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def _read_value(self, provider: str, endpoint: str, symbol: str) -> Any:
+        with open(self._path(provider, endpoint, symbol), "r") as f:
+            return json.load(f)["value"]
+
+    def _path(self, provider: str, endpoint: str, symbol: str) -> str:
+        # Symbols such as RELIANCE.BSE or BRK/B must map to a safe file name
+        stem = re.sub(r"[^A-Za-z0-9._-]", "_", (symbol or "").upper().strip()) or "_"
+        return os.path.join(self.fixture_dir, provider, endpoint, f"{stem}.json")
+
+    @staticmethod
+    def _atomic_write(path: str, payload: str):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _record(self, name: str):
+        with self._lock:
+            self._metrics[name] += 1
+
+
+class ProviderBackend:
+    """
+    Decides where a provider response comes from for one run.
+
+    live   - `fetch` is called as usual (response cache, rate limiter, network).
+    record - like live, and the response is also written to the fixture store.
+    replay - the recorded response is returned after the injected latency; the network
+             and the response cache are never touched.
+    """
+
+    def __init__(
+        self,
+        mode: ProviderMode = "live",
+        fixtures: Optional[FixtureStore] = None,
+        latency_ms: float = settings.REPLAY_LATENCY_MS,
+        jitter_ms: float = settings.REPLAY_LATENCY_JITTER_MS,
+    ):
+        if mode not in PROVIDER_MODES:
+            raise ValueError(f"Unknown provider mode {mode!r}, expected one of {PROVIDER_MODES}")
+        self.mode = mode
+        self.fixtures = fixtures or get_fixture_store()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    @property
+    def is_replay(self) -> bool:
+        return self.mode == "replay"
+
+    def fetch(
+        self,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        fetch: Callable[[], Any],
+        recordable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the response for one request. `recordable` keeps errors and rate-limit notes out of the fixtures."""
+        if self.mode == "replay":
+            self._sleep()
+            return self.fixtures.load(provider, endpoint, symbol)
+
+        value = fetch()
+        if value is not None and (recordable is None or recordable(value)):
+            self.record(provider, endpoint, symbol, value)
+        return value
+
+    def record(self, provider: str, endpoint: str, symbol: str, value: Any):
+        """Write a response fetched outside `fetch` (e.g. one symbol of a batch) when recording."""
+        if self.mode == "record":
+            self.fixtures.save(provider, endpoint, symbol, value)
+
+    def replay_bars(self, provider: str, symbol: str) -> List[Bar]:
+        self._sleep()
+        return self.fixtures.load_bars(provider, symbol)
+
+    def record_bars(self, provider: str, symbol: str, bars: List[Bar]):
+        if self.mode == "record" and bars:
+            self.fixtures.save_bars(provider, symbol, bars)
+
+    def _sleep(self):
+        delay_ms = random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+
+_fixtures: Optional[FixtureStore] = None
+_fixtures_lock = threading.Lock()
+
+
+def get_fixture_store() -> FixtureStore:
+    """Return the shared fixture store, creating it on first use."""
+    global _fixtures
+    if _fixtures is None:
+        with _fixtures_lock:
+            if _fixtures is None:
+                _fixtures = FixtureStore()
+    return _fixtures
+
+
+def get_provider_backend(config: Optional[RunnableConfig] = None, state: Optional[dict] = None) -> ProviderBackend:
+    """
+    Build the backend for the current run. The mode and replay latency come from
+    `config["configurable"]` (inside a graph run the node's config is picked up
+    automatically), then from the legacy `dry_run` state flag, which maps to replay,
+    then from the PROVIDER_MODE setting.
+    """
+    configurable = ensure_config(config).get("configurable") or {}
+    mode = configurable.get("provider_mode")
+    if mode is None and state and state.get("dry_run"):
+        mode = "replay"
+    return ProviderBackend(
+        mode=mode or settings.PROVIDER_MODE,
+        latency_ms=float(configurable.get("replay_latency_ms", settings.REPLAY_LATENCY_MS)),
+        jitter_ms=float(configurable.get("replay_latency_jitter_ms", settings.REPLAY_LATENCY_JITTER_MS)),
+    )
@@ -0,0 +1,148 @@
+"""Token bucket rate limiter with priority queueing, shared by every provider call in the process."""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from stock_market_agent.config import settings
+
+# Lower value is served first
+PRIORITIES = {
+    "interactive": 0,
+    "default": 1,
+    "background": 2,
+}
+
+
+class RateLimitTimeout(TimeoutError):
+    pass
+
+
+# Seconds each thread has spent queued for tokens, so callers timing a provider call can leave it out
+_waits = threading.local()
+
+
+def queued_seconds() -> float:
+    """Total time the calling thread has waited for tokens so far, across every limiter."""
+    return getattr(_waits, "total", 0.0)
+
+
+class TokenBucketRateLimiter:
+    """
+    Classic token bucket: `rate_per_minute` tokens are added continuously up to `burst`.
+
+    Callers that cannot get a token immediately queue up and are served strictly by
+    priority class, then in arrival order, so an interactive quote never waits behind
+    a backlog of background refreshes.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None, name: str = "provider"):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.name = name
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._metrics = {
+            priority: {"acquired": 0, "timeouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for priority in PRIORITIES
+        }
+
+    def acquire(self, priority: str = "default", timeout: Optional[float] = None) -> float:
+        """
+        Block until a token is available and return the time spent waiting in seconds.
+        Raises RateLimitTimeout if `timeout` elapses first.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Expected one of {list(PRIORITIES)}")
+
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        ticket = (PRIORITIES[priority], next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._queue[0] == ticket and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+
+                    # Time until the next token, or until someone ahead of us is served
+                    wait = max((1 - self._tokens) / self.rate_per_second, 0.001)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._metrics[priority]["timeouts"] += 1
+                            raise RateLimitTimeout(
+                                f"Timed out after {timeout}s waiting for a {self.name} rate limit token"
+                            )
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            metrics = self._metrics[priority]
+            metrics["acquired"] += 1
+            metrics["total_wait"] += waited
+            metrics["max_wait"] = max(metrics["max_wait"], waited)
+        _waits.total = queued_seconds() + waited
+        return waited
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reported that the quota is exhausted."""
+        with self._cond:
+            self._refill()
+            self._tokens = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            per_priority = {}
+            for priority, metrics in self._metrics.items():
+                per_priority[priority] = dict(metrics)
+                acquired = metrics["acquired"]
+                per_priority[priority]["avg_wait"] = metrics["total_wait"] / acquired if acquired else 0.0
+            return {
+                "name": self.name,
+                "rate_per_minute": self.rate_per_second * 60,
+                "capacity": self.capacity,
+                "available_tokens": round(self._tokens, 3),
+                "queued": len(self._queue),
+                "priorities": per_priority,
+            }
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+
+
+_alpha_vantage_limiter: Optional[TokenBucketRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_alpha_vantage_limiter() -> TokenBucketRateLimiter:
+    """Return the limiter guarding the Alpha Vantage quota, creating it on first use."""
+    global _alpha_vantage_limiter
+    if _alpha_vantage_limiter is None:
+        with _limiter_lock:
+            if _alpha_vantage_limiter is None:
+                _alpha_vantage_limiter = TokenBucketRateLimiter(
+                    rate_per_minute=settings.ALPHA_VANTAGE_REQUESTS_PER_MINUTE,
+                    burst=settings.ALPHA_VANTAGE_BURST,
+                    name="alphavantage",
+                )
+    return _alpha_vantage_limiter
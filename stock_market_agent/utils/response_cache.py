@@ -0,0 +1,363 @@
+"""Persistent provider response cache keyed by (provider, endpoint, symbol, params)."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.singleflight import get_singleflight
+
+# Credentials never take part in the cache key and are never written to disk
+_SECRET_PARAMS = {"apikey", "apiKey", "api_key", "token"}
+
+
+def freshness(age: Optional[float] = None, stale: bool = False) -> Dict[str, Any]:
+    """Age metadata for a served value; `age` is None when it is unknown (e.g. replayed fixtures)."""
+    if age is None:
+        return {"age_seconds": None, "as_of": None, "stale": stale}
+    as_of = datetime.fromtimestamp(time.time() - age, tz=timezone.utc)
+    return {"age_seconds": round(age, 1), "as_of": as_of.isoformat(timespec="seconds"), "stale": stale}
+
+
+class ResponseCache:
+    """
+    On-disk cache of provider responses, one JSON file per key.
+
+    Entries expire after a per-endpoint TTL, files are written atomically so concurrent
+    graph runs never read a half written entry, and the least recently used entries are
+    evicted once the cache exceeds `max_entries` or `max_bytes`.
+
+    Endpoints with a stale-while-revalidate window keep serving an expired entry for that
+    long after the TTL, while a single background refresh per key updates it.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = settings.CACHE_DIR,
+        ttls: Optional[Dict[str, float]] = None,
+        swr_windows: Optional[Dict[str, float]] = None,
+        default_ttl: float = settings.CACHE_DEFAULT_TTL,
+        max_entries: int = settings.CACHE_MAX_ENTRIES,
+        max_bytes: int = settings.CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttls = dict(settings.CACHE_TTLS if ttls is None else ttls)
+        self.swr_windows = dict(settings.CACHE_SWR if swr_windows is None else swr_windows)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0,
+            "stale_hits": 0, "refreshes": 0, "refresh_failures": 0,
+        }
+        # Flight keys with a background refresh queued or running
+        self._refreshing: Set[str] = set()
+        # path -> (size in bytes, last access time)
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._total_bytes = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(provider: str, endpoint: str, symbol: str, params: Optional[Dict[str, Any]] = None) -> str:
+        key_params = {k: v for k, v in (params or {}).items() if k not in _SECRET_PARAMS}
+        raw = json.dumps(
+            [provider, endpoint, (symbol or "").upper().strip(), key_params],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def swr_for(self, endpoint: str) -> float:
+        return self.swr_windows.get(endpoint, 0.0)
+
+    def get(
+        self,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        params: Optional[Dict[str, Any]] = None,
+        allow_expired: bool = False,
+    ) -> Optional[Any]:
+        """Return the cached value or None. `allow_expired` ignores the TTL (used for dry runs)."""
+        entry = self.get_entry(provider, endpoint, symbol, params, allow_expired)
+        return entry["value"] if entry is not None else None
+
+    def get_entry(
+        self,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        params: Optional[Dict[str, Any]] = None,
+        allow_expired: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the full cache entry, including `stored_at`, or None."""
+        path = self._path(provider, self.make_key(provider, endpoint, symbol, params))
+        entry = self._read(path)
+        if entry is None:
+            self._record("misses")
+            return None
+
+        age = time.time() - entry.get("stored_at", 0)
+        if not allow_expired and age > self.ttl_for(endpoint):
+            self._record("expired")
+            self._record("misses")
+            return None
+
+        self._touch(path)
+        self._record("hits")
+        return entry
+
+    def set(self, provider: str, endpoint: str, symbol: str, params: Optional[Dict[str, Any]], value: Any):
+        key = self.make_key(provider, endpoint, symbol, params)
+        entry = {
+            "provider": provider,
+            "endpoint": endpoint,
+            "symbol": symbol,
+            "params": {k: v for k, v in (params or {}).items() if k not in _SECRET_PARAMS},
+            "stored_at": time.time(),
+            "value": value,
+        }
+        path = self._path(provider, key)
+        size = self._atomic_write(path, json.dumps(entry, default=str))
+
+        with self._lock:
+            previous = self._index.get(path)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._index[path] = (size, time.time())
+            self._total_bytes += size
+            self._metrics["stores"] += 1
+            self._evict_locked()
+
+    def get_or_fetch(
+        self,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        params: Optional[Dict[str, Any]],
+        fetch: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        allow_expired: bool = False,
+    ) -> Any:
+        """
+        Serve from the cache, or call `fetch` on a miss and store the result.
+        Responses rejected by `cacheable` (errors, rate-limit notes) are returned but not stored.
+        Concurrent misses for the same key are coalesced into a single `fetch` call.
+        """
+        return self.get_or_fetch_entry(provider, endpoint, symbol, params, fetch, cacheable, allow_expired)["value"]
+
+    def get_or_fetch_entry(
+        self,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        params: Optional[Dict[str, Any]],
+        fetch: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        allow_expired: bool = False,
+        refresh: Optional[Callable[[], Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Like `get_or_fetch`, but returns {"value", "age", "stale"} where `age` is the number
+        of seconds since the value was fetched. Within the endpoint's stale-while-revalidate
+        window an expired value is returned with `stale` set and `refresh` (default `fetch`,
+        typically the same call at background priority) runs in the background.
+        """
+        key = self.make_key(provider, endpoint, symbol, params)
+        path = self._path(provider, key)
+        flight_key = f"{provider}:{key}"
+
+        entry = self._read(path)
+        if entry is not None:
+            age = max(0.0, time.time() - entry.get("stored_at", 0))
+            ttl = self.ttl_for(endpoint)
+            if allow_expired or age <= ttl:
+                self._touch(path)
+                self._record("hits")
+                return {"value": entry["value"], "age": age, "stale": False}
+            if age <= ttl + self.swr_for(endpoint):
+                self._touch(path)
+                self._record("hits")
+                self._record("stale_hits")
+                self._schedule_refresh(flight_key, provider, endpoint, symbol, params, refresh or fetch, cacheable)
+                return {"value": entry["value"], "age": age, "stale": True}
+            self._record("expired")
+        self._record("misses")
+
+        value = get_singleflight().do(
+            flight_key,
+            lambda: self._fetch_and_store(provider, endpoint, symbol, params, fetch, cacheable),
+        )
+        return {"value": value, "age": 0.0, "stale": False}
+
+    def invalidate(self, provider: str, endpoint: str, symbol: str, params: Optional[Dict[str, Any]] = None):
+        path = self._path(provider, self.make_key(provider, endpoint, symbol, params))
+        with self._lock:
+            self._remove_locked(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["entries"] = len(self._index)
+            metrics["bytes"] = self._total_bytes
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = round(metrics["hits"] / lookups, 4) if lookups else 0.0
+        return metrics
+
+    def _fetch_and_store(
+        self,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        params: Optional[Dict[str, Any]],
+        fetch: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        fetched = fetch()
+        if fetched is not None and (cacheable is None or cacheable(fetched)):
+            self.set(provider, endpoint, symbol, params, fetched)
+        return fetched
+
+    def _schedule_refresh(
+        self,
+        flight_key: str,
+        provider: str,
+        endpoint: str,
+        symbol: str,
+        params: Optional[Dict[str, Any]],
+        fetch: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]],
+    ):
+        with self._lock:
+            if flight_key in self._refreshing:
+                return
+            self._refreshing.add(flight_key)
+
+        def refresh():
+            try:
+                # Shares the flight with any foreground miss for the same key
+                get_singleflight().do(
+                    flight_key,
+                    lambda: self._fetch_and_store(provider, endpoint, symbol, params, fetch, cacheable),
+                )
+                self._record("refreshes")
+            except Exception as e:
+                print(f"Background refresh of {provider} {endpoint} for {symbol} failed: {e}")
+                self._record("refresh_failures")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(flight_key)
+
+        _get_refresh_executor().submit(refresh)
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _path(self, provider: str, key: str) -> str:
+        return os.path.join(self.cache_dir, provider, f"{key}.json")
+
+    def _atomic_write(self, path: str, payload: str) -> int:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return os.path.getsize(path)
+
+    def _touch(self, path: str):
+        now = time.time()
+        with self._lock:
+            if path in self._index:
+                self._index[path] = (self._index[path][0], now)
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json") or name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                self._index[path] = (stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        if len(self._index) <= self.max_entries and self._total_bytes <= self.max_bytes:
+            return
+        by_last_access = sorted(self._index.items(), key=lambda item: item[1][1])
+        for path, _ in by_last_access:
+            if len(self._index) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                break
+            self._remove_locked(path)
+            self._metrics["evictions"] += 1
+
+    def _remove_locked(self, path: str):
+        size, _ = self._index.pop(path, (0, 0))
+        self._total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _record(self, name: str):
+        with self._lock:
+            self._metrics[name] += 1
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    global _refresh_executor
+    if _refresh_executor is None:
+        with _cache_lock:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(
+                    max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+                )
+    return _refresh_executor
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the shared response cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,187 @@
+"""Per-article sentiment scores, scored once and aggregated incrementally per query."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from stock_market_agent.config import settings
+
+# Maps article texts to their compound scores, in order
+Scorer = Callable[[List[str]], List[float]]
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    """Title, description and content joined, leaving out the ones NewsAPI sent as null or empty."""
+    return " ".join(str(article[field]) for field in ("title", "description", "content") if article.get(field))
+
+
+def article_key(article: Dict[str, Any]) -> str:
+    """Stable identity of an article: its URL plus publication time (title when there is no URL)."""
+    identity = article.get("url") or article.get("title") or ""
+    raw = f"{identity}|{article.get('publishedAt') or ''}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _Aggregate:
+    __slots__ = ("scores", "total")
+
+    def __init__(self):
+        # Articles in the last response -> score, so evicting a score never skews the total
+        self.scores: Dict[str, float] = {}
+        self.total = 0.0
+
+
+class ArticleSentimentCache:
+    """
+    Remembers the score of every article it has seen, so a poll only runs the scorer on
+    articles that were not in any earlier response.
+
+    Scores are appended to a JSON-lines log (one `{"k": key, "s": score}` per line) and
+    reloaded on start; the log is rewritten with the newest `max_entries` scores once it
+    holds twice that many lines. For the `max_queries` most recent queries the set of
+    articles in the last response and their score total are kept, and only the articles
+    that entered or left the window are added to or subtracted from it.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.SENTIMENT_CACHE_PATH,
+        max_entries: int = settings.SENTIMENT_CACHE_MAX_ENTRIES,
+        max_queries: int = settings.SENTIMENT_CACHE_MAX_QUERIES,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._scores: "OrderedDict[str, float]" = OrderedDict()
+        self._aggregates: "OrderedDict[str, _Aggregate]" = OrderedDict()
+        self._log_lines = 0
+        self._metrics = {"scored": 0, "reused": 0}
+        self._load()
+
+    def score_articles(self, query: str, articles: List[Dict[str, Any]], scorer: Scorer) -> Dict[str, Any]:
+        """
+        Return {"average", "count", "scored", "reused"} for the articles of one response.
+        Articles repeated within the response count once; `average` is None if there are none.
+        """
+        by_key = {article_key(article): article for article in articles}
+        known_scores, new_scores = self._score_missing(by_key, scorer)
+        # Not re-read from self._scores, another query may have evicted them in the meantime
+        current = {key: new_scores[key] if key in new_scores else known_scores[key] for key in by_key}
+
+        with self._lock:
+            for key, score in current.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            self._append_locked(new_scores)
+
+            query_key = query.lower().strip()
+            aggregate = self._aggregates.pop(query_key, None) or _Aggregate()
+            self._aggregates[query_key] = aggregate
+            while len(self._aggregates) > self.max_queries:
+                self._aggregates.popitem(last=False)
+            for key in aggregate.scores.keys() - current.keys():
+                aggregate.total -= aggregate.scores[key]
+            for key in current.keys() - aggregate.scores.keys():
+                aggregate.total += current[key]
+            aggregate.scores = current
+            if not current:
+                # Keep rounding drift from accumulating across empty windows
+                aggregate.total = 0.0
+
+            self._metrics["scored"] += len(new_scores)
+            self._metrics["reused"] += len(by_key) - len(new_scores)
+            return {
+                "average": aggregate.total / len(current) if current else None,
+                "count": len(current),
+                "scored": len(new_scores),
+                "reused": len(by_key) - len(new_scores),
+            }
+
+    def prime(self, articles: List[Dict[str, Any]], scorer: Scorer) -> int:
+        """Score the unseen articles of a combined response in one batch; returns how many were scored."""
+        _, new_scores = self._score_missing({article_key(article): article for article in articles}, scorer)
+        with self._lock:
+            self._scores.update(new_scores)
+            self._append_locked(new_scores)
+            self._metrics["scored"] += len(new_scores)
+        return len(new_scores)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["entries"] = len(self._scores)
+        seen = metrics["scored"] + metrics["reused"]
+        metrics["reuse_rate"] = round(metrics["reused"] / seen, 4) if seen else 0.0
+        return metrics
+
+    def _score_missing(
+        self, by_key: Dict[str, Dict[str, Any]], scorer: Scorer
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Return the cached scores of the known keys and the new scores of the others."""
+        with self._lock:
+            known = {key: self._scores[key] for key in by_key if key in self._scores}
+        missing = [key for key in by_key if key not in known]
+        # The scorer runs outside the lock so concurrent queries do not serialize on it
+        scores = scorer([article_text(by_key[key]) for key in missing]) if missing else []
+        return known, {key: float(score) for key, score in zip(missing, scores)}
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn last line after a crash
+                        continue
+                    self._scores[record["k"]] = float(record["s"])
+                    self._scores.move_to_end(record["k"])
+                    self._log_lines += 1
+        except OSError:
+            pass
+        while len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+
+    def _append_locked(self, new_scores: Dict[str, float]):
+        if not new_scores:
+            return
+        while len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self._log_lines + len(new_scores) > 2 * self.max_entries:
+            self._compact_locked()
+            return
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps({"k": key, "s": score}) + "\n" for key, score in new_scores.items())
+        self._log_lines += len(new_scores)
+
+    def _compact_locked(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.writelines(json.dumps({"k": key, "s": score}) + "\n" for key, score in self._scores.items())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._log_lines = len(self._scores)
+
+
+_cache: Optional[ArticleSentimentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_sentiment_cache() -> ArticleSentimentCache:
+    """Return the shared article score cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ArticleSentimentCache()
+    return _cache
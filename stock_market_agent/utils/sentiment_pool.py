@@ -0,0 +1,159 @@
+"""Batch VADER scoring sharded across a warm process pool."""
+
+import atexit
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from stock_market_agent.config import settings
+
+# Loaded once per worker process by the pool initializer
+_worker_analyzer: Optional[SentimentIntensityAnalyzer] = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def _ping(_) -> bool:
+    # Keeps the worker busy briefly so map() hands one ping to each process
+    time.sleep(0.05)
+    return _worker_analyzer is not None
+
+
+def _score_chunk(texts: List[str]) -> List[Dict[str, float]]:
+    return [_worker_analyzer.polarity_scores(text) for text in texts]
+
+
+class SentimentScoringPool:
+    """
+    Scores texts with VADER across `max_workers` processes.
+
+    VADER is pure Python, so threads would serialize on the GIL. Each worker builds its
+    SentimentIntensityAnalyzer once in the pool initializer and then only receives text
+    chunks. Batches below `min_parallel` texts are scored in the calling process. The
+    pool is started by the first larger batch (or by `warm()`) and lives until the
+    interpreter exits.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.SENTIMENT_POOL_WORKERS,
+        chunk_size: int = settings.SENTIMENT_CHUNK_SIZE,
+        min_parallel: int = settings.SENTIMENT_MIN_PARALLEL,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = max(1, chunk_size)
+        self.min_parallel = min_parallel
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._local_analyzer: Optional[SentimentIntensityAnalyzer] = None
+        self._metrics = {"batches": 0, "texts": 0, "parallel_batches": 0, "seconds": 0.0}
+        self._warm = False
+
+    def warm(self):
+        """
+        Start every worker and load its lexicon now instead of on the first batch. Does
+        nothing once warm, with a single worker, or inside a spawned child process, which
+        re-imports the parent's main module and must not start a pool of its own.
+        """
+        if self._warm or self.max_workers == 1 or multiprocessing.current_process().name != "MainProcess":
+            return
+        started = time.perf_counter()
+        executor = self._get_executor()
+        list(executor.map(_ping, [None] * self.max_workers))
+        self._warm = True
+        print(f"Sentiment pool warm: {self.max_workers} workers in {time.perf_counter() - started:.2f}s")
+
+    def score(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Return {"scores": [...], "metrics": {...}}: one VADER polarity dict per text in
+        input order, plus the size, chunking and throughput of this batch.
+        """
+        started = time.perf_counter()
+        parallel = len(texts) >= self.min_parallel and self.max_workers > 1
+        if parallel:
+            chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+            # map() yields in submission order, so flattening keeps the input order
+            scores = [score for chunk in self._get_executor().map(_score_chunk, chunks) for score in chunk]
+        else:
+            chunks = [texts] if texts else []
+            analyzer = self._get_local_analyzer()
+            scores = [analyzer.polarity_scores(text) for text in texts]
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._metrics["batches"] += 1
+            self._metrics["texts"] += len(texts)
+            self._metrics["parallel_batches"] += int(parallel)
+            self._metrics["seconds"] += elapsed
+        return {
+            "scores": scores,
+            "metrics": {
+                "texts": len(texts),
+                "chunks": len(chunks),
+                "workers": self.max_workers if parallel else 1,
+                "seconds": round(elapsed, 4),
+                "texts_per_second": round(len(texts) / elapsed, 1) if elapsed > 0 else None,
+            },
+        }
+
+    def score_compound(self, texts: List[str]) -> List[float]:
+        result = self.score(texts)
+        metrics = result["metrics"]
+        if metrics["texts"]:
+            print(
+                f"Scored {metrics['texts']} texts in {metrics['chunks']} chunks on {metrics['workers']} workers: "
+                f"{metrics['seconds']}s, {metrics['texts_per_second']} texts/s"
+            )
+        return [score["compound"] for score in result["scores"]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["texts_per_second"] = round(metrics["texts"] / metrics["seconds"], 1) if metrics["seconds"] else None
+        metrics["seconds"] = round(metrics["seconds"], 4)
+        return metrics
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent runs HTTP, cache and failover threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _get_local_analyzer(self) -> SentimentIntensityAnalyzer:
+        with self._lock:
+            if self._local_analyzer is None:
+                self._local_analyzer = SentimentIntensityAnalyzer()
+            return self._local_analyzer
+
+
+_pool: Optional[SentimentScoringPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sentiment_pool() -> SentimentScoringPool:
+    """Return the shared scoring pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SentimentScoringPool()
+                atexit.register(_pool.shutdown)
+    return _pool
@@ -0,0 +1,79 @@
+"""Coalesce identical in-flight provider requests so concurrent graph runs share one upstream call."""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    The first caller for a key (the leader) runs the function. Callers that arrive with
+    the same key while it is running block and receive the leader's result, or its exception.
+    Results are shared, not copied, so callers must treat them as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._metrics = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._metrics["coalesced"] += 1
+                is_leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._metrics["executions"] += 1
+                is_leader = True
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["in_flight"] = len(self._calls)
+        total = metrics["executions"] + metrics["coalesced"]
+        metrics["coalesced_ratio"] = round(metrics["coalesced"] / total, 4) if total else 0.0
+        return metrics
+
+
+_singleflight: Optional[SingleFlight] = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """Return the process wide request coalescer, creating it on first use."""
+    global _singleflight
+    if _singleflight is None:
+        with _singleflight_lock:
+            if _singleflight is None:
+                _singleflight = SingleFlight()
+    return _singleflight
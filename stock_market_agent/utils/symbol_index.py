@@ -0,0 +1,418 @@
+"""Offline company-name and ticker index built from exchange listing files."""
+
+import csv
+import io
+import os
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.company_matcher import company_aliases
+from stock_market_agent.utils.provider_backend import get_provider_backend
+
+# Share-class and security-type tails of listing names ("Alphabet Inc - Class A")
+_SECURITY_SUFFIX = re.compile(
+    r"\s*[-,]?\s*(class [a-z]\b.*|common stock.*|ordinary shares.*|american depositary.*|\bads?\b.*|\badr\b.*)$",
+    re.IGNORECASE,
+)
+_NON_WORD = re.compile(r"[^\w&]+")
+# Capitalized words, tickers and exchange-qualified symbols ("RELIANCE.BSE") of a query
+_QUERY_TOKEN = re.compile(r"[A-Za-z0-9&][\w&'.-]*")
+# Capitalized words that start or pepper questions and never name a company on their own
+_QUERY_STOPWORDS = {
+    "a", "about", "an", "analyse", "analyze", "and", "are", "buy", "can", "compare", "could",
+    "do", "does", "for", "get", "give", "hello", "hi", "how", "i", "in", "is", "it", "me", "my",
+    "now", "of", "on", "or", "please", "sell", "should", "show", "stock", "stocks", "tell", "the",
+    "this", "to", "today", "vs", "was", "what", "when", "which", "who", "why", "will", "with",
+    "would", "you",
+}
+# Text with no lower-case letter, where capitalization says nothing about names or tickers
+_NO_LOWER_CASE = re.compile(r"^[^a-z]*$")
+
+
+# Tickers written out in a query: cashtags ("$AAPL"), exchange-qualified ("RELIANCE.BSE") or bare upper case ("MSFT")
+_EXPLICIT_TICKER = re.compile(
+    r"(?<![\w$.])(?:\$(?P<cashtag>[A-Za-z][A-Za-z0-9&-]*(?:\.[A-Za-z]{1,4})?)"
+    r"|(?P<qualified>[A-Za-z][A-Za-z0-9&-]*\.[A-Za-z]{1,4})"
+    r"|(?P<bare>[A-Z][A-Z0-9]{1,9}))(?![\w.]*\w)"
+)
+# Upper-case words of finance questions that collide with real tickers (e.g. AI, IT, EPS)
+_ACRONYMS = {
+    "AI", "ATH", "CAGR", "CEO", "CFO", "DCF", "EBIT", "EMA", "EPS", "ESG", "ETF", "EV", "FY", "GDP",
+    "IPO", "IT", "MACD", "OK", "PE", "QOQ", "RSI", "SMA", "TTM", "UK", "US", "USA", "USD", "INR", "YOY",
+    "ALL", "BUY", "SELL", "HOLD", "NOW", "ME", "IS", "ON", "OR", "SO", "AM", "AN", "AT", "BE", "BY",
+    "DO", "GO", "IF", "IN", "MY", "NO", "OF", "TO", "UP", "WE",
+}
+
+
+def _not_a_mention(word: str) -> bool:
+    """Capitalized words that never name a company on their own."""
+    return word.lower() in _QUERY_STOPWORDS or word.upper() in _ACRONYMS or word.upper() in settings.SYMBOL_EXCHANGE_HINTS
+
+
+def normalize(text: str) -> str:
+    """Lower-case words separated by single spaces, punctuation other than "&" dropped."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def mention_runs(query: str) -> List[List[Tuple[str, bool]]]:
+    """
+    Runs of capitalized words, numbers-with-letters and exchange-qualified symbols not
+    broken by punctuation or lower-case words, as (word, starts a sentence) pairs. These
+    are the candidate company mentions of a query; "'s" and trailing dots are dropped.
+    """
+    runs: List[List[Tuple[str, bool]]] = [[]]
+    previous_end = 0
+    sentence_start = True
+    for found_token in _QUERY_TOKEN.finditer(query):
+        raw = found_token.group()
+        token = re.sub(r"'s$", "", raw.rstrip(".'"))
+        separator = query[previous_end:found_token.start()]
+        previous_end = found_token.end()
+        sentence_start = sentence_start or any(mark in separator for mark in ".?!")
+        if separator.strip() and runs[-1]:
+            runs.append([])
+        # Bare numbers (years, amounts) never name a company
+        if not token.isdigit() and (token[:1].isupper() or token[:1].isdigit() or "." in token):
+            runs[-1].append((token, sentence_start))
+        elif runs[-1]:
+            runs.append([])
+        sentence_start = raw.endswith(".")
+    return [run for run in runs if run]
+
+
+def query_mentions(query: str) -> List[str]:
+    """The candidate company mentions of a query: its `mention_runs` split at stopwords, finance acronyms and exchange names."""
+    mentions = []
+    for run in mention_runs(query):
+        phrase: List[str] = []
+        for word, _ in run + [("", False)]:
+            if word and not _not_a_mention(word):
+                phrase.append(word)
+            elif phrase:
+                mentions.append(" ".join(phrase))
+                phrase = []
+    return mentions
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Listing(NamedTuple):
+    symbol: str
+    name: str
+    exchange: str
+
+
+class SymbolMatch(NamedTuple):
+    symbol: str
+    name: str
+    exchange: str
+    # "symbol", "exact", "prefix" or "fuzzy"
+    kind: str
+    score: float
+
+
+class SymbolIndex:
+    """
+    In-memory lookup of listed companies by ticker, name or alias.
+
+    Every listing is indexed under its symbol (and the symbol without an exchange suffix,
+    so RELIANCE finds RELIANCE.BSE), its normalized name and the name without legal and
+    share-class suffixes. A mention is looked up exactly first, then as a whole-word
+    prefix of a name, then by character trigram similarity (Dice coefficient), so
+    "Microsft" still finds Microsoft.
+    """
+
+    def __init__(self, listings: Iterable[Tuple[str, str, str, Iterable[str]]] = ()):
+        self._listings: List[Listing] = []
+        self._symbols: Dict[str, Set[int]] = {}
+        self._names: Dict[str, Set[int]] = {}
+        self._sorted_names: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}
+        self.max_name_words = 1
+        for symbol, name, exchange, aliases in listings:
+            self._add(symbol, name, exchange, aliases)
+        self._sorted_names = sorted(self._names)
+        for key in self._names:
+            grams = _trigrams(key)
+            self._gram_counts[key] = len(grams)
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(key)
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "SymbolIndex":
+        """
+        Build the index from CSV listing files with `symbol` and `name` columns and optional
+        `exchange`, `assetType`, `status` and `aliases` ("|" separated) columns, as in the
+        Alpha Vantage LISTING_STATUS download. Missing files are skipped.
+        """
+        def rows():
+            for path in paths:
+                try:
+                    with open(path, "r", newline="", encoding="utf-8") as f:
+                        for row in csv.DictReader(f):
+                            if (row.get("status") or "Active").lower() != "active" or not row.get("symbol") or not row.get("name"):
+                                continue
+                            aliases = [alias for alias in (row.get("aliases") or "").split("|") if alias.strip()]
+                            yield row["symbol"].strip().upper(), row["name"].strip(), (row.get("exchange") or "").strip().upper(), aliases
+                except OSError:
+                    print(f"Symbol listing {path} not found, skipping")
+        return cls(rows())
+
+    def lookup(self, mention: str, limit: int = 5, symbols: bool = True, fuzzy: bool = True) -> List[SymbolMatch]:
+        """
+        Best matches for a company name, alias or (when `symbols` is set) ticker, best first.
+        Fuzzy matches (with `fuzzy` set) need SYMBOL_FUZZY_MIN_LENGTH characters and the
+        same first letter as the name, since typos rarely change it and other words share
+        trigrams with some listing.
+        """
+        matches: Dict[int, SymbolMatch] = {}
+
+        def add(positions: Iterable[int], kind: str, score: float):
+            for position in positions:
+                if position not in matches or matches[position].score < score:
+                    matches[position] = SymbolMatch(*self._listings[position], kind=kind, score=score)
+
+        if symbols:
+            add(self._symbols.get(mention.strip().lstrip("$").upper(), ()), "symbol", 1.0)
+        key = normalize(mention)
+        if key:
+            add(self._names.get(key, ()), "exact", 1.0)
+            if not matches:
+                for name in self._prefixed(key):
+                    # Longer names leave more unsaid, so they rank lower
+                    add(self._names[name], "prefix", 0.9 * len(key) / len(name))
+            if not matches and fuzzy and len(key) >= settings.SYMBOL_FUZZY_MIN_LENGTH:
+                for name, score in self._similar(key):
+                    add(self._names[name], "fuzzy", score)
+        return sorted(matches.values(), key=lambda match: (-match.score, match.symbol))[:limit]
+
+    def resolve(self, mention: str, exchange: Optional[str] = None, symbols: bool = True, fuzzy: bool = True) -> Optional[SymbolMatch]:
+        """
+        The listing `mention` names, or None when it matches nothing or is ambiguous: several
+        equally good listings, or a best prefix or fuzzy match that is weak or too close to
+        the runner-up. `exchange` (e.g. "BSE") narrows the candidates first.
+        """
+        matches = self.lookup(mention, symbols=symbols, fuzzy=fuzzy)
+        if exchange:
+            exchange = exchange.upper()
+            matches = [match for match in matches if match.exchange == exchange or match.symbol.endswith(f".{exchange}")] or matches
+        if not matches:
+            return None
+        best = matches[0]
+        runner_up = matches[1].score if len(matches) > 1 else 0.0
+        if best.kind in ("symbol", "exact"):
+            return best if runner_up < best.score else None
+        if best.score < settings.SYMBOL_MATCH_MIN_SCORE or best.score - runner_up < settings.SYMBOL_MATCH_MARGIN:
+            return None
+        return best
+
+    def resolve_query(self, query: str) -> Optional[List[SymbolMatch]]:
+        """
+        The companies named in a free-text query, or None when the query has to go to the
+        LLM: no company was recognized, or one of the candidate mentions is ambiguous or
+        matches nothing ("Apple or Facebook" without a Facebook listing), since answering
+        with the other companies alone would drop it.
+
+        Mentions are the `mention_runs` of the query, tried longest
+        first. Multi-word mentions must match a name or alias exactly, single words may
+        also match by prefix, and fuzzily unless they start a sentence, where ordinary
+        words are capitalized too. A query without lower-case letters carries no such
+        signal and always goes to the LLM. Stopwords, finance acronyms (EPS, RSI) and
+        exchange names are not mentions. Bare words are never read as tickers ("Ford" is
+        not FORD); only exchange-qualified symbols such as RELIANCE.BSE are. An exchange
+        named in the query ("on NSE") narrows listings of the same company.
+        """
+        if _NO_LOWER_CASE.match(query):
+            return None
+        runs = mention_runs(query)
+        exchange = next((token.upper() for run in runs for token, _ in run if token.upper() in settings.SYMBOL_EXCHANGE_HINTS), None)
+
+        found: Dict[str, SymbolMatch] = {}
+        for run in runs:
+            start = 0
+            while start < len(run):
+                for end in range(min(len(run), start + self.max_name_words), start, -1):
+                    phrase = " ".join(token for token, _ in run[start:end])
+                    single = end - start == 1
+                    if single and _not_a_mention(phrase):
+                        continue
+                    qualified = single and "." in phrase
+                    fuzzy = single and not run[start][1]
+                    candidates = self.lookup(phrase, limit=1, symbols=qualified, fuzzy=fuzzy)
+                    if not candidates or (not single and candidates[0].kind != "exact"):
+                        continue
+                    match = self.resolve(phrase, exchange, symbols=qualified, fuzzy=fuzzy)
+                    if match is None:
+                        return None
+                    found.setdefault(match.symbol, match)
+                    start = end
+                    break
+                else:
+                    if not _not_a_mention(run[start][0]):
+                        print(f"No listing matches {run[start][0]!r}, leaving the query to the LLM")
+                        return None
+                    start += 1
+        return list(found.values()) or None
+
+    def explicit_tickers(self, text: str) -> List[SymbolMatch]:
+        """
+        Tickers typed out in `text`, in order: cashtags and exchange-qualified symbols in
+        any case, bare symbols only in upper case and never common acronyms. Each must be a
+        listed symbol; one that stands for several listings (RELIANCE on BSE and NSE) is
+        kept only if an exchange named in the text picks one of them.
+
+        Plenty of short words are tickers too (FOR, ALL, NOW), so a bare symbol shorter
+        than SYMBOL_BARE_MIN_LENGTH, or any bare symbol in text without lower-case letters,
+        is only kept when it is also a name or alias of its listing.
+
+        The result is all or nothing: it is empty when a typed symbol cannot be confirmed
+        ("AMD or NVDA") or another word may name a company ("AAPL with Microsoft"), so the
+        caller never analyses only part of the companies asked about.
+        """
+        words = {word.upper() for word in re.findall(r"\w+", text)}
+        exchange = next((word for word in words if word in settings.SYMBOL_EXCHANGE_HINTS), None)
+        shouting = bool(_NO_LOWER_CASE.match(text))
+        found: Dict[str, SymbolMatch] = {}
+        rest = text
+        for token in _EXPLICIT_TICKER.finditer(text):
+            symbol = (token.group("cashtag") or token.group("qualified") or token.group("bare")).upper()
+            rest = rest[:token.start()] + " " * (token.end() - token.start()) + rest[token.end():]
+            if token.group("bare") and (symbol in _ACRONYMS or symbol in settings.SYMBOL_EXCHANGE_HINTS):
+                continue
+            positions = self._symbols.get(symbol, set())
+            if token.group("bare") and (shouting or len(symbol) < settings.SYMBOL_BARE_MIN_LENGTH):
+                positions = positions & self._names.get(normalize(symbol), set())
+            listings = [self._listings[position] for position in sorted(positions)]
+            if len(listings) > 1:
+                listings = [listing for listing in listings if listing.symbol == symbol] or [
+                    listing for listing in listings if exchange and (listing.exchange == exchange or listing.symbol.endswith(f".{exchange}"))
+                ]
+            if len(listings) != 1:
+                return []
+            found.setdefault(listings[0].symbol, SymbolMatch(*listings[0], kind="symbol", score=1.0))
+        if found and self._names_a_company(rest):
+            return []
+        return list(found.values())
+
+    def _names_a_company(self, text: str) -> bool:
+        """Whether a word of `text` other than stopwords, acronyms and exchanges may name a company."""
+        for found_token in _QUERY_TOKEN.finditer(text):
+            word = re.sub(r"'s$", "", found_token.group().rstrip(".'"))
+            if word.isdigit() or _not_a_mention(word):
+                continue
+            if word[:1].isupper() or normalize(word) in self._names:
+                return True
+        return False
+
+    def _add(self, symbol: str, name: str, exchange: str, aliases: Iterable[str]):
+        position = len(self._listings)
+        self._listings.append(Listing(symbol, name, exchange))
+        self._symbols.setdefault(symbol, set()).add(position)
+        base = symbol.split(".")[0]
+        if base != symbol:
+            self._symbols.setdefault(base, set()).add(position)
+
+        names = set()
+        for candidate in [name, *aliases]:
+            short = _SECURITY_SUFFIX.sub("", candidate).strip() or candidate
+            names.update(normalize(alias) for alias in company_aliases(short) + [candidate])
+        for key in names:
+            if key:
+                self._names.setdefault(key, set()).add(position)
+                self.max_name_words = max(self.max_name_words, len(key.split()))
+
+    def _prefixed(self, key: str) -> List[str]:
+        names = []
+        position = bisect_left(self._sorted_names, key + " ")
+        while position < len(self._sorted_names) and self._sorted_names[position].startswith(key + " "):
+            names.append(self._sorted_names[position])
+            position += 1
+            if len(names) > settings.SYMBOL_MAX_CANDIDATES:
+                break
+        return names
+
+    def _similar(self, key: str) -> List[Tuple[str, float]]:
+        grams = _trigrams(key)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for name in self._trigrams.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+        scored = []
+        for name, count in shared.items():
+            if name[0] != key[0]:
+                continue
+            score = 2.0 * count / (len(grams) + self._gram_counts[name])
+            if score >= settings.SYMBOL_FUZZY_MIN_SCORE:
+                scored.append((name, score))
+        scored.sort(key=lambda item: -item[1])
+        return scored[: settings.SYMBOL_MAX_CANDIDATES]
+
+
+def download_listing(path: str = settings.SYMBOL_LISTING_PATHS[0], api_key: Optional[str] = None) -> int:
+    """Save the Alpha Vantage LISTING_STATUS csv (active US listings) to `path`; returns the row count."""
+    from stock_market_agent.utils.alpha_vantage import ALPHA_VANTAGE_URL
+    from stock_market_agent.utils.get_api_key import get_api_key
+    from stock_market_agent.utils.http_client import get_http_client
+    from stock_market_agent.utils.rate_limiter import get_alpha_vantage_limiter
+
+    api_key = api_key or get_api_key("ALPHA_VANTAGE_API_KEY")
+    if not api_key:
+        raise ValueError("No ALPHA_VANTAGE API key found. Please set the ALPHA_VANTAGE_API_KEY environment variable.")
+    get_alpha_vantage_limiter().acquire("background", timeout=settings.ALPHA_VANTAGE_MAX_QUEUE_WAIT)
+    response = get_http_client().get(ALPHA_VANTAGE_URL, params={"function": "LISTING_STATUS", "apikey": api_key})
+    response.raise_for_status()
+    rows = list(csv.reader(io.StringIO(response.text)))
+    if not rows or "symbol" not in rows[0]:
+        raise ValueError(f"Unexpected LISTING_STATUS response: {response.text[:200]}")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        f.write(response.text)
+    os.replace(tmp_path, path)
+    return len(rows) - 1
+
+
+_index: Optional[SymbolIndex] = None
+_index_lock = threading.Lock()
+# Set once the first listing file exists, a download of it was tried or downloads are off
+_listing_settled = False
+
+
+def get_symbol_index(state: Optional[dict] = None) -> SymbolIndex:
+    """
+    Return the shared index, building it on first use. When the first listing file is
+    missing and SYMBOL_LISTING_AUTO_DOWNLOAD is set, the first live or record run
+    downloads it once; a replay run, whether selected by PROVIDER_MODE, the run's config
+    or the `dry_run` flag in `state`, never touches the network and uses the listings
+    present. Without listings every query falls back to the LLM.
+    """
+    global _index, _listing_settled
+    if _index is not None and _listing_settled:
+        return _index
+    with _index_lock:
+        paths = settings.SYMBOL_LISTING_PATHS
+        if not _listing_settled:
+            if os.path.exists(paths[0]) or not settings.SYMBOL_LISTING_AUTO_DOWNLOAD:
+                _listing_settled = True
+            elif not get_provider_backend(state=state).is_replay:
+                _listing_settled = True
+                try:
+                    print(f"Downloaded {download_listing(paths[0])} listings to {paths[0]}")
+                    # Rebuild an index a replay run built without the listing
+                    _index = None
+                except Exception as e:
+                    print(f"Could not download the symbol listing: {e}")
+        if _index is None:
+            _index = SymbolIndex.from_files(paths)
+    return _index
@@ -0,0 +1,176 @@
+"""Persistent cache of resolved tickers, keyed by the company mentions of a query."""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from stock_market_agent.config import settings
+from stock_market_agent.utils.company_matcher import company_aliases
+from stock_market_agent.utils.symbol_index import normalize, query_mentions
+
+# (companyName, tickerId) pairs, in the order the query names them
+Resolution = List[Tuple[str, str]]
+
+_POSSESSIVE = re.compile(r"['’]s\b", re.IGNORECASE)
+# Words that phrase a request without naming what it is about
+_FILLER_WORDS = {
+    "a", "about", "all", "an", "analyse", "analysis", "analyze", "and", "any", "are", "at", "be",
+    "buy", "can", "chart", "check", "company", "compare", "could", "data", "do", "does", "doing",
+    "earnings", "financial", "financials", "for", "from", "fundamentals", "get", "give", "good",
+    "hello", "hi", "hold", "how", "i", "in", "investment", "is", "it", "latest", "look", "me",
+    "my", "news", "now", "of", "on", "or", "outlook", "performance", "please", "price", "prices",
+    "quote", "recent", "report", "sell", "share", "shares", "should", "show", "statement",
+    "statements", "stock", "stocks", "tell", "the", "think", "to", "today", "trend", "up", "vs",
+    "versus", "was", "what", "whats", "when", "which", "who", "why", "will", "with", "worth",
+    "would", "you",
+}
+
+
+def query_key(query: str) -> str:
+    """
+    The company mentions of a query, each without its legal suffix, so "How has Apple
+    performed this quarter?" and "Apple Inc. stock" share the key "apple". Word order is
+    kept ("apple microsoft"). A query without capitalized mentions ("analyze apple") is
+    keyed by its words minus the phrasing.
+    """
+    mentions = query_mentions(query)
+    if mentions:
+        return " ".join(normalize(company_aliases(mention)[-1]) for mention in mentions)
+    return " ".join(word for word in normalize(_POSSESSIVE.sub("", query)).split() if word not in _FILLER_WORDS)
+
+
+class TickerResolutionCache:
+    """
+    Maps query keys to the tickers they resolved to, least recently used evicted first.
+
+    Resolutions are appended to a JSON-lines log (`{"k", "v", "u"}` per line, the last
+    line of a key wins) and reloaded on start; the log is rewritten with the live entries
+    once it holds twice `max_entries` lines. Entries set through `correct` are marked as
+    user corrections and are never overwritten by a later automatic resolution.
+    """
+
+    def __init__(self, path: str = settings.TICKER_CACHE_PATH, max_entries: int = settings.TICKER_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (resolution, set by the user)
+        self._entries: "OrderedDict[str, Tuple[Resolution, bool]]" = OrderedDict()
+        self._log_lines = 0
+        self._metrics = {"hits": 0, "misses": 0, "stores": 0, "corrections": 0}
+        self._load()
+
+    def get(self, query: str) -> Optional[Resolution]:
+        key = query_key(query)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._metrics["hits"] += 1
+            return list(entry[0])
+
+    def put(self, query: str, resolution: Resolution):
+        """Store an automatic resolution, unless the user corrected this key."""
+        key = query_key(query)
+        if not key or not resolution:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1]:
+                return
+            self._store_locked(key, resolution, False)
+            self._metrics["stores"] += 1
+
+    def correct(self, query: str, resolution: Resolution):
+        """Pin the tickers a query (or bare company mention) stands for; an empty resolution forgets it."""
+        key = query_key(query)
+        if not key:
+            raise ValueError(f"No company mention left in {query!r} after normalization")
+        with self._lock:
+            if resolution:
+                self._store_locked(key, resolution, True)
+            else:
+                self._entries.pop(key, None)
+                self._append_locked(key, None, True)
+            self._metrics["corrections"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["entries"] = len(self._entries)
+            metrics["corrected_entries"] = sum(1 for _, user in self._entries.values() if user)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = round(metrics["hits"] / lookups, 4) if lookups else 0.0
+        return metrics
+
+    def _store_locked(self, key: str, resolution: Resolution, user: bool):
+        resolution = [(str(name), str(ticker)) for name, ticker in resolution]
+        self._entries[key] = (resolution, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._append_locked(key, resolution, user)
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key, resolution, user = record["k"], record["v"], bool(record.get("u"))
+                    except (ValueError, KeyError):
+                        # Torn last line after a crash
+                        continue
+                    self._log_lines += 1
+                    if resolution is None:
+                        self._entries.pop(key, None)
+                        continue
+                    self._entries[key] = ([tuple(pair) for pair in resolution], user)
+                    self._entries.move_to_end(key)
+        except OSError:
+            pass
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _append_locked(self, key: str, resolution: Optional[Resolution], user: bool):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self._log_lines + 1 > 2 * self.max_entries:
+            self._compact_locked()
+            return
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"k": key, "v": resolution, "u": user}) + "\n")
+        self._log_lines += 1
+
+    def _compact_locked(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.writelines(
+                    json.dumps({"k": key, "v": resolution, "u": user}) + "\n"
+                    for key, (resolution, user) in self._entries.items()
+                )
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._log_lines = len(self._entries)
+
+
+_cache: Optional[TickerResolutionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ticker_cache() -> TickerResolutionCache:
+    """Return the shared ticker resolution cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TickerResolutionCache()
+    return _cache
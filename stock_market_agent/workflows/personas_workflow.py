@@ -16,6 +16,9 @@ from stock_market_agent.nodes.data_collection_node_v2 import data_collection_nod
 from stock_market_agent.nodes.collect_market_conditions import collect_market_conditions
 from stock_market_agent.nodes.indicators_node import indicators_node
 
+from stock_market_agent.config import settings
+from stock_market_agent.utils.sentiment_pool import get_sentiment_pool
+
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.checkpoint.memory import MemorySaver
 # Develop a system to track each agent's performance over time, which could be used to adjust their influence on the final decision.
@@ -52,6 +55,9 @@ def make_decision(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
 def create_workflow_graph():
     from stock_market_agent.models.personas.financial_agent import AdaptiveWeightingSystem
     llm : BaseChatModel = ChatOpenAI(model="gpt-4o")
+    if settings.SENTIMENT_POOL_WARM:
+        # Start the VADER workers with the graph, not on the first large news batch
+        get_sentiment_pool().warm()
 
     meta_analysis_agent = MetaAnalysisLLM(llm)
     graph = StateGraph(AgentState2)